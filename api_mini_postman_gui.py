@@ -1,8 +1,6 @@
 # Datei: mini_postman_gui.py
 import streamlit as st
-import requests
 import json
-from config import URL_PRESETS
 import logging
 import warnings
 
@@ -20,17 +18,155 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 import os
-import subprocess
-import sys
-import psutil
-import csv
-import pandas as pd
-from env_config import APIConfig, DatabaseConfig
+import uuid
+from datetime import datetime
 
-# Die Klasse lädt automatisch aus .env
-api_key = APIConfig.LIBRETRANSLATE_API_KEY  # "abc123xyz789_ihr_echter_key"
-db_pass = DatabaseConfig.PASSWORD  
+# Schwere Module (requests, psutil, subprocess, csv, Übersetzungsdienst) werden erst
+# bei Bedarf importiert - Streamlit führt das Skript bei jeder Eingabe neu aus.
 
+# Abfrageintervall für den Übersetzungs-Platzhalter (Sekunden)
+TRANSLATION_POLL_SECONDS = 1
+
+# Aktualisierungsintervall der Live-Ausgabe und Standard-Timeout für m*.py-Werkzeuge (Sekunden)
+TOOL_POLL_SECONDS = 0.5
+TOOL_TIMEOUT_SECONDS = 120
+
+# Standard für gleichzeitige Prozesse im Batch-Lauf (Werkzeuge × URLs)
+BATCH_MAX_PARALLEL = 8
+
+# Maximal angezeigte Änderungen im Body-Diff und gemerkte Antworten im Verlauf
+MAX_DIFF_ROWS = 200
+HISTORY_SIZE = 10
+
+# Maximal angezeigte Treffer im Abfrage-Panel (JSONPath/JMESPath)
+MAX_QUERY_ROWS = 500
+
+# Fallback für wichtigste Status Codes
+FALLBACK_STATUS_CODES = {
+    200: "Success - OK",
+    201: "Success - Created",
+    400: "Client Error - Bad Request",
+    401: "Client Error - Unauthorized",
+    403: "Client Error - Forbidden",
+    404: "Client Error - Not Found",
+    500: "Server Error - Internal Server Error",
+    502: "Server Error - Bad Gateway",
+    503: "Server Error - Service Unavailable"
+}
+
+
+@st.cache_resource
+def load_url_presets():
+    """URL-Vorlagen einmal pro Prozess laden"""
+    from config import URL_PRESETS
+    return dict(URL_PRESETS)
+
+@st.cache_resource
+def load_status_codes():
+    """Lädt HTTP Status Codes einmal pro Prozess aus der CSV-Datei"""
+    import csv
+
+    status_codes = {}
+    csv_path = os.path.join(os.path.dirname(__file__), 'http_status_codes.csv')
+
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                status_codes[int(row['number'])] = row['text']
+    except FileNotFoundError:
+        logging.warning("http_status_codes.csv nicht gefunden - verwende Fallback-Codes")
+        status_codes = dict(FALLBACK_STATUS_CODES)
+    except Exception as e:
+        logging.error(f"Fehler beim Laden der Status Codes: {e}")
+        status_codes = dict(FALLBACK_STATUS_CODES)
+
+    return status_codes
+
+@st.cache_resource
+def get_translation_worker():
+    """Prozessweiter Hintergrund-Worker für Übersetzungen"""
+    from env_config import APIConfig
+    from translation_service import TranslationWorker
+
+    # Neue Segmente landen nach jedem Auftrag wieder in der gemeinsamen Datei
+    worker = TranslationWorker(memory_file=APIConfig.TRANSLATION_MEMORY_FILE)
+    try:
+        # Gemeinsame Translation Memory mit dem Excel-Tool
+        worker.memory.load(APIConfig.TRANSLATION_MEMORY_FILE)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Translation Memory konnte nicht geladen werden: {e}")
+    return worker
+
+def get_session_owner():
+    """Eindeutige Kennung der aktuellen Session (veraltete Übersetzungen werden pro Session abgebrochen)"""
+    if "session_owner" not in st.session_state:
+        st.session_state["session_owner"] = uuid.uuid4().hex
+    return st.session_state["session_owner"]
+
+def render_memory_stats(result):
+    """Zeigt Trefferquote und eingesparte Zeit der Translation Memory an"""
+    stats = get_translation_worker().memory.stats
+    mem_col1, mem_col2, mem_col3 = st.columns(3)
+    mem_col1.metric("🧠 TM-Treffer (diese Antwort)", f"{result.memory_hits}/{result.memory_hits + result.memory_misses}")
+    mem_col2.metric("🎯 TM-Trefferquote gesamt", f"{stats.hit_rate:.0%}")
+    mem_col3.metric("⏱️ Eingesparte Zeit", f"{stats.time_saved_ms / 1000:.1f} s")
+
+@st.fragment(run_every=TRANSLATION_POLL_SECONDS)
+def poll_translation(request_id):
+    """Pollt nur, solange der Auftrag läuft; ist er fertig, zeigt ein App-Rerun das Ergebnis ohne Timer an"""
+    job = get_translation_worker().get(request_id)
+    if job is None or job.done or st.session_state.get("translation_request_id") != request_id:
+        st.rerun()
+    st.info("🔄 Übersetze Text im Hintergrund...")
+
+def render_translation(request_id):
+    """Zeigt den Stand der Hintergrund-Übersetzung an (pollt nur, solange sie läuft)"""
+    job = get_translation_worker().get(request_id)
+    if job is None:
+        st.warning("⚠️ Übersetzungsauftrag nicht mehr vorhanden")
+        return
+    if not job.done:
+        poll_translation(request_id)
+        return
+
+    result = job.result()
+    if result is None or result.status == "cancelled":
+        st.info("ℹ️ Übersetzung wurde durch eine neue Anfrage abgebrochen")
+        return
+
+    for level, message in result.notices:
+        getattr(st, level)(message)
+
+    if result.status == "same_language":
+        st.info(f"ℹ️ Quell- und Zielsprache sind identisch ({result.source_lang}) - keine Übersetzung nötig")
+    elif result.status == "done":
+        # Zeige nur den übersetzten Text prominent an
+        hedge_note = ", Hedge-Anfrage gewann" if result.hedged else ""
+        st.success(f"✅ Übersetzung erfolgreich! (via {result.provider}{hedge_note})")
+        st.text_area(
+            f"📝 Übersetzter Text ({result.source_lang} → {result.target_lang}):",
+            value=result.translated_text,
+            height=150,
+            disabled=True
+        )
+
+        # Optional: Zeige Alternativen wenn vorhanden
+        if result.alternatives:
+            with st.expander("🔀 Alternative Übersetzungen"):
+                for i, alt in enumerate(result.alternatives, 1):
+                    st.write(f"**Alternative {i}:** {alt}")
+
+        # Optional: Zeige vollständige API-Antwort
+        with st.expander("🔧 Vollständige API-Antwort (Debug)"):
+            st.json(result.raw)
+
+        render_memory_stats(result)
+
+        with st.expander("📈 Übersetzungs-Provider (Latenz & Gesundheit)"):
+            st.json(get_translation_worker().router.stats())
+    elif result.raw is not None:
+        st.json(result.raw)
 
 
 st.title("🧰 Mini Postman (Python Edition)")
@@ -39,8 +175,9 @@ st.title("🧰 Mini Postman (Python Edition)")
 method = st.selectbox("HTTP-Methode", ["GET", "POST", "PUT", "DELETE"])
 
 # URL-Auswahl mit vordefinierten Optionen
-url_preset = st.selectbox("URL-Vorlage wählen", list(URL_PRESETS.keys()))
-selected_url = URL_PRESETS[url_preset]
+url_presets = load_url_presets()
+url_preset = st.selectbox("URL-Vorlage wählen", list(url_presets.keys()))
+selected_url = url_presets[url_preset]
 
 # URL-Eingabefeld (wird automatisch mit ausgewählter Vorlage gefüllt)
 url = st.text_input("URL", value=selected_url, help="Wählen Sie eine Vorlage aus oder geben Sie eine benutzerdefinierte URL ein")
@@ -66,7 +203,8 @@ with col3:
     st.subheader("📝 Body (JSON oder Text)")
     data_input = st.text_area("Body", value="", height=200, key="body", help="Request Body - JSON oder Plain Text", label_visibility="collapsed")
 
-if send_request:
+def parse_request_inputs():
+    """Headers, Params und Body aus den Eingabefeldern; stoppt das Skript bei ungültigem JSON"""
     try:
         headers = json.loads(headers_input) if headers_input else {}
         params = json.loads(params_input) if params_input else {}
@@ -80,45 +218,14 @@ if send_request:
         json_data = json.loads(data_input) if data_input else None
     except:
         data = data_input
+    return headers, params, json_data, data
 
-    response = requests.request(method, url, headers=headers, params=params, json=json_data, data=data)
-
-    # HTTP Status Codes aus CSV-Datei laden
-    @st.cache_data
-    def load_status_codes():
-        """Lädt HTTP Status Codes aus CSV-Datei"""
-        status_codes = {}
-        csv_path = os.path.join(os.path.dirname(__file__), 'http_status_codes.csv')
-        
-        try:
-            with open(csv_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    status_codes[int(row['number'])] = row['text']
-        except FileNotFoundError:
-            st.warning("⚠️ http_status_codes.csv nicht gefunden - verwende Fallback-Codes")
-            # Fallback für wichtigste Status Codes
-            status_codes = {
-                200: "Success - OK",
-                201: "Success - Created", 
-                400: "Client Error - Bad Request",
-                401: "Client Error - Unauthorized",
-                403: "Client Error - Forbidden",
-                404: "Client Error - Not Found",
-                500: "Server Error - Internal Server Error",
-                502: "Server Error - Bad Gateway",
-                503: "Server Error - Service Unavailable"
-            }
-        except Exception as e:
-            st.error(f"❌ Fehler beim Laden der Status Codes: {e}")
-            status_codes = {200: "Success - OK", 404: "Client Error - Not Found", 500: "Server Error - Internal Server Error"}
-        
-        return status_codes
-
+def render_response(last_response):
+    """Zeigt Status, Header und Body der letzten Antwort an"""
     status_codes = load_status_codes()
     
     # Status Code anzeigen (nach URL-Feld, vor Headers)
-    status_code = response.status_code
+    status_code = last_response["status_code"]
     status_explanation = status_codes.get(status_code, f"Unbekannter Status Code ({status_code})")
     
     # Status Code mit Farbkodierung in dem Platzhalter anzeigen
@@ -142,24 +249,57 @@ if send_request:
     
     with resp_col1:
         st.subheader("🏷️ Response Headers")
-        st.json(dict(response.headers))
+        st.json(last_response["headers"])
     
     with resp_col2:
         st.subheader("📄 Response Body")
-        response_text = ""
-        try:
-            response_data = response.json()
-            st.json(response_data)
-            # Konvertiere JSON zu String für Übersetzung
-            response_text = json.dumps(response_data, indent=2, ensure_ascii=False)
-        except:
-            response_text = response.text
-            st.text(response_text)
-    
+        if last_response["is_json"]:
+            st.json(last_response["data"])
+        else:
+            st.text(last_response["text"])
+
+if send_request:
+    headers, params, json_data, data = parse_request_inputs()
+
+    import requests
+    # Body genau einmal parsen; Anzeige, Verlauf und Übersetzung nutzen dasselbe Objekt
+    from json_codec import dumps, parse_response
+
+    response = requests.request(method, url, headers=headers, params=params, json=json_data, data=data)
+    body = parse_response(response)
+    response_data = body.data if body.is_json else None
+
+    # Antwort in der Session merken, damit sie Reruns (z.B. nach fertiger Übersetzung) übersteht
+    st.session_state["last_response"] = {
+        "id": uuid.uuid4().hex,
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "is_json": body.is_json,
+        "data": response_data,
+        # Konvertiere JSON zu String für Übersetzung
+        "text": dumps(response_data, indent=True) if body.is_json else body.text,
+    }
+
+    # Antwort im Verlauf merken (für den Diff zwischen zwei Antworten)
+    history = st.session_state.setdefault("history", [])
+    history.append({
+        "time": datetime.now().strftime("%H:%M:%S"),
+        "method": method,
+        "url": url,
+        "status": response.status_code,
+        "body": response_data if body.is_json else body.text,
+    })
+    del history[:-HISTORY_SIZE]
+
+last_response = st.session_state.get("last_response")
+if last_response is not None:
+    render_response(last_response)
+
     # Trennlinie vor Übersetzungsbereich
     st.divider()
     
     # Übersetzung ganz unten anbieten wenn Response vorhanden
+    response_text = last_response["text"]
     if response_text and response_text.strip():
         st.subheader("🌐 Deutsche Übersetzung")
         
@@ -174,188 +314,381 @@ if send_request:
         
         with trans_col1:
             if auto_translate:
-                # Erst Sprache erkennen, dann übersetzen
-                try:
-                    # Begrenze Text auf 1000 Zeichen für Übersetzung
-                    text_to_translate = response_text[:1000] if len(response_text) > 1000 else response_text
-                    
-                    # Schritt 1: Sprache erkennen (nur wenn auto)
-                    if source_lang == "auto":
-                        detect_payload = {
-                            'q': text_to_translate,
-                            'api_key': ''
-                        }
-                        
-                        with st.spinner("🔍 Erkenne Sprache..."):
-                            detect_response = requests.post(
-                                "http://192.168.178.185:5000/detect", 
-                                json=detect_payload,
-                                headers={'Content-Type': 'application/json'},
-                                timeout=30
-                            )
-                        
-                        if detect_response.status_code == 200:
-                            detect_result = detect_response.json()
-                            if detect_result and len(detect_result) > 0:
-                                detected_language = detect_result[0].get('language', 'en')
-                                confidence = detect_result[0].get('confidence', 0)
-                                
-                                st.info(f"🔍 Erkannte Sprache: **{detected_language}** (Konfidenz: {confidence:.1f}%)")
-                                source_lang = detected_language
-                            else:
-                                st.warning("⚠️ Sprache konnte nicht erkannt werden - verwende Englisch")
-                                source_lang = "en"
-                        else:
-                            st.error(f"❌ Spracherkennung fehlgeschlagen: HTTP {detect_response.status_code}")
-                            source_lang = "en"
-                    
-                    # Schritt 2: Übersetzen (nur wenn Quellsprache != Zielsprache)
-                    if source_lang != target_lang:
-                        translate_payload = {
-                            'q': text_to_translate,
-                            'source': source_lang,
-                            'target': target_lang,
-                            'format': 'text',
-                            'alternatives': 3,
-                            'api_key': ''
-                        }
-                        
-                        with st.spinner("🔄 Übersetze Text..."):
-                            translate_response = requests.post(
-                                "http://192.168.178.185:5000/translate", 
-                                json=translate_payload,
-                                headers={'Content-Type': 'application/json'},
-                                timeout=60
-                            )
-                        
-                        if translate_response.status_code == 200:
-                            result = translate_response.json()
-                            
-                            # Zeige nur den übersetzten Text prominent an
-                            if 'translatedText' in result:
-                                st.success("✅ Übersetzung erfolgreich!")
-                                st.text_area(
-                                    f"📝 Übersetzter Text ({source_lang} → {target_lang}):",
-                                    value=result['translatedText'],
-                                    height=150,
-                                    disabled=True
-                                )
-                                
-                                # Optional: Zeige Alternativen wenn vorhanden
-                                if 'alternatives' in result and result['alternatives']:
-                                    with st.expander("🔀 Alternative Übersetzungen"):
-                                        for i, alt in enumerate(result['alternatives'], 1):
-                                            st.write(f"**Alternative {i}:** {alt}")
-                                
-                                # Optional: Zeige vollständige API-Antwort
-                                with st.expander("🔧 Vollständige API-Antwort (Debug)"):
-                                    st.json(result)
-                            else:
-                                st.error("❌ Kein übersetzter Text in der Antwort gefunden")
-                                st.json(result)
-                        else:
-                            st.error(f"❌ Übersetzungsfehler: HTTP {translate_response.status_code}")
-                    else:
-                        st.info(f"ℹ️ Quell- und Zielsprache sind identisch ({source_lang}) - keine Übersetzung nötig")
-                        
-                except requests.exceptions.Timeout:
-                    st.warning("⚠️ Zeitüberschreitung - Server antwortet nicht")
-                except requests.exceptions.ConnectionError:
-                    st.error("🚫 Verbindung fehlgeschlagen - Server nicht erreichbar auf http://192.168.178.185:5000")
-                except Exception as e:
-                    st.error(f"❌ Unerwarteter Fehler: {str(e)}")
+                # Übersetzung läuft im Hintergrund - die Seite ist sofort fertig gerendert,
+                # der Platzhalter füllt sich, sobald das Ergebnis da ist. Neu gestartet wird
+                # nur für eine neue Antwort oder geänderte Sprachen, nicht bei jedem Rerun.
+                translation_key = (last_response["id"], source_lang, target_lang)
+                if st.session_state.get("translation_key") != translation_key:
+                    request_id = uuid.uuid4().hex
+                    st.session_state["translation_key"] = translation_key
+                    st.session_state["translation_request_id"] = request_id
+                    get_translation_worker().submit(
+                        request_id, response_text, source_lang, target_lang,
+                        owner=get_session_owner()
+                    )
+                render_translation(st.session_state["translation_request_id"])
             else:
+                get_translation_worker().cancel(owner=get_session_owner())
+                st.session_state.pop("translation_key", None)
                 st.info("ℹ️ Automatische Übersetzung ist deaktiviert. Aktiviere die Checkbox oben um zu übersetzen.")
 
-def list_python_files():
-    """Listet alle Python-Dateien, die mit 'm' und einer Zahl beginnen."""
-    try:
-        # Versuche verschiedene Methoden um den Pfad zu finden
-        if '__file__' in globals() and globals()['__file__']:
-            base_path = os.path.dirname(os.path.abspath(__file__))
+@st.cache_resource
+def get_comparison_engine():
+    """Prozessweiter Vergleichs-Client mit gemeinsamem Verbindungspool"""
+    from request_compare import ComparisonEngine
+    return ComparisonEngine()
+
+def render_diff(changes):
+    """Aufklappbare Baumansicht eines strukturellen JSON-Diffs"""
+    from json_diff import summarize, to_tree
+
+    if not changes:
+        st.success("✅ Bodies sind strukturell identisch")
+        return
+    counts = summarize(changes)
+    st.caption(
+        f"➕ {counts['added']} hinzugefügt · ➖ {counts['removed']} entfernt · "
+        f"✏️ {counts['changed'] + counts['type']} geändert"
+    )
+    st.json(to_tree(changes, max_changes=MAX_DIFF_ROWS), expanded=2)
+
+def diff_comparison(results):
+    """Diff jedes Ziels gegen das erste (Referenz); einmal pro Vergleich berechnet, nicht pro Rerun"""
+    from json_diff import MerkleHasher, diff
+
+    baseline = results[0]
+    baseline_body = baseline.json()
+    # Ein Hasher für alle Ziele: Hashes der Referenz werden nur einmal berechnet
+    hasher = MerkleHasher()
+    diffs = []
+    for result in results[1:]:
+        if baseline.error or result.error:
+            continue
+        body = result.json()
+        if baseline_body is None or body is None:
+            diffs.append((result.base_url, None, baseline.content == result.content))
         else:
-            # Fallback: Aktuelles Arbeitsverzeichnis
-            base_path = os.getcwd()
-        
-        # Prüfe ob der Pfad existiert
-        if not os.path.exists(base_path):
-            base_path = os.getcwd()
-        
-        # Liste alle Python-Dateien die mit 'm' beginnen
-        files = []
-        for f in os.listdir(base_path):
-            if f.startswith('m') and f.endswith('.py'):
-                files.append(f)
-        
-        # Fallback: Wenn keine Dateien gefunden, füge Beispieldateien hinzu
-        if not files:
-            files = ['Keine m*.py Dateien gefunden']
-        
-        return files
-        
-    except Exception as e:
-        # Wenn alles fehlschlägt, gib eine Fehlermeldung zurück
-        return [f'Fehler beim Laden der Dateien: {str(e)}']
+            diffs.append((result.base_url, diff(baseline_body, body, hasher=hasher), None))
+    return diffs
+
+def render_comparison(results, diffs):
+    """Zeigt die Antworten aller Ziele nebeneinander und den strukturellen Body-Diff"""
+    st.subheader("📊 Vergleich")
+    for column, result in zip(st.columns(len(results)), results):
+        with column:
+            st.markdown(f"**{result.base_url}**")
+            if result.error:
+                st.error(f"❌ {result.error}")
+                continue
+            status_icon = "✅" if 200 <= result.status_code < 300 else "⚠️" if result.status_code < 500 else "❌"
+            st.metric("Status", f"{status_icon} {result.status_code}", help=result.reason)
+            st.metric("Gesamt", f"{result.timing.total_ms:.0f} ms")
+            st.caption(
+                f"Verbindung {result.timing.connect_ms:.0f} ms (vorab) · TTFB {result.timing.ttfb_ms:.0f} ms · "
+                f"Download {result.timing.download_ms:.0f} ms"
+            )
+            st.metric("Größe", f"{result.size:,} B", help=f"Übertragen: {result.wire_size:,} B")
+
+    for base_url, changes, same_bytes in diffs:
+        label = f"🧬 Diff: {results[0].base_url} → {base_url}"
+        if changes is None:
+            with st.expander(f"{label} ({'identisch' if same_bytes else 'Text unterscheidet sich'})"):
+                st.caption("Mindestens eine Antwort ist kein JSON - nur Byte-Vergleich möglich")
+            continue
+        with st.expander(f"{label} ({len(changes)} Änderungen)", expanded=bool(changes)):
+            render_diff(changes)
+
+# Vergleichsmodus: derselbe Request gleichzeitig an mehrere Basis-URLs
+# Eingabefelder nur bei aktivem Schalter - hält normale Reruns (z.B. Tippen) schlank
+if st.toggle("🔀 Vergleichsmodus (Staging / Produktion / Canary)", key="compare_mode"):
+    compare_input = st.text_area(
+        "Basis-URLs (eine pro Zeile)", value="", height=100, key="compare_base_urls",
+        help="Pfad und Query der URL oben werden an jede Basis-URL angehängt; die erste Zeile ist die Referenz für den Diff"
+    )
+    if st.button("🔀 Vergleichen"):
+        base_urls = list(dict.fromkeys(line.strip() for line in compare_input.splitlines() if line.strip()))
+        if len(base_urls) < 2:
+            st.warning("⚠️ Bitte mindestens zwei Basis-URLs angeben.")
+        else:
+            headers, params, json_data, data = parse_request_inputs()
+            try:
+                with st.spinner(f"Sende {method} gleichzeitig an {len(base_urls)} Ziele..."):
+                    results = get_comparison_engine().compare(
+                        method, url, base_urls, headers=headers, params=params, json_data=json_data, data=data
+                    )
+                    st.session_state["comparison"] = (results, diff_comparison(results))
+            except ValueError as e:
+                st.error(f"❌ {e}")
+    if st.session_state.get("comparison"):
+        render_comparison(*st.session_state["comparison"])
+
+# Verlauf: zwei gesendete Antworten strukturell vergleichen
+if st.toggle("🕘 Verlauf & Diff", key="history_mode"):
+    history = st.session_state.get("history", [])
+    if len(history) < 2:
+        st.info("ℹ️ Mindestens zwei gesendete Requests nötig, um Antworten zu vergleichen.")
+    else:
+        labels = [f"#{i + 1} {entry['time']} {entry['method']} {entry['url']} → {entry['status']}" for i, entry in enumerate(history)]
+        hist_col1, hist_col2 = st.columns(2)
+        old_index = hist_col1.selectbox("Alt", range(len(history)), index=len(history) - 2, format_func=labels.__getitem__, key="history_old")
+        new_index = hist_col2.selectbox("Neu", range(len(history)), index=len(history) - 1, format_func=labels.__getitem__, key="history_new")
+        from json_diff import diff
+
+        render_diff(diff(history[old_index]["body"], history[new_index]["body"]))
+
+# Abfrage: Felder aus einer gesendeten Antwort extrahieren (z.B. $.data[*].email)
+if st.toggle("🔎 Abfrage (JSONPath/JMESPath)", key="query_mode"):
+    history = st.session_state.get("history", [])
+    if not history:
+        st.info("ℹ️ Zuerst einen Request senden - die Abfrage läuft über die Antworten im Verlauf.")
+    else:
+        query_col1, query_col2 = st.columns([3, 2])
+        expression = query_col1.text_input("Ausdruck", value="$", key="query_expr",
+                                           help="JSONPath beginnt mit $ (z.B. $.data[*].email, $..id, $[?(@.price > 10)]), alles andere ist JMESPath")
+        labels = [f"#{i + 1} {entry['time']} {entry['method']} {entry['url']}" for i, entry in enumerate(history)]
+        source_index = query_col2.selectbox("Antwort", range(len(history)), index=len(history) - 1,
+                                            format_func=labels.__getitem__, key="query_source")
+        if expression.strip():
+            from json_query import QueryError, compile_query
+
+            # Kompilierte Ausdrücke sind prozessweit gecacht - Reruns parsen den Ausdruck nicht erneut
+            try:
+                matches = compile_query(expression).find(history[source_index]["body"])
+            except QueryError as e:
+                st.error(f"❌ {e}")
+            else:
+                st.caption(f"{len(matches)} Treffer" + (f" (erste {MAX_QUERY_ROWS} angezeigt)" if len(matches) > MAX_QUERY_ROWS else ""))
+                st.json(matches[:MAX_QUERY_ROWS], expanded=1)
+
+# Schema: aus den Antworten im Verlauf ein JSON-Schema / pydantic-Modelle ableiten und Drift melden
+if st.toggle("🧬 Schema aus Verlauf", key="schema_mode"):
+    history = st.session_state.get("history", [])
+    json_entries = [i for i, entry in enumerate(history) if isinstance(entry["body"], (dict, list))]
+    if not json_entries:
+        st.info("ℹ️ Zuerst JSON-Antworten senden - das Schema wird aus dem Verlauf abgeleitet.")
+    else:
+        labels = {i: f"#{i + 1} {history[i]['time']} {history[i]['method']} {history[i]['url']}" for i in json_entries}
+        schema_col1, schema_col2 = st.columns([3, 1])
+        # Standard: alle Antworten derselben URL wie die letzte JSON-Antwort
+        latest_url = history[json_entries[-1]]["url"]
+        selected = schema_col1.multiselect("Beispiele", json_entries, default=[i for i in json_entries if history[i]["url"] == latest_url],
+                                           format_func=labels.__getitem__, key="schema_samples")
+        output_format = schema_col2.radio("Ausgabe", ["JSON-Schema", "pydantic"], key="schema_format")
+        strict = schema_col2.checkbox("Unbekannte Felder = Drift", key="schema_strict")
+        from json_codec import dumps
+
+        if selected:
+            from schema_infer import SchemaInferrer, compile_validator, generate_pydantic
+
+            schema = SchemaInferrer(strict=strict).add_all(history[i]["body"] for i in selected).to_json_schema(title="Response")
+            if output_format == "pydantic":
+                st.code(generate_pydantic(schema, "Response"), language="python")
+            else:
+                st.code(dumps(schema, indent=True), language="json")
+
+            # Alle JSON-Antworten des Verlaufs gegen das abgeleitete Schema prüfen
+            validate = compile_validator(schema)
+            for i in json_entries:
+                errors = validate(history[i]["body"])
+                if errors:
+                    st.warning(f"⚠️ {labels[i]}: {len(errors)} Abweichung(en) - " + "; ".join(errors[:3]))
+                else:
+                    st.caption(f"✅ {labels[i]}: passt zum Schema")
+
+        st.download_button(
+            "⬇️ Verlauf exportieren (JSONL)",
+            data="\n".join(dumps(entry) for entry in history) + "\n",
+            file_name="mini_postman_verlauf.jsonl", mime="application/x-ndjson",
+            help="Für die Kommandozeile: python schema_infer.py mini_postman_verlauf.jsonl --history"
+        )
+
+@st.cache_resource
+def get_tool_runner():
+    """Prozessweiter Runner für die m*.py-Werkzeuge (gecachte Erkennung, vorgewärmte Worker)"""
+    from tool_runner import ToolRunner
+
+    # Versuche verschiedene Methoden um den Pfad zu finden
+    if '__file__' in globals() and globals()['__file__']:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    else:
+        # Fallback: Aktuelles Arbeitsverzeichnis
+        base_path = os.getcwd()
+    return ToolRunner(base_path)
+
+def render_tool_output(run):
+    """Zeigt stdout/stderr eines Werkzeuglaufs an"""
+    if run.dropped_lines:
+        st.caption(f"✂️ {run.dropped_lines} ältere Zeilen verworfen - es werden nur die letzten {len(run.lines())} Zeilen angezeigt")
+
+    stdout = run.output("stdout")
+    stderr = run.output("stderr")
+    if stdout:
+        st.code(stdout, language=None)
+    if stderr:
+        st.text_area("⚠️ Fehler/Warnungen:", stderr, height=100, key=f"stderr_{run.run_id}")
+
+@st.fragment(run_every=TOOL_POLL_SECONDS)
+def poll_tool_run(run_id):
+    """Pollt nur, solange der Lauf läuft; ist er beendet, zeigt ein App-Rerun die Ausgabe ohne Timer an"""
+    run = get_tool_runner().get(run_id)
+    if run is None or run.status != "running" or st.session_state.get("tool_run_id") != run_id:
+        st.rerun()
 
-# Sicheres Laden der Python-Dateien
+    mode_info = "warmer Worker" if run.mode == "warm" else "Subprozess"
+    info_col, cancel_col = st.columns([4, 1])
+    info_col.info(f"🔄 Läuft seit {run.duration_ms / 1000:.1f} s ({mode_info})...")
+    if cancel_col.button("⏹️ Abbrechen", key=f"cancel_{run_id}"):
+        run.cancel()
+    render_tool_output(run)
+
+def render_tool_run(run_id):
+    """Zeigt die Ausgabe eines Werkzeuglaufs an (live aktualisiert, solange er läuft)"""
+    run = get_tool_runner().get(run_id)
+    if run is None:
+        st.warning("⚠️ Werkzeuglauf nicht mehr vorhanden")
+        return
+
+    st.subheader(f"📊 Ausgabe von {run.tool.name}:")
+    if run.status == "running":
+        poll_tool_run(run_id)
+        return
+
+    render_tool_output(run)
+    mode_info = "warmer Worker" if run.mode == "warm" else "Subprozess"
+    if run.status == "timeout":
+        st.error(f"⏱️ Zeitüberschreitung nach {run.timeout} s - Prozess wurde beendet")
+    elif run.status == "cancelled":
+        st.warning(f"⏹️ Abgebrochen nach {run.duration_ms / 1000:.1f} s")
+    elif run.status == "done":
+        if run.returncode == 0:
+            st.success(f"✅ Datei erfolgreich ausgeführt! ({run.duration_ms:.0f} ms, {mode_info})")
+        else:
+            st.error(f"❌ Datei beendet mit Fehlercode: {run.returncode} ({mode_info})")
+
+def format_batch_cell(cell):
+    """Kurzdarstellung einer Zelle der Ergebnismatrix"""
+    status, returncode, duration_ms = cell["status"], cell["returncode"], cell["duration_ms"]
+    if status == "pending":
+        return "⏳"
+    if status == "running":
+        return f"🔄 {duration_ms / 1000:.1f} s"
+    if status == "timeout":
+        return f"⏱️ Timeout ({duration_ms / 1000:.0f} s)"
+    if status == "cancelled":
+        return "⏹️"
+    if status == "error":
+        return "❌ Startfehler"
+    icon = "✅" if returncode == 0 else f"❌ {returncode}"
+    return f"{icon} {duration_ms:.0f} ms"
+
+def render_batch_matrix(batch):
+    """Fortschritt, Ergebnismatrix URL × Werkzeug und Ausgabe einzelner Zellen eines Batch-Laufs"""
+    finished, total = batch.progress()
+    st.progress(finished / total if total else 1.0, text=f"{finished}/{total} Läufe fertig ({batch.duration_ms / 1000:.1f} s)")
+
+    rows = [{"URL": row["url"], **{tool: format_batch_cell(row[tool]) for tool in batch.tools}} for row in batch.matrix()]
+    st.dataframe(rows, hide_index=True)
+
+    # Ausgabe einer einzelnen Zelle ansehen
+    cells = [(url, tool) for url in batch.urls for tool in batch.tools if batch.run(url, tool) is not None]
+    if cells:
+        with st.expander("🔍 Ausgabe einer Zelle anzeigen"):
+            url, tool = st.selectbox("Zelle", cells, format_func=lambda c: f"{c[1]} → {c[0]}", key=f"batch_cell_{batch.batch_id}")
+            run = batch.run(url, tool)
+            st.code(run.output() or "(keine Ausgabe)", language=None)
+
+@st.fragment(run_every=TOOL_POLL_SECONDS)
+def poll_batch(batch_id):
+    """Pollt nur, solange der Batch läuft; ist er fertig, zeigt ein App-Rerun die Matrix ohne Timer an"""
+    batch = st.session_state.get("tool_batch")
+    if batch is None or batch.batch_id != batch_id or batch.done:
+        st.rerun()
+
+    if st.button("⏹️ Batch abbrechen", key=f"cancel_batch_{batch_id}"):
+        batch.cancel()
+    render_batch_matrix(batch)
+
+def render_batch(batch_id):
+    """Zeigt die Ergebnismatrix URL × Werkzeug eines Batch-Laufs an (live aktualisiert, solange er läuft)"""
+    batch = st.session_state.get("tool_batch")
+    if batch is None or batch.batch_id != batch_id:
+        return
+    if not batch.done:
+        poll_batch(batch_id)
+        return
+    render_batch_matrix(batch)
+
+# Sicheres Laden der Werkzeugliste (Verzeichnis wird nur bei Änderungen neu gelesen)
 try:
-    python_files = list_python_files()
+    tools = {tool.name: tool for tool in get_tool_runner().tools()}
+    tools_error = None
 except Exception as e:
-    python_files = [f'Fehler: {str(e)}']
+    tools = {}
+    tools_error = str(e)
 
 # Datei-Auswahl nur anzeigen wenn gültige Dateien vorhanden
-if python_files and python_files[0] != 'Keine m*.py Dateien gefunden':
+if tools:
     st.divider()
     st.subheader("🔧 Datei-Ausführung")
     
     selected_file = st.selectbox(
         "Wählen Sie eine Datei aus, an die der Link zur Weiterverarbeitung übergeben werden soll:", 
-        python_files, 
+        list(tools),
+        format_func=lambda name: name if tools[name].entry else f"{name} (Subprozess)",
         key="file_selector"
     )
     
+    tool_timeout = st.number_input(
+        "⏱️ Timeout (Sekunden, 0 = unbegrenzt)", min_value=0, value=TOOL_TIMEOUT_SECONDS, step=10, key="tool_timeout"
+    )
+
     if st.button("📄 Datei ausführen"):
-        if selected_file and not selected_file.startswith('Fehler'):
-            try:
-                # Bestimme den korrekten Dateipfad
-                if '__file__' in globals() and globals()['__file__']:
-                    base_path = os.path.dirname(os.path.abspath(__file__))
-                else:
-                    base_path = os.getcwd()
-                    
-                file_path = os.path.join(base_path, selected_file)
-                
-                # Prüfe ob die Datei existiert
-                if os.path.exists(file_path):
-                    # Übergabe der URL an die Datei
-                    with st.spinner(f"Führe {selected_file} aus..."):
-                        result = subprocess.run(
-                            ["python", file_path, "--url", url], 
-                            capture_output=True, 
-                            text=True,
-                            cwd=base_path
-                        )
-                    
-                    st.subheader("📊 Ausgabe der Datei:")
-                    
-                    if result.stdout:
-                        st.text_area("✅ Erfolgreiche Ausgabe:", result.stdout, height=200)
-                    
-                    if result.stderr:
-                        st.text_area("⚠️ Fehler/Warnungen:", result.stderr, height=100)
-                    
-                    if result.returncode == 0:
-                        st.success("✅ Datei erfolgreich ausgeführt!")
-                    else:
-                        st.error(f"❌ Datei beendet mit Fehlercode: {result.returncode}")
-                        
-                else:
-                    st.error(f"❌ Datei nicht gefunden: {file_path}")
-                    
-            except Exception as e:
-                st.error(f"❌ Fehler beim Ausführen der Datei: {e}")
-        else:
-            st.warning("⚠️ Bitte wählen Sie eine gültige Datei aus.")
+        try:
+            # Übergabe der URL an die Datei - die Ausgabe erscheint live im Fragment
+            run = get_tool_runner().start(selected_file, ["--url", url], timeout=tool_timeout or None)
+            st.session_state["tool_run_id"] = run.run_id
+        except FileNotFoundError as e:
+            st.error(f"❌ {e}")
+        except Exception as e:
+            st.error(f"❌ Fehler beim Ausführen der Datei: {e}")
+
+    if "tool_run_id" in st.session_state:
+        render_tool_run(st.session_state["tool_run_id"])
+
+    # Mehrere Werkzeuge gegen viele URLs parallel ausführen
+    # Eingabefelder nur bei aktivem Schalter - hält normale Reruns (z.B. Tippen) schlank
+    if st.toggle("🧪 Batch-Lauf: Werkzeuge × URLs", key="batch_mode"):
+        batch_tools = st.multiselect("Werkzeuge", list(tools), key="batch_tools")
+        batch_presets = st.multiselect("URL-Vorlagen", list(url_presets), key="batch_presets")
+        batch_pasted = st.text_area("Weitere URLs (eine pro Zeile)", value="", height=100, key="batch_urls")
+        batch_col1, batch_col2 = st.columns(2)
+        batch_parallel = batch_col1.slider("Parallele Prozesse", min_value=1, max_value=32, value=BATCH_MAX_PARALLEL, key="batch_parallel")
+        batch_timeout = batch_col2.number_input(
+            "⏱️ Timeout pro Lauf (Sekunden, 0 = unbegrenzt)", min_value=0, value=TOOL_TIMEOUT_SECONDS, step=10, key="batch_timeout"
+        )
+
+        if st.button("🚀 Batch starten"):
+            # Reihenfolge beibehalten, Duplikate entfernen
+            batch_urls = list(dict.fromkeys(
+                [url_presets[name] for name in batch_presets]
+                + [line.strip() for line in batch_pasted.splitlines() if line.strip()]
+            ))
+            if not batch_tools or not batch_urls:
+                st.warning("⚠️ Bitte mindestens ein Werkzeug und eine URL auswählen.")
+            else:
+                from tool_runner import ToolBatch
+
+                previous = st.session_state.get("tool_batch")
+                if previous is not None and not previous.done:
+                    previous.cancel()
+                st.session_state["tool_batch"] = ToolBatch(
+                    get_tool_runner(), batch_tools, batch_urls, max_parallel=batch_parallel, timeout=batch_timeout or None
+                )
+
+        if "tool_batch" in st.session_state:
+            render_batch(st.session_state["tool_batch"].batch_id)
+elif tools_error:
+    st.error(f"❌ Fehler beim Laden der Dateien: {tools_error}")
 else:
     st.info("ℹ️ Keine ausführbaren m*.py Dateien im aktuellen Verzeichnis gefunden.")
 
@@ -370,23 +703,12 @@ else:
 # streamlit run "e:\dev\projekt_python_venv\014_Mini_Postman\src\mini_postman\mini_postman_gui.py"
 # Local URL: http://localhost:8501
 
-if __name__ == "__main__":
-       # Überprüfen, ob Streamlit bereits läuft
-    streamlit_running = False
-    for process in psutil.process_iter(['name', 'cmdline']):
-        if "streamlit" in process.info['name'] or (process.info['cmdline'] and "streamlit" in " ".join(process.info['cmdline'])):
-            print("Streamlit läuft bereits. Kein erneuter Start erforderlich.")
-            streamlit_running = True
-            break  # Schleife beenden, da Streamlit gefunden wurde
+# Unter "streamlit run" ist __name__ ebenfalls "__main__" - der Starter soll nur beim
+# direkten Aufruf mit python laufen, nicht bei jedem Rerun
+if __name__ == "__main__" and not st.runtime.exists():
+    import sys
 
-    if not streamlit_running:
-        # Ermitteln des absoluten Pfads zur aktuellen Datei
-        script_path = os.path.abspath(__file__)
+    # Eine Instanz pro Workspace: Lock-Datei + Port-Test statt alle Prozesse zu durchsuchen
+    from gui_launcher import main as launch_gui
 
-        try:
-            # Streamlit mit dem aktuellen Skript starten
-            subprocess.run([sys.executable, "-m", "streamlit", "run", script_path], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Fehler beim Starten von Streamlit: {e}")
-        except KeyboardInterrupt:
-            print("Streamlit wurde manuell beendet.")
+    sys.exit(launch_gui())
@@ -0,0 +1,70 @@
+"""
+bench_gui_rerun.py
+Rerun-Latenz-Benchmark für api_mini_postman_gui.py.
+
+Streamlit führt das komplette Skript bei jeder Eingabe erneut aus. Der Benchmark
+simuliert Tippen im Headers-Feld über streamlit.testing (AppTest, nur öffentliche API),
+misst die Dauer jedes Reruns und schlägt fehl (Exit-Code 1), wenn der Median über dem
+Budget liegt. p95 und Maximum werden nur angezeigt: einzelne Ausreißer (GC, Scheduler)
+machen sie bei wenigen Läufen zu unzuverlässig für eine Schranke.
+
+Beispiel:
+    python bench_gui_rerun.py
+    python bench_gui_rerun.py --runs 50 --budget-ms 150
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+from streamlit.testing.v1 import AppTest
+
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_mini_postman_gui.py")
+
+
+def measure_reruns(runs: int, warmup: int = 5) -> List[float]:
+    """
+    Startet die GUI, verwirft `warmup` Reruns (Caches füllen, Worker vorwärmen)
+    und misst danach `runs` Reruns in Millisekunden.
+    """
+    at = AppTest.from_file(GUI_SCRIPT, default_timeout=30)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"GUI-Skript fehlgeschlagen: {at.exception[0].message}")
+
+    durations = []
+    for i in range(warmup + runs):
+        # Jeder Tastendruck im Headers-Feld löst einen vollständigen Rerun aus
+        at.text_area(key="headers").input(f'{{"Content-Type": "application/json", "X-Run": "{i}"}}')
+        start = time.perf_counter()
+        at.run()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations[warmup:]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion mit Argument-Parsing"""
+    parser = argparse.ArgumentParser(description="Misst die Rerun-Latenz der Mini-Postman-GUI")
+    parser.add_argument("--runs", type=int, default=30, help="Anzahl gemessener Reruns (Standard: 30)")
+    parser.add_argument("--warmup", type=int, default=5, help="Nicht gemessene Reruns vorab (Standard: 5)")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Maximal erlaubter Median der Rerun-Dauer in ms (Standard: 100)")
+    args = parser.parse_args(argv)
+
+    durations = sorted(measure_reruns(args.runs, args.warmup))
+    median = statistics.median(durations)
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+
+    print(f"⏱️ Reruns: {len(durations)} | Median: {median:.1f} ms | p95: {p95:.1f} ms | Max: {durations[-1]:.1f} ms")
+    if median > args.budget_ms:
+        print(f"❌ Median über dem Rerun-Budget von {args.budget_ms:.0f} ms")
+        return 1
+    print(f"✅ Innerhalb des Rerun-Budgets von {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+bench_json_codec.py
+Mikro-Benchmark für den JSON-Codec (json_codec.py).
+
+Vergleicht für synthetische Antworten verschiedener Größe:
+- Parsen (loads) und Serialisieren (dumps, eingerückt) mit der Standardbibliothek und mit orjson
+- den bisherigen GUI-Pfad (response.json() + response.text-Fallback + json.dumps) mit
+  parse_response() + dumps() aus json_codec
+
+Beispiel:
+    python bench_json_codec.py
+    python bench_json_codec.py --sizes 100 10000 --repeat 20
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional
+
+import json_codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_payload(records: int) -> bytes:
+    """Erzeugt eine Antwort wie von einer typischen REST-API (Liste von Objekten)"""
+    items = [
+        {
+            "id": i,
+            "name": f"Benutzer {i}",
+            "email": f"user{i}@example.com",
+            "active": i % 3 != 0,
+            "score": i * 1.25,
+            "tags": ["alpha", "beta", "gamma"][: i % 4],
+            "address": {"street": f"Hauptstraße {i}", "city": "Köln", "geo": {"lat": 50.94, "lng": 6.96}},
+        }
+        for i in range(records)
+    ]
+    return json.dumps(items, ensure_ascii=False).encode("utf-8")
+
+
+def timeit(func: Callable[[], object], repeat: int) -> float:
+    """Median-Laufzeit in Millisekunden"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def stdlib_gui_path(raw: bytes):
+    """Bisheriger GUI-Pfad: Text dekodieren, parsen, für die Übersetzung erneut serialisieren"""
+    data = json.loads(raw.decode("utf-8"))
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def codec_gui_path(raw: bytes):
+    """Neuer GUI-Pfad: einmal parsen, mit dem schnellsten Backend serialisieren"""
+    body = json_codec.parse_body(raw)
+    return json_codec.dumps(body.data, indent=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion mit Argument-Parsing"""
+    parser = argparse.ArgumentParser(description="Mikro-Benchmark für den JSON-Codec")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000],
+                        help="Anzahl Datensätze pro Payload (Standard: 10 1000 20000)")
+    parser.add_argument("--repeat", type=int, default=15, help="Wiederholungen pro Messung (Standard: 15)")
+    args = parser.parse_args(argv)
+
+    print(f"⚙️ Aktives Backend: {json_codec.BACKEND}" + ("" if orjson else " (orjson nicht installiert)"))
+    header = f"{'Datensätze':>10} {'Größe':>10} | {'loads json':>11} {'loads orjson':>13} | " \
+             f"{'dumps json':>11} {'dumps orjson':>13} | {'GUI alt':>9} {'GUI neu':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for records in args.sizes:
+        raw = make_payload(records)
+        data = json.loads(raw)
+        stdlib_loads = timeit(lambda: json.loads(raw), args.repeat)
+        stdlib_dumps = timeit(lambda: json.dumps(data, indent=2, ensure_ascii=False), args.repeat)
+        fast_loads = timeit(lambda: orjson.loads(raw), args.repeat) if orjson else None
+        fast_dumps = timeit(lambda: orjson.dumps(data, option=orjson.OPT_INDENT_2), args.repeat) if orjson else None
+        old_path = timeit(lambda: stdlib_gui_path(raw), args.repeat)
+        new_path = timeit(lambda: codec_gui_path(raw), args.repeat)
+
+        def fmt(value: Optional[float], width: int) -> str:
+            return f"{value:>{width - 3}.2f} ms" if value is not None else f"{'-':>{width}}"
+
+        print(f"{records:>10} {len(raw) / 1024:>7.0f} KB | {fmt(stdlib_loads, 11)} {fmt(fast_loads, 13)} | "
+              f"{fmt(stdlib_dumps, 11)} {fmt(fast_dumps, 13)} | {fmt(old_path, 9)} {fmt(new_path, 9)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
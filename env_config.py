@@ -71,13 +71,26 @@ class APIConfig:
     
     # OpenAI (optional)
     OPENAI_API_KEY = EnvConfig.get('OPENAI_API_KEY', '')
+    OPENAI_BASE_URL = EnvConfig.get('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+    OPENAI_TRANSLATION_MODEL = EnvConfig.get('OPENAI_TRANSLATION_MODEL', 'gpt-4o-mini')
     
     # Google Translate (optional)
     GOOGLE_TRANSLATE_API_KEY = EnvConfig.get('GOOGLE_TRANSLATE_API_KEY', '')
+    GOOGLE_TRANSLATE_BASE_URL = EnvConfig.get('GOOGLE_TRANSLATE_BASE_URL', 'https://translation.googleapis.com')
     
     # Azure (optional)
     AZURE_TRANSLATOR_KEY = EnvConfig.get('AZURE_TRANSLATOR_KEY', '')
     AZURE_TRANSLATOR_REGION = EnvConfig.get('AZURE_TRANSLATOR_REGION', '')
+    AZURE_TRANSLATOR_ENDPOINT = EnvConfig.get('AZURE_TRANSLATOR_ENDPOINT', 'https://api.cognitive.microsofttranslator.com')
+    
+    # Übersetzungs-Router: Hedge-Anfrage an zweiten Provider, wenn der erste sein p95 überschreitet
+    TRANSLATION_HEDGING = EnvConfig.get_bool('TRANSLATION_HEDGING', True)
+    
+    # Translation Memory: gemeinsame Datei für GUI und Excel-Tool (Standard im Projektverzeichnis,
+    # unabhängig vom Startverzeichnis)
+    TRANSLATION_MEMORY_FILE = EnvConfig.get(
+        'TRANSLATION_MEMORY_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translation_memory.json'))
     
     # LinkedIn
     LINKEDIN_ACCESS_TOKEN = EnvConfig.get('LINKEDIN_ACCESS_TOKEN', '')
@@ -119,6 +132,11 @@ class AppConfig:
     CUSTOM_USER_AGENT = EnvConfig.get('CUSTOM_USER_AGENT', 'Mini-Postman/1.0.0')
     CUSTOM_API_HEADER = EnvConfig.get('CUSTOM_API_HEADER', 'X-Mini-Postman-Client')
 
+    # GUI-Starter: Standard-Port und benannte Workspaces ("name:port,name:port")
+    GUI_PORT = EnvConfig.get_int('GUI_PORT', 8501)
+    GUI_WORKSPACES = EnvConfig.get('GUI_WORKSPACES', '')
+    GUI_LOCK_DIR = EnvConfig.get('GUI_LOCK_DIR', os.path.join(os.path.expanduser('~'), '.mini_postman'))
+
 # =============================================================================
 # DATABASE KONFIGURATION
 # =============================================================================
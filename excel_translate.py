@@ -0,0 +1,204 @@
+"""
+excel_translate.py
+Batch-Übersetzung ganzer Excel-Spalten (Ersatz für =TRANSLATE(A1, "en", "de") aus dem VBA-Modul).
+
+Die Arbeitsmappe wird mit openpyxl im read-only-Modus gestreamt und im write-only-Modus
+neu geschrieben, sodass auch sehr große Tabellen nicht komplett im Speicher landen.
+Zellwerte werden dedupliziert, in Blöcken parallel über Translation Memory und
+Übersetzungs-Router übersetzt und als neue Spalte oder neues Blatt ausgegeben.
+
+Hinweis: Im Streaming-Modus werden nur Werte und Formeln übernommen, keine Formatierungen.
+
+Beispiel:
+    python excel_translate.py produkte.xlsx --column B --source en --target de
+    python excel_translate.py produkte.xlsx --column B --mode sheet --header --output produkte_de.xlsx
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from env_config import APIConfig
+from translation_memory import TranslationMemory
+from translation_providers import TranslationError, TranslationRouter, build_router_from_config
+
+# Einzeilige Zellwerte werden blockweise in einem Request übersetzt
+CHUNK_SIZE = 50
+
+
+def collect_unique_values(path: str, sheet: Optional[str], column: int, skip_header: bool):
+    """
+    Erster Durchlauf: sammelt alle eindeutigen Texte der Spalte.
+
+    :returns: (eindeutige Texte in Reihenfolge des Auftretens, Anzahl Zeilen, maximale Spaltenzahl)
+    """
+    wb = load_workbook(path, read_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        unique: Dict[str, None] = {}
+        rows = 0
+        width = 0
+        for index, row in enumerate(ws.iter_rows(values_only=True)):
+            rows += 1
+            width = max(width, len(row))
+            if index == 0 and skip_header:
+                continue
+            value = row[column - 1] if len(row) >= column else None
+            if isinstance(value, str) and value.strip() and not value.startswith('='):
+                unique[value] = None
+        return list(unique), rows, width
+    finally:
+        wb.close()
+
+
+def _chunks(values: List[str]) -> List[List[str]]:
+    """Einzeilige Werte in Blöcke packen, mehrzeilige einzeln übersetzen."""
+    single_line = [v for v in values if '\n' not in v]
+    multi_line = [[v] for v in values if '\n' in v]
+    return [single_line[i:i + CHUNK_SIZE] for i in range(0, len(single_line), CHUNK_SIZE)] + multi_line
+
+
+def translate_values(values: List[str], source: str, target: str, router: TranslationRouter,
+                     memory: TranslationMemory, workers: int) -> Dict[str, str]:
+    """Übersetzt eindeutige Zellwerte parallel; Fehler landen wie im VBA-Modul als 'ERROR: ...' in der Zelle."""
+
+    def translate_segments(segments: List[str]) -> List[str]:
+        routed = router.translate('\n'.join(segments), source, target)
+        lines = routed.output.text.split('\n')
+        if len(lines) != len(segments):
+            lines = [router.translate(segment, source, target).output.text for segment in segments]
+        return lines
+
+    def translate_chunk(chunk: List[str]) -> Dict[str, str]:
+        if len(chunk) == 1:
+            # Einzelwert (ggf. mehrzeilig) - Zeilen der Zelle bleiben zusammen
+            return {chunk[0]: memory.translate(chunk[0], source, target, translate_segments).text}
+        lines = memory.translate('\n'.join(chunk), source, target, translate_segments).text.split('\n')
+        return dict(zip(chunk, lines))
+
+    translations: Dict[str, str] = {}
+    chunks = _chunks(values)
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(translate_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                translations.update(future.result())
+            except TranslationError as e:
+                translations.update({value: f"ERROR: {e}" for value in chunk})
+            except Exception as e:
+                translations.update({value: f"ERROR: {str(e)}" for value in chunk})
+            done += len(chunk)
+            print(f"\r🔄 Übersetzt: {done}/{len(values)} eindeutige Werte", end='', flush=True)
+    print()
+    return translations
+
+
+def write_output(path: str, output_path: str, sheet: Optional[str], column: int, into_column: int,
+                 translations: Dict[str, str], mode: str, header: bool, target: str, width: int) -> str:
+    """
+    Zweiter Durchlauf: streamt alle Blätter in eine neue write-only Arbeitsmappe.
+
+    :returns: Name des Blatts mit der Übersetzung
+    """
+    source_wb = load_workbook(path, read_only=True)
+    out_wb = Workbook(write_only=True)
+    try:
+        target_name = sheet or source_wb.active.title
+        translated_name = target_name
+
+        for ws in source_wb.worksheets:
+            out_ws = out_wb.create_sheet(ws.title)
+            is_target = ws.title == target_name
+            if is_target and mode == 'sheet':
+                # Übersetzungsblatt direkt hinter dem Quellblatt
+                translated_name = f"{target_name[:27]}_{target}"
+                translated_ws = out_wb.create_sheet(translated_name)
+            for index, row in enumerate(ws.iter_rows(values_only=True)):
+                row = list(row)
+                if not is_target:
+                    out_ws.append(row)
+                    continue
+
+                value = row[column - 1] if len(row) >= column else None
+                if index == 0 and header:
+                    translated = f"{value} ({target})" if value is not None else f"Übersetzung ({target})"
+                else:
+                    translated = translations.get(value, value) if isinstance(value, str) else value
+
+                if mode == 'column':
+                    row += [None] * (max(width, into_column) - len(row))
+                    row[into_column - 1] = translated
+                    out_ws.append(row)
+                else:
+                    out_ws.append(row)
+                    translated_ws.append([value, translated])
+
+        out_wb.save(output_path)
+        return translated_name
+    finally:
+        source_wb.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion mit Argument-Parsing"""
+    parser = argparse.ArgumentParser(description="Übersetzt eine Spalte einer .xlsx-Datei (Streaming, dedupliziert, parallel)")
+    parser.add_argument("input", help="Eingabe-Datei (.xlsx)")
+    parser.add_argument("--column", required=True, help="Zu übersetzende Spalte, z.B. A")
+    parser.add_argument("--sheet", help="Tabellenblatt (Standard: aktives Blatt)")
+    parser.add_argument("--source", default="auto", help="Quellsprache (Standard: auto)")
+    parser.add_argument("--target", default="de", help="Zielsprache (Standard: de)")
+    parser.add_argument("--mode", choices=["column", "sheet"], default="column",
+                        help="Übersetzung als neue Spalte oder als eigenes Blatt ausgeben")
+    parser.add_argument("--into", help="Zielspalte für --mode column (Standard: erste freie Spalte)")
+    parser.add_argument("--header", action="store_true", help="Erste Zeile ist eine Kopfzeile")
+    parser.add_argument("--output", help="Ausgabe-Datei (Standard: <input>_<target>.xlsx)")
+    parser.add_argument("--workers", type=int, default=8, help="Parallele Übersetzungsanfragen (Standard: 8)")
+    parser.add_argument("--memory-file", default=APIConfig.TRANSLATION_MEMORY_FILE,
+                        help="Gemeinsame Translation-Memory-Datei (leer = ohne Persistenz)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ Datei nicht gefunden: {args.input}")
+        return 1
+
+    column = column_index_from_string(args.column.upper())
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}_{args.target}.xlsx"
+    start_time = time.time()
+
+    memory = TranslationMemory(max_entries=1_000_000)
+    if args.memory_file:
+        loaded = memory.load(args.memory_file)
+        print(f"🧠 Translation Memory: {loaded} Segmente aus {args.memory_file} geladen")
+
+    print(f"📂 Lese {args.input} (Spalte {args.column.upper()})...")
+    values, rows, width = collect_unique_values(args.input, args.sheet, column, args.header)
+    into_column = column_index_from_string(args.into.upper()) if args.into else width + 1
+    print(f"📊 {rows} Zeilen, {len(values)} eindeutige Texte")
+
+    router = build_router_from_config()
+    translations = translate_values(values, args.source, args.target, router, memory, args.workers)
+
+    print(f"💾 Schreibe {output_path}...")
+    translated_name = write_output(args.input, output_path, args.sheet, column, into_column, translations,
+                                   args.mode, args.header, args.target, width)
+
+    if args.memory_file:
+        memory.save(args.memory_file, merge=True)
+
+    stats = memory.stats
+    target_info = f"Blatt '{translated_name}'" if args.mode == 'sheet' else f"Blatt '{translated_name}', Spalte {get_column_letter(into_column)}"
+    print(f"✅ Fertig in {time.time() - start_time:.1f}s → {output_path} ({target_info})")
+    print(f"   TM-Treffer: {stats.hits} | Übersetzte Segmente: {stats.translated_segments} | Trefferquote: {stats.hit_rate:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+gui_launcher.py
+Starter für die Mini-Postman-GUI mit genau einer Instanz pro Workspace.
+
+Statt alle Prozesse des Rechners nach "streamlit" zu durchsuchen (langsam auf geteilten
+Build-Servern und falsch positiv bei fremden Streamlit-Apps), wird pro Workspace eine
+Lock-Datei im Benutzerverzeichnis angelegt und der Port des Workspaces geprüft:
+
+- Lock vorhanden und Port antwortet  -> Instanz läuft bereits, nur URL ausgeben
+- Lock vorhanden, Starter lebt noch   -> Instanz startet gerade, kurz auf den Port warten
+- Lock verwaist (Port tot, Prozess weg) -> Lock übernehmen und neu starten
+
+Workspaces sind benannte Instanzen auf eigenen Ports, z.B. für Staging und Produktion
+nebeneinander. Zuordnung über GUI_WORKSPACES="staging:8502,prod:8503" oder --port.
+
+Beispiel:
+    python api_mini_postman_gui.py
+    python gui_launcher.py --workspace staging
+    python gui_launcher.py --list
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from env_config import AppConfig
+
+DEFAULT_WORKSPACE = "default"
+
+# Wartezeit für den Port-Test und auf eine gerade startende Instanz (Sekunden)
+PROBE_TIMEOUT = 0.3
+STARTUP_WAIT_SECONDS = 20
+
+# Bereich für Ports von Workspaces ohne feste Zuordnung (GUI_PORT + 1 ... GUI_PORT + 99)
+WORKSPACE_PORT_SPAN = 99
+
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_mini_postman_gui.py")
+
+
+@dataclass
+class LockInfo:
+    """Inhalt einer Lock-Datei"""
+    workspace: str
+    port: int
+    pid: int  # PID des Starters (wartet auf Streamlit)
+    script: str
+    started: float
+
+
+def parse_workspaces(spec: str) -> Dict[str, int]:
+    """Liest "name:port,name:port" (Einträge ohne gültigen Port werden ignoriert)"""
+    workspaces = {}
+    for entry in spec.split(','):
+        name, _, port = entry.strip().partition(':')
+        if name and port.strip().isdigit():
+            workspaces[name.strip()] = int(port)
+    return workspaces
+
+
+def workspace_port(workspace: str, base_port: int = AppConfig.GUI_PORT,
+                   configured: Optional[Dict[str, int]] = None) -> int:
+    """Port eines Workspaces: konfiguriert, Standardport oder stabil aus dem Namen abgeleitet"""
+    configured = parse_workspaces(AppConfig.GUI_WORKSPACES) if configured is None else configured
+    if workspace in configured:
+        return configured[workspace]
+    if workspace == DEFAULT_WORKSPACE:
+        return base_port
+    return base_port + 1 + zlib.crc32(workspace.encode('utf-8')) % WORKSPACE_PORT_SPAN
+
+
+def lock_path(workspace: str, lock_dir: str = AppConfig.GUI_LOCK_DIR) -> str:
+    safe_name = "".join(char if char.isalnum() or char in "-_" else "_" for char in workspace)
+    return os.path.join(lock_dir, f"gui_{safe_name}.lock")
+
+
+def port_open(port: int, host: str = "127.0.0.1", timeout: float = PROBE_TIMEOUT) -> bool:
+    """True, wenn auf dem Port etwas Verbindungen annimmt"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def is_streamlit(port: int, host: str = "127.0.0.1", timeout: float = 1.0) -> bool:
+    """Prüft über den Health-Endpunkt, ob auf dem Port ein Streamlit-Server antwortet"""
+    from urllib.error import URLError
+    from urllib.request import urlopen
+
+    try:
+        with urlopen(f"http://{host}:{port}/_stcore/health", timeout=timeout) as response:
+            return response.status == 200
+    except (URLError, OSError, ValueError):
+        return False
+
+
+def pid_alive(pid: int) -> bool:
+    # Gezielte Abfrage einer PID (kein Durchlaufen aller Prozesse); os.kill(pid, 0) beendet unter Windows den Prozess
+    import psutil
+
+    return psutil.pid_exists(pid)
+
+
+def read_lock(path: str) -> Optional[LockInfo]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return LockInfo(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def acquire_lock(path: str, info: LockInfo) -> bool:
+    """Legt die Lock-Datei atomar an; False, wenn sie bereits existiert"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(info.__dict__, f)
+    return True
+
+
+def release_lock(path: str, pid: int):
+    """Entfernt die Lock-Datei, sofern sie noch diesem Prozess gehört"""
+    lock = read_lock(path)
+    if lock is None or lock.pid == pid:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def streamlit_running(port: int) -> bool:
+    """Port offen und dort antwortet Streamlit (schnelle Port-Probe zuerst, dann Health-Check)"""
+    return port_open(port) and is_streamlit(port)
+
+
+def find_instance(workspace: str, port: int, lock_dir: str = AppConfig.GUI_LOCK_DIR) -> Optional[LockInfo]:
+    """
+    Laufende (oder gerade startende) Instanz eines Workspaces; verwaiste Locks werden entfernt.
+
+    Als laufend gilt eine Instanz nur, wenn auf ihrem Port Streamlit antwortet. Belegt eine
+    fremde Anwendung den Port, ist der Lock verwaist.
+    """
+    path = lock_path(workspace, lock_dir)
+    lock = read_lock(path)
+    if lock is None:
+        if os.path.exists(path):
+            # Unlesbare Datei (z.B. Absturz beim Schreiben): nur behalten, wenn Streamlit auf dem Port läuft
+            if streamlit_running(port):
+                return LockInfo(workspace, port, 0, "", 0.0)
+            os.remove(path)
+        return None
+    if streamlit_running(lock.port):
+        return lock
+    if pid_alive(lock.pid) and time.time() - lock.started < STARTUP_WAIT_SECONDS:
+        # Starter lebt und Streamlit bindet den Port noch bzw. ist noch nicht bereit
+        deadline = lock.started + STARTUP_WAIT_SECONDS
+        while time.time() < deadline:
+            if streamlit_running(lock.port):
+                return lock
+            time.sleep(0.25)
+    if streamlit_running(lock.port):
+        return lock
+    # Verwaist: kein Streamlit auf dem Port -> Lock entfernen
+    release_lock(path, lock.pid)
+    return None
+
+
+def launch(workspace: str = DEFAULT_WORKSPACE, port: Optional[int] = None, script: str = GUI_SCRIPT,
+           lock_dir: str = AppConfig.GUI_LOCK_DIR, extra_args: Optional[List[str]] = None) -> int:
+    """
+    Startet die GUI für einen Workspace, falls sie nicht bereits läuft (blockiert bis zum Beenden).
+
+    :returns: Exit-Code (0 auch, wenn bereits eine Instanz läuft)
+    """
+    port = port or workspace_port(workspace)
+    running = find_instance(workspace, port, lock_dir)
+    if running is not None:
+        print(f"Streamlit läuft bereits (Workspace '{workspace}'): http://localhost:{running.port}. Kein erneuter Start erforderlich.")
+        return 0
+
+    if port_open(port):
+        # Port belegt, aber nicht von uns gesperrt: fremde Anwendung oder Instanz eines anderen Benutzers
+        owner = "eine andere Streamlit-App" if is_streamlit(port) else "eine andere Anwendung"
+        print(f"❌ Port {port} ist durch {owner} belegt. Anderen Workspace oder --port wählen.")
+        return 1
+
+    path = lock_path(workspace, lock_dir)
+    info = LockInfo(workspace=workspace, port=port, pid=os.getpid(), script=os.path.abspath(script), started=time.time())
+    if not acquire_lock(path, info):
+        # Ein anderer Starter war schneller - dessen Instanz nutzen
+        running = find_instance(workspace, port, lock_dir)
+        if running is not None:
+            print(f"Streamlit startet bereits (Workspace '{workspace}'): http://localhost:{running.port}")
+            return 0
+        if not acquire_lock(path, info):
+            print(f"❌ Lock-Datei {path} konnte nicht angelegt werden")
+            return 1
+
+    env = dict(os.environ, MINI_POSTMAN_WORKSPACE=workspace)
+    command = [sys.executable, "-m", "streamlit", "run", info.script, "--server.port", str(port)] + (extra_args or [])
+    try:
+        # Streamlit mit dem aktuellen Skript starten
+        subprocess.run(command, check=True, env=env)
+    except subprocess.CalledProcessError as e:
+        print(f"Fehler beim Starten von Streamlit: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("Streamlit wurde manuell beendet.")
+    finally:
+        release_lock(path, info.pid)
+    return 0
+
+
+def list_workspaces(lock_dir: str = AppConfig.GUI_LOCK_DIR):
+    """Zeigt konfigurierte und gesperrte Workspaces mit Status"""
+    names = {DEFAULT_WORKSPACE: workspace_port(DEFAULT_WORKSPACE)}
+    names.update(parse_workspaces(AppConfig.GUI_WORKSPACES))
+    if os.path.isdir(lock_dir):
+        for filename in sorted(os.listdir(lock_dir)):
+            if filename.startswith("gui_") and filename.endswith(".lock"):
+                lock = read_lock(os.path.join(lock_dir, filename))
+                if lock is not None:
+                    names.setdefault(lock.workspace, lock.port)
+    for name, port in names.items():
+        status = "🟢 läuft" if streamlit_running(port) else "⚪ gestoppt"
+        print(f"{status:<12} {name:<20} http://localhost:{port}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion mit Argument-Parsing"""
+    parser = argparse.ArgumentParser(description="Startet die Mini-Postman-GUI (eine Instanz pro Workspace)")
+    parser.add_argument("--workspace", default=DEFAULT_WORKSPACE, help=f"Name des Workspaces (Standard: {DEFAULT_WORKSPACE})")
+    parser.add_argument("--port", type=int, help="Port erzwingen (Standard: aus GUI_WORKSPACES bzw. GUI_PORT)")
+    parser.add_argument("--list", action="store_true", help="Workspaces und ihren Status anzeigen")
+    args, extra = parser.parse_known_args(argv)
+
+    if args.list:
+        list_workspaces()
+        return 0
+    # Unbekannte Argumente (z.B. --server.headless true) gehen an streamlit run
+    return launch(args.workspace, args.port, extra_args=extra)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+json_codec.py
+Gemeinsamer JSON-Codec für Mini Postman und die Kommandozeilen-Werkzeuge.
+
+Nutzt orjson, falls installiert (deutlich schneller beim Parsen und Serialisieren),
+sonst das json-Modul der Standardbibliothek. Beide Wege liefern dieselben Python-Objekte.
+
+Antworten werden genau einmal geparst: parse_response() liefert die Rohbytes zusammen
+mit dem geparsten Objekt, sodass Anzeige, Verlauf, Diff und Übersetzung nicht erneut
+parsen oder über response.text dekodieren müssen.
+
+Beispiel:
+    body = parse_response(requests.get(url))
+    if body.is_json:
+        print(len(body.data), "Elemente,", body.size, "Bytes")
+    print(dumps(body.data, indent=True))
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional - die Standardbibliothek reicht funktional aus
+    orjson = None
+
+# Name des aktiven Backends (für Anzeige und Benchmark)
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Parst JSON aus Bytes oder Text.
+
+    :raises ValueError: Bei ungültigem JSON (json.JSONDecodeError bzw. orjson.JSONDecodeError)
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson lehnt NaN/Infinity ab, die Standardbibliothek akzeptiert sie
+            pass
+    if isinstance(data, (bytearray, memoryview)):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def dumps(value: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """
+    Serialisiert einen Wert als JSON-Text (UTF-8, Umlaute bleiben lesbar).
+
+    :param indent: Mit zwei Leerzeichen eingerückt ausgeben
+    :param sort_keys: Objektschlüssel sortieren
+    """
+    return dumps_bytes(value, indent=indent, sort_keys=sort_keys).decode('utf-8')
+
+
+def dumps_bytes(value: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Wie dumps(), liefert aber UTF-8-Bytes (z.B. für Dateien oder HTTP-Bodies)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(value, option=option)
+        except TypeError:
+            # z.B. Ganzzahlen > 64 Bit oder fremde Typen: Standardbibliothek übernimmt
+            pass
+    text = json.dumps(value, indent=2 if indent else None, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=None if indent else (',', ':'))
+    return text.encode('utf-8')
+
+
+@dataclass
+class ParsedBody:
+    """Rohbytes einer Antwort zusammen mit dem (einmal) geparsten JSON"""
+    raw: bytes
+    data: Any = None
+    is_json: bool = False
+    error: Optional[str] = None  # Parserfehler, falls der Body kein gültiges JSON ist
+    encoding: str = 'utf-8'
+
+    @property
+    def size(self) -> int:
+        return len(self.raw)
+
+    @property
+    def text(self) -> str:
+        """Body als Text (für Nicht-JSON-Antworten)"""
+        return self.raw.decode(self.encoding, errors='replace')
+
+
+def parse_body(raw: bytes, encoding: Optional[str] = None) -> ParsedBody:
+    """Parst Rohbytes einmal als JSON; bei Fehlern bleibt nur der Rohinhalt erhalten"""
+    body = ParsedBody(raw=raw or b'', encoding=encoding or 'utf-8')
+    if not body.raw.strip():
+        return body
+    try:
+        body.data = loads(body.raw)
+        body.is_json = True
+    except (ValueError, UnicodeDecodeError) as e:
+        body.error = str(e)
+    return body
+
+
+def parse_response(response) -> ParsedBody:
+    """Parst den Body einer requests.Response einmal (ersetzt response.json() + response.text)"""
+    # Bewusst nicht response.apparent_encoding: die Zeichensatzerkennung ist bei großen Bodies teuer
+    return parse_body(response.content, response.encoding)
@@ -0,0 +1,282 @@
+"""
+json_diff.py
+Struktureller Vergleich zweier JSON-Dokumente für Mini Postman.
+
+Statt Texte zeilenweise zu vergleichen, werden die geparsten Strukturen rekursiv
+durchlaufen und Änderungen mit ihrem JSON-Pfad gemeldet (z.B. `$.users[id=3].name`).
+
+Identische Teilbäume werden über ihren Merkle-Hash (Hash über die Hashes der Kinder)
+erkannt und übersprungen. Jeder Teilbaum wird dabei nur einmal gehasht, der Vergleich
+steigt also nur in geänderte Teilbäume ab. Der Hash unterscheidet anders als `==` auch
+verschachtelte Typen (1 und True, 0 und False); 1 und 1.0 gelten als gleich.
+Arrays aus Objekten mit eindeutigem Schlüssel (z.B. `id`) werden über diesen Schlüssel
+zugeordnet, andere Arrays über die Folge ihrer Merkle-Hashes ausgerichtet (Einfügungen
+verschieben nicht alle folgenden Elemente).
+
+Beispiel:
+    for change in diff({"a": 1, "b": [1, 2]}, {"a": 2, "b": [1]}):
+        print(change.kind, change.path, change.old, change.new)
+
+    st.json(to_tree(diff(old, new)), expanded=2)  # aufklappbare Ansicht
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from json_codec import dumps_bytes
+
+# Kind-Container erscheinen in der Serialisierung des Eltern-Containers als ["#", Hash];
+# da Kind-Arrays immer ersetzt werden, kann kein echter Wert so aussehen
+_CONTAINER = '#'
+_CONTAINER_TYPES = {dict, list}
+
+# Kandidaten für den Zuordnungsschlüssel von Objekt-Arrays (in dieser Reihenfolge)
+ARRAY_KEYS = ('id', 'uuid', 'key', '_id', 'name')
+
+
+@dataclass
+class Change:
+    """Eine einzelne Abweichung zwischen zwei Dokumenten"""
+    path: str
+    kind: str  # added | removed | changed | type
+    old: Any = None
+    new: Any = None
+    parts: Tuple[str, ...] = field(default=(), repr=False)  # Pfadsegmente für die Baumansicht
+
+
+class MerkleHasher:
+    """
+    Berechnet Teilbaum-Hashes (Hash über die Hashes der Kinder) und merkt sie sich pro Objekt.
+
+    Der Cache ist an die Objekt-Identität gebunden und gilt daher nur, solange die
+    Dokumente nicht verändert werden. Ein Hasher kann für mehrere Vergleiche mit
+    demselben Dokument wiederverwendet werden (z.B. Referenz gegen N Ziele).
+    """
+
+    def __init__(self):
+        self._memo: Dict[int, str] = {}
+        # Referenzen halten, damit keine ID während der Lebensdauer neu vergeben wird
+        self._keep: List[Any] = []
+
+    def known(self, value: Any) -> bool:
+        """True, wenn der Hash des Containers bereits berechnet wurde"""
+        return id(value) in self._memo
+
+    def hash(self, value: Any) -> str:
+        """
+        Hash eines beliebigen JSON-Werts (Hex-String bzw. Token bei Einzelwerten).
+
+        Gleicher Hash heißt gleicher Inhalt, auch in verschachtelten Typen (1 und True sind
+        verschieden). Container mit 1 statt 1.0 erhalten verschiedene Hashes; der Vergleich
+        steigt dann ab und meldet die Zahlen trotzdem nicht als Änderung. Mit orjson wird NaN
+        (kein gültiges JSON) wie null serialisiert.
+        """
+        value_type = type(value)
+        if value_type is not dict and value_type is not list:
+            return self._token(value)
+        cached = self._memo.get(id(value))
+        if cached is not None:
+            return cached
+
+        # Einzelwerte werden zusammen mit dem Container in C serialisiert (json_codec, mit
+        # orjson sehr schnell), Kind-Container gehen nur als ["#", Hash] ein. Container ohne
+        # Kind-Container (die meisten) werden direkt serialisiert.
+        children = value.values() if value_type is dict else value
+        if _CONTAINER_TYPES.isdisjoint(map(type, children)):
+            flat = value
+        elif value_type is dict:
+            flat = {key: ((_CONTAINER, self.hash(item)) if type(item) in _CONTAINER_TYPES else item)
+                    for key, item in value.items()}
+        else:
+            flat = [((_CONTAINER, self.hash(item)) if type(item) in _CONTAINER_TYPES else item) for item in value]
+        digest = hashlib.blake2b(dumps_bytes(flat, sort_keys=True), digest_size=16).hexdigest()
+        self._memo[id(value)] = digest
+        self._keep.append(value)
+        return digest
+
+    @staticmethod
+    def _token(value: Any) -> str:
+        if isinstance(value, str):
+            return f"s{len(value)}:{value}"
+        if value is None or isinstance(value, bool):
+            return repr(value)
+        if isinstance(value, (int, float)):
+            return f"n{float(value)!r}" if value == value else "nan"
+        return f"{type(value).__name__}:{value!r}"
+
+
+def _key_part(key: str) -> str:
+    return f".{key}" if key.isidentifier() else f"[{key!r}]"
+
+
+def _identity(value: Any) -> Any:
+    """Hashbare Identität eines Schlüsselwerts (1 und "1" bleiben verschieden)"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return (type(value).__name__, value)
+    return json.dumps(value, sort_keys=True)
+
+
+def _array_key(old: List[Any], new: List[Any], candidates: Sequence[str]) -> Optional[str]:
+    """Schlüssel, über den sich beide Arrays eindeutig zuordnen lassen (oder None)"""
+    if not old or not new:
+        return None
+    if not all(type(item) is dict for item in old) or not all(type(item) is dict for item in new):
+        return None
+    for key in candidates:
+        if not all(key in item for item in old) or not all(key in item for item in new):
+            continue
+        old_values = {_identity(item[key]) for item in old}
+        new_values = {_identity(item[key]) for item in new}
+        if len(old_values) == len(old) and len(new_values) == len(new):
+            return key
+    return None
+
+
+def diff(old: Any, new: Any, path: str = '$', array_keys: Sequence[str] = ARRAY_KEYS,
+         hasher: Optional[MerkleHasher] = None) -> List[Change]:
+    """
+    Vergleicht zwei geparste JSON-Werte.
+
+    :param old: Bisheriger Wert (z.B. Antwort von Staging)
+    :param new: Neuer Wert (z.B. Antwort von Produktion)
+    :param path: JSON-Pfad des Wurzelelements
+    :param array_keys: Schlüssel, über die Objekt-Arrays zugeordnet werden; leer = nur Reihenfolge
+    :param hasher: Wiederverwendbarer MerkleHasher (z.B. für eine Referenz gegen mehrere Ziele)
+    :returns: Liste der Änderungen in Dokumentreihenfolge
+    """
+    changes: List[Change] = []
+    _Differ(hasher or MerkleHasher(), tuple(array_keys), changes).diff(old, new, path, ())
+    return changes
+
+
+class _Differ:
+    def __init__(self, hasher: MerkleHasher, array_keys: Tuple[str, ...], changes: List[Change]):
+        self.hasher = hasher
+        self.array_keys = array_keys
+        self.changes = changes
+
+    def add(self, path: str, parts: Tuple[str, ...], kind: str, old: Any = None, new: Any = None):
+        self.changes.append(Change(path, kind, old=old, new=new, parts=parts))
+
+    def same(self, old: Any, new: Any) -> bool:
+        """
+        Teilbaum identisch? Container über ihre Merkle-Hashes (einmal pro Teilbaum berechnet,
+        danach gemerkt), Einzelwerte direkt.
+        """
+        if old is new:
+            return True
+        old_type, new_type = type(old), type(new)
+        if old_type in (dict, list) or new_type in (dict, list):
+            return old_type is new_type and self.hasher.hash(old) == self.hasher.hash(new)
+        return old == new and (old_type is new_type or (_is_number(old) and _is_number(new)))
+
+    def diff(self, old: Any, new: Any, path: str, parts: Tuple[str, ...]):
+        # Identischer Teilbaum: nicht weiter absteigen
+        if self.same(old, new):
+            return
+        if isinstance(old, dict) and isinstance(new, dict):
+            self.diff_dict(old, new, path, parts)
+        elif isinstance(old, list) and isinstance(new, list):
+            self.diff_list(old, new, path, parts)
+        elif type(old) is not type(new) and not (_is_number(old) and _is_number(new)):
+            self.add(path, parts, 'type', old=old, new=new)
+        else:
+            self.add(path, parts, 'changed', old=old, new=new)
+
+    def diff_dict(self, old: Dict[str, Any], new: Dict[str, Any], path: str, parts: Tuple[str, ...]):
+        for key in old:
+            part = _key_part(str(key))
+            if key not in new:
+                self.add(path + part, parts + (part,), 'removed', old=old[key])
+            else:
+                self.diff(old[key], new[key], path + part, parts + (part,))
+        for key in new:
+            if key not in old:
+                part = _key_part(str(key))
+                self.add(path + part, parts + (part,), 'added', new=new[key])
+
+    def diff_list(self, old: List[Any], new: List[Any], path: str, parts: Tuple[str, ...]):
+        key = _array_key(old, new, self.array_keys)
+        if key is not None:
+            self.diff_keyed_list(old, new, key, path, parts)
+            return
+
+        # Ausrichtung über die Hash-Folgen: Einfügen/Löschen verschiebt nicht alle Folgeelemente
+        old_hashes = [self.hasher.hash(item) for item in old]
+        new_hashes = [self.hasher.hash(item) for item in new]
+        matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            # Paarweise ersetzte Elemente rekursiv vergleichen, Überhang als added/removed melden
+            paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+            for offset in range(paired):
+                part = f"[{i1 + offset}]"
+                self.diff(old[i1 + offset], new[j1 + offset], path + part, parts + (part,))
+            for index in range(i1 + paired, i2):
+                part = f"[{index}]"
+                self.add(path + part, parts + (part,), 'removed', old=old[index])
+            for index in range(j1 + paired, j2):
+                part = f"[{index}]"
+                self.add(path + part, parts + (part,), 'added', new=new[index])
+
+    def diff_keyed_list(self, old: List[Any], new: List[Any], key: str, path: str, parts: Tuple[str, ...]):
+        def part_for(item):
+            return f"[{key}={json.dumps(item[key], ensure_ascii=False)}]"
+
+        new_by_key = {_identity(item[key]): item for item in new}
+        old_keys = set()
+        for item in old:
+            item_key = _identity(item[key])
+            old_keys.add(item_key)
+            part = part_for(item)
+            if item_key not in new_by_key:
+                self.add(path + part, parts + (part,), 'removed', old=item)
+            else:
+                self.diff(item, new_by_key[item_key], path + part, parts + (part,))
+        for item in new:
+            if _identity(item[key]) not in old_keys:
+                part = part_for(item)
+                self.add(path + part, parts + (part,), 'added', new=item)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def summarize(changes: List[Change]) -> Dict[str, int]:
+    """Anzahl der Änderungen je Art"""
+    counts = {'added': 0, 'removed': 0, 'changed': 0, 'type': 0}
+    for change in changes:
+        counts[change.kind] += 1
+    return counts
+
+
+def to_tree(changes: List[Change], max_changes: int = 500) -> Dict[str, Any]:
+    """
+    Baut aus den Änderungen einen verschachtelten Baum für eine aufklappbare Ansicht
+    (z.B. st.json(tree, expanded=2)). Blätter sehen so aus:
+    {"➕": neu}, {"➖": alt} oder {"✏️": [alt, neu]}.
+    """
+    tree: Dict[str, Any] = {}
+    for change in changes[:max_changes]:
+        node = tree
+        parts = change.parts or (change.path,)
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if not isinstance(child, dict) or any(k in child for k in ('➕', '➖', '✏️')):
+                break
+            node = child
+        if change.kind == 'added':
+            leaf = {'➕': change.new}
+        elif change.kind == 'removed':
+            leaf = {'➖': change.old}
+        else:
+            leaf = {'✏️': [change.old, change.new]}
+        node[parts[-1]] = leaf
+    if len(changes) > max_changes:
+        tree['…'] = f"{len(changes) - max_changes} weitere Änderungen"
+    return tree
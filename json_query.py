@@ -0,0 +1,583 @@
+"""
+json_query.py
+Kompilierte JSONPath-/JMESPath-Abfragen für Mini Postman.
+
+Ausdrücke, die mit `$` beginnen, sind JSONPath (eingebaut), alle anderen JMESPath
+(benötigt das optionale Paket `jmespath`). Ein Ausdruck wird einmal in eine Kette von
+Schritten übersetzt und pro Ausdruck zwischengespeichert, sodass GUI, Prüfregeln der
+Checker und Batch-Läufe denselben kompilierten Ausdruck beliebig oft auswerten.
+
+Unterstützter JSONPath-Umfang:
+    $.a.b   $['a b']   $[0]   $[-1]   $[1:5]   $[0,2]   $[*]   $.*   $..name
+    $.items[?(@.price > 10)]   $[?(@.email =~ /example\\.com$/)]   $[?(@.active)]
+
+Große Arrays auf oberster Ebene (z.B. `$[*].id` über 200 MB) lassen sich inkrementell
+auswerten: stream() liest die Antwort stückweise, parst jeweils nur ein Array-Element
+und verwirft es nach der Auswertung - der vollständige Objektgraph entsteht nie.
+Ist `ijson` installiert, wird es für Dateiobjekte genutzt, sonst ein eingebauter Parser.
+
+Beispiel:
+    emails = compile_query("$.data[*].email").find(response_data)
+
+    response = requests.get(url, stream=True)
+    ids = list(compile_query("$[*].id").stream(response.iter_content(65536), limit=1000))
+"""
+
+import codecs
+import itertools
+import json
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import jmespath
+except ImportError:  # optional - nur für JMESPath-Ausdrücke nötig
+    jmespath = None
+
+try:
+    import ijson
+except ImportError:  # optional - der eingebaute Streaming-Parser reicht funktional aus
+    ijson = None
+
+# Anzahl kompilierter Ausdrücke im Cache
+QUERY_CACHE_SIZE = 256
+
+# Lesegröße beim Streaming (Bytes)
+CHUNK_SIZE = 64 * 1024
+
+_MISSING = object()
+
+# Leerraum vor dem ersten Zeichen (Text bzw. Bytes, inkl. Byte Order Mark)
+_WHITESPACE = {True: ' \t\r\n\ufeff', False: b' \t\r\n\xef\xbb\xbf'}
+
+_COMPARATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+_FILTER_RE = re.compile(
+    r"^@(?P<path>(?:\.[A-Za-z_][\w-]*|\[\d+\]|\['[^']*'\])*)\s*"
+    r"(?:(?P<op>==|!=|<=|>=|<|>|=~)\s*(?P<value>.+?))?\s*$"
+)
+_FILTER_PATH_RE = re.compile(r"\.([A-Za-z_][\w-]*)|\[(\d+)\]|\['([^']*)'\]")
+
+
+class QueryError(ValueError):
+    """Ungültiger oder nicht unterstützter Abfrageausdruck"""
+
+
+# Ein Schritt bildet einen Knoten auf seine Treffer ab
+Step = Callable[[Any], Iterable[Any]]
+
+
+class CompiledQuery:
+    """Ein einmal übersetzter Ausdruck; find() ist beliebig oft und threadsicher aufrufbar."""
+
+    def __init__(self, expression: str, language: str, steps: Tuple[Step, ...] = (),
+                 first_step: Optional[Tuple[str, Any]] = None, jmespath_expr: Any = None):
+        self.expression = expression
+        self.language = language
+        self._steps = steps
+        # Art und Argument des ersten Schritts (für die Streaming-Auswertung)
+        self._first_step = first_step
+        self._jmespath = jmespath_expr
+
+    def __repr__(self) -> str:
+        return f"CompiledQuery({self.expression!r}, {self.language})"
+
+    def find(self, data: Any) -> List[Any]:
+        """Alle Treffer in Dokumentreihenfolge (JMESPath: Listen-Ergebnisse wie Projektionen direkt)"""
+        if self._jmespath is not None:
+            result = self._jmespath.search(data)
+            if result is None:
+                return []
+            return result if isinstance(result, list) else [result]
+        return list(self._apply(data, self._steps))
+
+    def first(self, data: Any, default: Any = None) -> Any:
+        """Erster Treffer oder default"""
+        if self._jmespath is not None:
+            return next(iter(self.find(data)), default)
+        return next(iter(self._apply(data, self._steps)), default)
+
+    @staticmethod
+    def _apply(data: Any, steps: Tuple[Step, ...]) -> Iterator[Any]:
+        nodes: Iterable[Any] = (data,)
+        for step in steps:
+            nodes = [match for node in nodes for match in step(node)]
+        return iter(nodes)
+
+    @property
+    def streamable(self) -> bool:
+        """True, wenn der Ausdruck ein Array auf oberster Ebene Element für Element auswerten kann"""
+        if self._first_step is None:
+            return False
+        kind, arg = self._first_step
+        if kind in ('wild', 'filter'):
+            return True
+        if kind == 'index':
+            return all(isinstance(i, int) and i >= 0 for i in arg)
+        if kind == 'slice':
+            start, stop, step = arg
+            return (start or 0) >= 0 and (stop is None or stop >= 0) and (step or 1) > 0
+        return False
+
+    def stream(self, source: Any, limit: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+        """
+        Wertet den Ausdruck inkrementell über ein Array auf oberster Ebene aus.
+
+        :param source: Bytes/Text, Dateiobjekt (read) oder Iterable von Byte-Blöcken (z.B. iter_content)
+        :param limit: Nach so vielen Treffern aufhören (der Rest wird nicht mehr gelesen)
+        :returns: Iterator über die Treffer; nicht streamfähige Ausdrücke und Dokumente, die kein
+                  Array sind, werden normal ausgewertet (gleiches Ergebnis wie find())
+        """
+        if self.streamable:
+            first_char, source = _peek_start(source, chunk_size)
+        if not self.streamable or first_char != '[':
+            yield from self.find(_read_all(source))[:limit]
+            return
+        if limit is not None and limit <= 0:
+            return
+
+        kind, arg = self._first_step
+        rest = self._steps[1:]
+        wanted = None
+        stop_after = None
+        if kind == 'index':
+            wanted = set(arg)
+            stop_after = max(arg)
+        elif kind == 'slice':
+            start, stop, step = arg
+            start, step = start or 0, step or 1
+            stop_after = None if stop is None else stop - 1
+
+        count = 0
+        for index, item in enumerate(iter_array(source, chunk_size)):
+            if stop_after is not None and index > stop_after:
+                break
+            if kind == 'index' and index not in wanted:
+                continue
+            if kind == 'slice' and (index < start or (index - start) % step):
+                continue
+            matches = (item,) if kind != 'filter' or arg(item) else ()
+            for match in matches:
+                for value in self._apply(match, rest):
+                    yield value
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(expression: str) -> CompiledQuery:
+    """
+    Übersetzt einen JSONPath- (`$...`) oder JMESPath-Ausdruck; Ergebnisse werden pro Ausdruck gecacht.
+
+    :raises QueryError: Bei Syntaxfehlern oder fehlendem jmespath-Paket
+    """
+    expression = expression.strip()
+    if not expression:
+        raise QueryError("Leerer Ausdruck")
+    if expression.startswith('$'):
+        steps = _parse_jsonpath(expression)
+        return CompiledQuery(expression, 'jsonpath', tuple(step for step, _ in steps),
+                             first_step=steps[0][1] if steps else None)
+    if jmespath is None:
+        raise QueryError("JMESPath-Ausdrücke benötigen das Paket 'jmespath' (pip install jmespath); "
+                         "JSONPath-Ausdrücke beginnen mit '$'")
+    try:
+        return CompiledQuery(expression, 'jmespath', jmespath_expr=jmespath.compile(expression))
+    except jmespath.exceptions.JMESPathError as e:
+        raise QueryError(f"Ungültiger JMESPath-Ausdruck: {e}") from e
+
+
+def query(expression: str, data: Any) -> List[Any]:
+    """Kurzform für compile_query(expression).find(data)"""
+    return compile_query(expression).find(data)
+
+
+# --- JSONPath-Parser -------------------------------------------------------------
+
+def _parse_jsonpath(expression: str) -> List[Tuple[Step, Tuple[str, Any]]]:
+    """Zerlegt einen JSONPath-Ausdruck in Schritte (Funktion + Art/Argument)"""
+    steps = []
+    pos = 1
+    length = len(expression)
+    while pos < length:
+        char = expression[pos]
+        if expression.startswith('..', pos):
+            pos += 2
+            if pos < length and expression[pos] == '[':
+                inner, pos = _bracket(expression, pos)
+                step, info = _bracket_step(inner, expression)
+            else:
+                name, pos = _name(expression, pos)
+                step, info = _name_step(name)
+            steps.append((_descendants(step), ('descendants', info)))
+        elif char == '.':
+            name, pos = _name(expression, pos + 1)
+            steps.append(_name_step(name))
+        elif char == '[':
+            inner, pos = _bracket(expression, pos)
+            steps.append(_bracket_step(inner, expression))
+        elif char.isspace():
+            pos += 1
+        else:
+            raise QueryError(f"Unerwartetes Zeichen {char!r} an Position {pos} in {expression!r}")
+    return steps
+
+
+def _name(expression: str, pos: int) -> Tuple[str, int]:
+    end = pos
+    while end < len(expression) and expression[end] not in '.[' and not expression[end].isspace():
+        end += 1
+    if end == pos:
+        raise QueryError(f"Feldname fehlt an Position {pos} in {expression!r}")
+    return expression[pos:end], end
+
+
+def _bracket(expression: str, pos: int) -> Tuple[str, int]:
+    """Inhalt einer eckigen Klammer (Anführungszeichen und verschachtelte Klammern beachtet)"""
+    depth = 0
+    quote = None
+    for end in range(pos, len(expression)):
+        char = expression[end]
+        if quote:
+            if char == quote and expression[end - 1] != '\\':
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return expression[pos + 1:end].strip(), end + 1
+    raise QueryError(f"Nicht geschlossene Klammer in {expression!r}")
+
+
+def _name_step(name: str) -> Tuple[Step, Tuple[str, Any]]:
+    if name == '*':
+        return _wildcard, ('wild', None)
+
+    def child(node):
+        if type(node) is dict and name in node:
+            return (node[name],)
+        return ()
+    return child, ('key', name)
+
+
+def _bracket_step(inner: str, expression: str) -> Tuple[Step, Tuple[str, Any]]:
+    if inner == '*':
+        return _wildcard, ('wild', None)
+    if inner.startswith('?'):
+        predicate = _compile_filter(inner[1:].strip(), expression)
+
+        def select(node):
+            items = node if type(node) is list else node.values() if type(node) is dict else ()
+            return [item for item in items if predicate(item)]
+        return select, ('filter', predicate)
+    if ':' in inner and not inner.startswith(("'", '"')):
+        bounds = _slice_bounds(inner, expression)
+
+        def slice_step(node):
+            return node[slice(*bounds)] if type(node) is list else ()
+        return slice_step, ('slice', bounds)
+
+    parts = [part.strip() for part in _split_union(inner)]
+    if all(part[:1] in ('"', "'") for part in parts):
+        names = [_unquote(part, expression) for part in parts]
+
+        def keys(node):
+            if type(node) is not dict:
+                return ()
+            return [node[name] for name in names if name in node]
+        return keys, ('key', names)
+    try:
+        indices = [int(part) for part in parts]
+    except ValueError:
+        raise QueryError(f"Ungültiger Index [{inner}] in {expression!r}") from None
+
+    def index_step(node):
+        if type(node) is not list:
+            return ()
+        size = len(node)
+        return [node[i] for i in indices if -size <= i < size]
+    return index_step, ('index', indices)
+
+
+def _split_union(inner: str) -> List[str]:
+    parts, current, quote = [], [], None
+    for char in inner:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+            current.append(char)
+        elif char == ',':
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def _unquote(part: str, expression: str) -> str:
+    if len(part) < 2 or part[-1] != part[0]:
+        raise QueryError(f"Ungültiger Feldname {part} in {expression!r}")
+    return part[1:-1].replace("\\'", "'").replace('\\"', '"')
+
+
+def _slice_bounds(inner: str, expression: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    pieces = [piece.strip() for piece in inner.split(':')]
+    if len(pieces) > 3:
+        raise QueryError(f"Ungültiger Slice [{inner}] in {expression!r}")
+    try:
+        values = [int(piece) if piece else None for piece in pieces]
+    except ValueError:
+        raise QueryError(f"Ungültiger Slice [{inner}] in {expression!r}") from None
+    values += [None] * (3 - len(values))
+    if values[2] == 0:
+        raise QueryError(f"Slice-Schrittweite 0 in {expression!r}")
+    return values[0], values[1], values[2]
+
+
+def _wildcard(node: Any) -> Iterable[Any]:
+    if type(node) is list:
+        return node
+    if type(node) is dict:
+        return node.values()
+    return ()
+
+
+def _descendants(step: Step) -> Step:
+    """Wendet einen Schritt auf den Knoten und alle Nachfahren an (`..`)"""
+    def walk(node):
+        matches = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            matches.extend(step(current))
+            children = current if type(current) is list else current.values() if type(current) is dict else ()
+            stack.extend(reversed(list(children)))
+        return matches
+    return walk
+
+
+def _compile_filter(body: str, expression: str) -> Callable[[Any], bool]:
+    """Übersetzt `(@.feld op wert)` in eine Prädikatfunktion"""
+    if not (body.startswith('(') and body.endswith(')')):
+        raise QueryError(f"Filter muss die Form ?(...) haben: {expression!r}")
+    match = _FILTER_RE.match(body[1:-1].strip())
+    if not match:
+        raise QueryError(f"Nicht unterstützter Filter ?{body} in {expression!r}")
+
+    path = [name if name is not None else int(index) if index is not None else quoted
+            for name, index, quoted in _FILTER_PATH_RE.findall(match.group('path'))]
+
+    def resolve(item):
+        for part in path:
+            if type(part) is int:
+                if type(item) is not list or not -len(item) <= part < len(item):
+                    return _MISSING
+                item = item[part]
+            elif type(item) is dict and part in item:
+                item = item[part]
+            else:
+                return _MISSING
+        return item
+
+    op = match.group('op')
+    if op is None:
+        return lambda item: resolve(item) not in (_MISSING, None, False)
+
+    raw_value = match.group('value').strip()
+    if op == '=~':
+        if len(raw_value) < 2 or not raw_value.startswith('/') or not raw_value.rstrip('i').endswith('/'):
+            raise QueryError(f"Regex im Filter muss die Form /muster/ haben: {expression!r}")
+        flags = re.IGNORECASE if raw_value.endswith('i') else 0
+        pattern = re.compile(raw_value.rstrip('i')[1:-1], flags)
+
+        def matches(item):
+            value = resolve(item)
+            return isinstance(value, str) and pattern.search(value) is not None
+        return matches
+
+    literal = _literal(raw_value, expression)
+    compare = _COMPARATORS[op]
+
+    def predicate(item):
+        value = resolve(item)
+        if value is _MISSING:
+            return False
+        try:
+            return compare(value, literal)
+        except TypeError:
+            return False
+    return predicate
+
+
+def _literal(raw: str, expression: str) -> Any:
+    if raw[:1] == "'" and raw[-1:] == "'":
+        return raw[1:-1]
+    try:
+        return json.loads(raw)
+    except ValueError:
+        raise QueryError(f"Ungültiger Vergleichswert {raw} in {expression!r}") from None
+
+
+# --- Streaming ---------------------------------------------------------------------
+
+def _chunks(source: Any, chunk_size: int) -> Iterator[Any]:
+    if isinstance(source, (bytes, bytearray, memoryview, str)):
+        yield source
+    elif hasattr(source, 'read'):
+        yield from iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        yield from source
+
+
+class _PrefixedReader:
+    """Dateiobjekt, das zuerst bereits gelesene Daten und dann den Rest der Quelle liefert"""
+
+    def __init__(self, head: Any, source: Any):
+        self._head = head
+        self._source = source
+
+    def read(self, size: int = -1) -> Any:
+        if self._head and size != 0:
+            head, self._head = self._head, self._head[:0]
+            return head
+        return self._source.read(size)
+
+
+def _peek_start(source: Any, chunk_size: int) -> Tuple[Optional[str], Any]:
+    """
+    Erstes Zeichen außer Leerraum (None bei leerer Eingabe) und eine Quelle, die wieder von
+    vorn beginnt.
+    """
+    if isinstance(source, memoryview):
+        source = bytes(source)
+    if isinstance(source, (bytes, bytearray, str)):
+        return _first_char(source), source
+    chunks = iter(lambda: source.read(chunk_size), source.read(0)) if hasattr(source, 'read') else iter(source)
+    read = []
+    first_char = None
+    for chunk in chunks:
+        read.append(chunk)
+        first_char = _first_char(chunk)
+        if first_char is not None:
+            break
+    if hasattr(source, 'read'):
+        return first_char, _PrefixedReader(read[0][:0].join(read) if read else b'', source)
+    return first_char, itertools.chain(read, chunks)
+
+
+def _first_char(chunk: Any) -> Optional[str]:
+    is_text = isinstance(chunk, str)
+    head = chunk.lstrip(_WHITESPACE[is_text])
+    if not head:
+        return None
+    return head[0] if is_text else chr(head[0])
+
+
+def _read_all(source: Any) -> Any:
+    if isinstance(source, (bytes, bytearray, memoryview, str)):
+        data = source
+    else:
+        parts = list(_chunks(source, CHUNK_SIZE))
+        data = ''.join(parts) if parts and isinstance(parts[0], str) else b''.join(parts)
+    from json_codec import loads
+    return loads(data)
+
+
+def iter_array(source: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Liefert die Elemente eines JSON-Arrays auf oberster Ebene einzeln, ohne das ganze Dokument zu parsen.
+
+    Ist das Dokument kein Array, wird es als Ganzes geparst und als einziges Element geliefert.
+
+    :param source: Bytes/Text, Dateiobjekt (read) oder Iterable von Byte-/Text-Blöcken
+    """
+    if ijson is not None and hasattr(source, 'read'):
+        yield from ijson.items(source, 'item', use_float=True)
+        return
+
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')(errors='strict')
+    chunks = _chunks(source, chunk_size)
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill() -> None:
+        nonlocal buf, pos, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            tail = utf8.decode(b'', final=True)
+        else:
+            tail = chunk if isinstance(chunk, str) else utf8.decode(bytes(chunk))
+        # Bereits verarbeiteten Anfang verwerfen, damit der Puffer klein bleibt
+        buf = buf[pos:] + tail
+        pos = 0
+
+    def skip_whitespace() -> bool:
+        """Überspringt Leerraum; False am Ende der Eingabe"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n\ufeff':
+                pos += 1
+            if pos < len(buf):
+                return True
+            if eof:
+                return False
+            fill()
+
+    if not skip_whitespace():
+        raise ValueError("Leere Eingabe")
+    if buf[pos] != '[':
+        # Kein Array: Rest einlesen und als Ganzes parsen
+        while not eof:
+            fill()
+        yield decoder.decode(buf[pos:])
+        return
+    pos += 1
+
+    if not skip_whitespace():
+        raise ValueError("Unerwartetes Ende im Array")
+    if buf[pos] == ']':
+        return
+
+    while True:
+        # Ein Element dekodieren; unvollständige Elemente (auch Zahlen am Pufferende) nachladen
+        attempt_size = 0
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # Puffer mindestens verdoppeln, bevor erneut dekodiert wird (sonst quadratisch bei großen Elementen)
+            attempt_size = len(buf) - pos
+            while not eof and len(buf) - pos < 2 * attempt_size:
+                fill()
+        pos = end
+        yield value
+
+        if not skip_whitespace():
+            raise ValueError("Unerwartetes Ende im Array")
+        if buf[pos] == ']':
+            return
+        if buf[pos] != ',':
+            raise ValueError(f"Komma oder ']' erwartet, gefunden {buf[pos]!r}")
+        pos += 1
+        if not skip_whitespace():
+            raise ValueError("Unerwartetes Ende im Array")
@@ -3,7 +3,12 @@ import time
 import json
 from datetime import datetime
 import argparse
+import os
 from env_config import APIConfig, DatabaseConfig
+from json_codec import parse_response
+from json_diff import diff
+from json_query import CHUNK_SIZE, compile_query
+from response_assertions import ResponseContext, compile_assertions
 
 # Die Klasse lädt automatisch aus .env
 api_key = APIConfig.LIBRETRANSLATE_API_KEY  # "abc123xyz789_ihr_echter_key"
@@ -11,32 +16,109 @@ db_pass = DatabaseConfig.PASSWORD
 
 
 class APIChecker:
-    def __init__(self, endpoints):
-        self.endpoints = endpoints
+    def __init__(self, endpoints, baseline_file=None, queries=None, query_limit=None, pause=1.0):
+        # Prüfregeln ("assert") werden hier einmal pro Endpoint-Definition übersetzt, nicht pro Check
+        self.endpoints = [self.prepare_endpoint(endpoint) for endpoint in endpoints]
+        self.pause = pause
         self.results = []
+        # Optional: gespeicherte Referenz-Bodies je URL für die Drift-Erkennung
+        self.baseline_file = baseline_file
+        self.baselines = self.load_baselines()
+        # Optional: JSONPath-/JMESPath-Ausdrücke, einmal kompiliert und für jeden Endpoint wiederverwendet
+        self.queries = [compile_query(expression) for expression in queries or []]
+        self.query_limit = query_limit
+        # Ein einzelner streamfähiger Ausdruck ohne Drift-Erkennung wird beim Download ausgewertet,
+        # große Arrays werden dabei nie vollständig als Python-Objekte aufgebaut
+        single = self.queries[0] if len(self.queries) == 1 else None
+        self.stream_query = single if single is not None and single.streamable and not baseline_file else None
+
+    @staticmethod
+    def prepare_endpoint(endpoint):
+        """Ersetzt die Regeln unter "assert" durch das übersetzte AssertionSet (Schlüssel "assertions")"""
+        endpoint = dict(endpoint)
+        endpoint['assertions'] = compile_assertions(endpoint.pop('assert', None))
+        return endpoint
+
+    def load_baselines(self):
+        """Lädt die Referenz-Bodies (leeres Dict, falls keine Datei vorhanden)"""
+        if not self.baseline_file or not os.path.exists(self.baseline_file):
+            return {}
+        with open(self.baseline_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_baselines(self):
+        """Speichert die Referenz-Bodies"""
+        if not self.baseline_file:
+            return
+        with open(self.baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(self.baselines, f, ensure_ascii=False, indent=2)
+
+    def check_drift(self, url, parsed):
+        """Vergleicht den (geparsten) JSON-Body strukturell mit der Referenz; neue URLs werden als Referenz gespeichert"""
+        if not parsed.is_json:
+            return None
+        body = parsed.data
+        if url not in self.baselines:
+            self.baselines[url] = body
+            return None
+        return diff(self.baselines[url], body)
+
+    def extract(self, parsed):
+        """Wertet alle Ausdrücke auf dem geparsten Body aus (Ausdruck -> Trefferliste)"""
+        data = parsed.data if parsed.is_json else None
+        return {query.expression: query.find(data)[:self.query_limit] for query in self.queries}
     
-    def check_endpoint(self, url, method='GET', headers=None, data=None):
-        """Prüft einen einzelnen API-Endpoint"""
+    def check_endpoint(self, url, method='GET', headers=None, data=None, assertions=None):
+        """Prüft einen einzelnen API-Endpoint (assertions: AssertionSet oder Regel-Dict)"""
+        if assertions is None or isinstance(assertions, dict):
+            assertions = compile_assertions(assertions)
+        # Streaming nur, wenn keine Prüfregel den vollständigen Body braucht
+        stream_query = None if assertions.needs_body else self.stream_query
         try:
-            start_time = time.time()
-            
             response = requests.request(
                 method=method,
                 url=url,
                 headers=headers,
                 json=data,
-                timeout=10
+                timeout=10,
+                stream=stream_query is not None
             )
-            
-            response_time = round((time.time() - start_time) * 1000, 2)  # ms
+            # Latenz bis zum Eintreffen der Header - im Stream-Modus ohne Download und Auswertung des Bodys
+            response_time = round(response.elapsed.total_seconds() * 1000, 2)  # ms
+
+            extracted = None
+            query_error = None
+            if stream_query is not None:
+                try:
+                    extracted = {stream_query.expression: list(stream_query.stream(
+                        response.iter_content(CHUNK_SIZE), limit=self.query_limit))}
+                except ValueError as e:
+                    query_error = str(e)
+                finally:
+                    response.close()
+
+            # Body höchstens einmal parsen - Drift-Erkennung, Abfragen und Prüfregeln teilen sich das Ergebnis
+            parsed = None
+            if stream_query is None and (self.baseline_file or self.queries or assertions.needs_body):
+                parsed = parse_response(response)
+                if self.queries:
+                    extracted = self.extract(parsed)
+
+            failures = assertions.evaluate(ResponseContext(response.status_code, response_time, response.headers, parsed))
+            # Legen die Regeln den Status selbst fest, ersetzen sie die 2xx-Standardprüfung
+            status_ok = assertions.has_status or 200 <= response.status_code < 300
             
             result = {
                 'timestamp': datetime.now().isoformat(),
                 'url': url,
                 'status_code': response.status_code,
                 'response_time_ms': response_time,
-                'success': 200 <= response.status_code < 300,
-                'error': None
+                'success': status_ok and not failures,
+                'error': None,
+                'assertions': failures if len(assertions) else None,
+                'drift': self.check_drift(url, parsed) if self.baseline_file else None,
+                'extracted': extracted,
+                'query_error': query_error
             }
             
         except requests.exceptions.RequestException as e:
@@ -46,7 +128,11 @@ class APIChecker:
                 'status_code': None,
                 'response_time_ms': None,
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                'assertions': None,
+                'drift': None,
+                'extracted': None,
+                'query_error': None
             }
         
         self.results.append(result)
@@ -56,7 +142,8 @@ class APIChecker:
         """Prüft alle Endpoints"""
         for endpoint in self.endpoints:
             self.check_endpoint(**endpoint)
-            time.sleep(1)  # Kurze Pause zwischen Checks
+            if self.pause:
+                time.sleep(self.pause)  # Kurze Pause zwischen Checks
     
     def generate_report(self):
         """Erstellt einen Bericht"""
@@ -75,24 +162,76 @@ class APIChecker:
             print(f"   Status: {result['status_code']} | Time: {result['response_time_ms']}ms")
             if result['error']:
                 print(f"   Error: {result['error']}")
+            if result.get('assertions'):
+                print(f"   ❌ {len(result['assertions'])} Prüfregel(n) verletzt:")
+                for failure in result['assertions']:
+                    print(f"      {failure}")
+            elif result.get('assertions') is not None:
+                print("   ✅ Alle Prüfregeln erfüllt")
+            if result.get('drift'):
+                print(f"   ⚠️ Response-Drift: {len(result['drift'])} Änderungen gegenüber der Referenz")
+                for change in result['drift'][:10]:
+                    print(f"      {change.kind:<8} {change.path}")
+            elif result.get('drift') is not None:
+                print("   ✅ Keine Response-Drift")
+            if result.get('query_error'):
+                print(f"   ❌ Abfrage fehlgeschlagen: {result['query_error']}")
+            for expression, values in (result.get('extracted') or {}).items():
+                print(f"   🔎 {expression}: {len(values)} Treffer")
+                for value in values[:10]:
+                    print(f"      {json.dumps(value, ensure_ascii=False)[:200]}")
+                if len(values) > 10:
+                    print(f"      … {len(values) - 10} weitere")
             print()
 
-# Beispiel-Nutzung
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Prüft einen einzelnen API-Endpunkt.")
-    parser.add_argument("--url", required=True, help="Die zu prüfende URL.")
+def load_json_argument(value):
+    """JSON direkt auf der Kommandozeile oder Pfad zu einer JSON-Datei"""
+    if os.path.exists(value):
+        with open(value, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return json.loads(value)
+
+def main(argv=None):
+    """Einstiegsfunktion (auch für den warmen Runner der GUI)"""
+    parser = argparse.ArgumentParser(description="Prüft einen oder mehrere API-Endpunkte.")
+    parser.add_argument("--url", help="Die zu prüfende URL.")
     parser.add_argument("--method", default="GET", help="HTTP-Methode (z. B. GET, POST).")
     parser.add_argument("--data", help="JSON-Daten für POST-Anfragen.")
-    args = parser.parse_args()
+    parser.add_argument("--assert", dest="assertions",
+                        help='Prüfregeln für --url als JSON oder Datei, z.B. \'{"status": "2xx", "max_ms": 500}\'.')
+    parser.add_argument("--endpoints", help="JSON-Datei mit einer Liste von Endpoints (url, method, headers, data, assert).")
+    parser.add_argument("--pause", type=float, default=1.0, help="Pause zwischen zwei Checks in Sekunden (Standard: 1).")
+    parser.add_argument("--baseline", help="JSON-Datei mit Referenz-Bodies für die Drift-Erkennung (wird beim ersten Lauf angelegt).")
+    parser.add_argument("--query", action="append", default=[],
+                        help="JSONPath- ($.data[*].email) oder JMESPath-Ausdruck zum Extrahieren von Feldern (mehrfach möglich).")
+    parser.add_argument("--query-limit", type=int, help="Maximale Treffer pro Ausdruck (beendet das Streaming vorzeitig).")
+    args = parser.parse_args(argv)
+    if not args.url and not args.endpoints:
+        parser.error("--url oder --endpoints angeben")
 
-    # Endpunkt basierend auf den Argumenten erstellen
-    endpoint = {
-        "url": args.url,
-        "method": args.method,
-        "data": json.loads(args.data) if args.data else None
-    }
+    try:
+        endpoints = load_json_argument(args.endpoints) if args.endpoints else []
+        if args.url:
+            # Endpunkt basierend auf den Argumenten erstellen
+            endpoints.append({
+                "url": args.url,
+                "method": args.method,
+                "data": json.loads(args.data) if args.data else None,
+                "assert": load_json_argument(args.assertions) if args.assertions else None
+            })
+    except (OSError, ValueError) as e:
+        parser.error(f"Ungültige JSON-Eingabe: {e}")
 
-    # API-Checker initialisieren und den Endpunkt prüfen
-    checker = APIChecker([endpoint])
+    # API-Checker initialisieren und die Endpunkte prüfen
+    try:
+        checker = APIChecker(endpoints, baseline_file=args.baseline, queries=args.query,
+                             query_limit=args.query_limit, pause=args.pause)
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
     checker.check_all()
-    checker.generate_report()
\ No newline at end of file
+    checker.generate_report()
+    checker.save_baselines()
+
+# Beispiel-Nutzung
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import json
 import sys
 from urllib.parse import urlparse
 from env_config import APIConfig, DatabaseConfig
+from json_codec import parse_response
 
 # Die Klasse lädt automatisch aus .env
 api_key = APIConfig.LIBRETRANSLATE_API_KEY  # "abc123xyz789_ihr_echter_key"
@@ -318,8 +319,12 @@ class ComprehensiveHealthChecker:
             
             # JSON Validation (falls applicable)
             if 'application/json' in content_type:
+                # Einmal parsen, das Ergebnis dient für Gültigkeit und Elementanzahl
+                body = parse_response(response)
                 try:
-                    json_data = response.json()
+                    if not body.is_json:
+                        raise ValueError(body.error or 'Leerer Body')
+                    json_data = body.data
                     json_check = {
                         'category': 'Content',
                         'test': 'JSON Validity',
@@ -470,13 +475,13 @@ class ComprehensiveHealthChecker:
         for result in all_results:
             status = "PASS" if result['success'] else "FAIL"
             log_message(self.log_file, f"{status} | {result['category']}: {result['test']}")
-def main():
+def main(argv=None):
     """Hauptfunktion mit Argument-Parsing"""
     parser = argparse.ArgumentParser(description="Führt einen umfassenden Health Check für eine URL durch")
     parser.add_argument("--url", required=True, help="Die zu prüfende URL")
     parser.add_argument("--timeout", type=int, default=10, help="Timeout in Sekunden (default: 10)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Unicode-Zeichen durch ASCII ersetzen
     print(f"START: Comprehensive Health Check für: {args.url}")
@@ -24,9 +24,13 @@ def process_string(input_string: str):
     """
     print(f"Verarbeiteter String: {input_string}")
 
-if __name__ == "__main__":
+def main(argv=None):
+    """Einstiegsfunktion (auch für den warmen Runner der GUI)"""
     parser = argparse.ArgumentParser(description="Verarbeitet eine übergebene URL.")
     parser.add_argument("--url", required=True, help="Die zu verarbeitende URL.")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     process_string(args.url)
+
+if __name__ == "__main__":
+    main()
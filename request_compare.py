@@ -0,0 +1,185 @@
+"""
+request_compare.py
+Vergleichsmodus für Mini Postman: eine Request-Definition gegen mehrere Basis-URLs
+(z.B. Staging, Produktion, Canary).
+
+Alle Ziele laufen über eine gemeinsame requests.Session mit Verbindungspool. Cookies aus
+Antworten werden nicht gespeichert, damit kein Ziel und keine GUI-Session die Cookies eines
+anderen Vergleichs mitschickt (Cookie-Header in der Request-Definition gehen normal raus).
+Vor dem Start baut jedes Ziel eine Verbindung (DNS, TCP, TLS) im Pool auf; danach warten alle
+Threads an einer Barriere und feuern ihre Requests über die warme Verbindung im selben Moment
+ab, damit Namensauflösung und Handshake den Latenzvergleich nicht verzerren.
+
+Beispiel:
+    engine = ComparisonEngine()
+    results = engine.compare("GET", "/api/users/1", ["https://staging.example.com", "https://example.com"])
+    for result in results:
+        print(result.base_url, result.status_code, result.timing.total_ms)
+"""
+
+import threading
+from http.cookiejar import DefaultCookiePolicy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+from json_codec import ParsedBody, parse_body
+
+# Maximale Anzahl Ziele pro Vergleich und Verbindungen pro Host im Pool
+MAX_TARGETS = 16
+POOL_SIZE = 32
+
+# Wartezeit an der Startbarriere (Sekunden)
+BARRIER_TIMEOUT = 10
+
+
+@dataclass
+class TargetTiming:
+    """Latenzaufschlüsselung eines Ziels in Millisekunden"""
+    connect_ms: float = 0.0  # Verbindungsaufbau inkl. DNS und TLS (vor dem gemeinsamen Start)
+    ttfb_ms: float = 0.0  # Start bis Response-Header (über die vorab aufgebaute Verbindung)
+    download_ms: float = 0.0  # Lesen des Bodys
+    total_ms: float = 0.0  # ttfb_ms + download_ms
+
+
+@dataclass
+class TargetResponse:
+    """Antwort eines Ziels im Vergleich"""
+    base_url: str
+    url: str
+    status_code: Optional[int] = None
+    reason: str = ''
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b''
+    size: int = 0  # Body-Größe in Bytes (dekomprimiert)
+    wire_size: int = 0  # Übertragene Bytes (ggf. komprimiert)
+    timing: TargetTiming = field(default_factory=TargetTiming)
+    error: Optional[str] = None
+    _body: Optional[ParsedBody] = field(default=None, init=False, repr=False)
+
+    @property
+    def body(self) -> ParsedBody:
+        """Einmal geparster Body (Rohbytes + JSON), wird beim ersten Zugriff erzeugt"""
+        if self._body is None:
+            self._body = parse_body(self.content)
+        return self._body
+
+    def json(self) -> Any:
+        """Geparster Body oder None, falls kein JSON"""
+        return self.body.data if self.body.is_json else None
+
+
+def path_of(url: str) -> str:
+    """Pfad inkl. Query einer URL, z.B. https://x.de/api?a=1 -> /api?a=1"""
+    parts = urlsplit(url)
+    if not parts.scheme:
+        return url if url.startswith('/') else f"/{url}"
+    return urlunsplit(('', '', parts.path or '/', parts.query, ''))
+
+
+def join_target(base_url: str, path: str) -> str:
+    """Hängt den Pfad an eine Basis-URL an (Pfadpräfixe der Basis bleiben erhalten)"""
+    return base_url.rstrip('/') + '/' + path.lstrip('/')
+
+
+class ComparisonEngine:
+    """Sendet eine Request-Definition gleichzeitig an mehrere Basis-URLs."""
+
+    def __init__(self, timeout: float = 30, pool_size: int = POOL_SIZE):
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Prozessweit geteilte Session: Set-Cookie-Antworten verwerfen statt sie später zu wiederholen
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=MAX_TARGETS, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def compare(self, method: str, path: str, base_urls: List[str],
+                headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
+                json_data: Any = None, data: Any = None) -> List[TargetResponse]:
+        """
+        Sendet den Request an alle Basis-URLs im selben Moment.
+
+        :param path: Pfad (inkl. Query) oder vollständige URL, deren Pfad übernommen wird
+        :returns: Ein TargetResponse pro Basis-URL in der übergebenen Reihenfolge
+        """
+        if not base_urls:
+            return []
+        if len(base_urls) > MAX_TARGETS:
+            raise ValueError(f"Maximal {MAX_TARGETS} Ziele pro Vergleich")
+
+        path = path_of(path)
+        barrier = threading.Barrier(len(base_urls))
+
+        def fire(base_url: str) -> TargetResponse:
+            result = TargetResponse(base_url=base_url, url=join_target(base_url, path))
+            try:
+                prepared = self.session.prepare_request(requests.Request(
+                    method, result.url, headers=headers, params=params, json=json_data, data=data))
+                settings = self.session.merge_environment_settings(prepared.url, {}, True, None, None)
+                connect_start = time.perf_counter()
+                self._warm_connection(prepared, settings)
+                result.timing.connect_ms = round((time.perf_counter() - connect_start) * 1000, 2)
+            except (requests.exceptions.RequestException, Urllib3Error, OSError, ValueError) as e:
+                result.error = f"Verbindungsfehler: {e}"
+            finally:
+                # Auch fehlerhafte Ziele müssen die Barriere passieren, sonst warten die anderen
+                try:
+                    barrier.wait(timeout=BARRIER_TIMEOUT)
+                except threading.BrokenBarrierError:
+                    pass
+            if result.error:
+                return result
+
+            start = time.perf_counter()
+            try:
+                response = self.session.send(prepared, timeout=self.timeout, **settings)
+                headers_received = time.perf_counter()
+                result.content = response.content
+                done = time.perf_counter()
+            except requests.exceptions.RequestException as e:
+                result.error = str(e)
+                result.timing.total_ms = round((time.perf_counter() - start) * 1000, 2)
+                return result
+
+            result.status_code = response.status_code
+            result.reason = response.reason or ''
+            result.headers = dict(response.headers)
+            result.size = len(result.content)
+            result.wire_size = response.raw.tell() or result.size
+            result.timing.ttfb_ms = round((headers_received - start) * 1000, 2)
+            result.timing.download_ms = round((done - headers_received) * 1000, 2)
+            result.timing.total_ms = round((done - start) * 1000, 2)
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(base_urls), thread_name_prefix="compare") as executor:
+            return list(executor.map(fire, base_urls))
+
+    def _warm_connection(self, prepared: requests.PreparedRequest, settings: Dict[str, Any]):
+        """
+        Baut eine Verbindung im Pool des Ziels auf (gleicher Pool wie der spätere Request,
+        inkl. Proxy- und TLS-Einstellungen), die der Request nach der Barriere wiederverwendet.
+        """
+        adapter = self.session.get_adapter(prepared.url)
+        pool = adapter.get_connection_with_tls_context(
+            prepared, settings['verify'], settings['proxies'], settings['cert'])
+        conn = pool._get_conn(timeout=self.timeout)
+        try:
+            if conn.sock is None:
+                conn.timeout = self.timeout
+                conn.connect()
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            pool._put_conn(conn)
+
+    def close(self):
+        """Schließt den Verbindungspool"""
+        self.session.close()
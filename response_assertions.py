@@ -0,0 +1,336 @@
+"""
+response_assertions.py
+Deklarative Prüfregeln für API-Antworten (API Checker, Batch-Läufe).
+
+Die Regeln eines Endpoints werden einmal in eine Liste kleiner Prüffunktionen übersetzt
+(Regex kompiliert, JSONPath-Ausdrücke kompiliert, JSON-Schema-Validator gebaut, Modell
+importiert) und danach für jede Antwort nur noch ausgeführt. Identische Regeln werden
+nur einmal übersetzt, auch wenn 10.000 Endpoints sie verwenden.
+
+Regelformat (alle Schlüssel optional):
+    {
+        "status": [200, 201] | 200 | "2xx",
+        "max_ms": 500,
+        "headers": {"content-type": "json", "x-request-id": true, "server": "/^nginx/"},
+        "json": [
+            {"path": "$.id", "equals": 1},
+            {"path": "$.data[*].email", "matches": "@example\\\\.com$"},
+            {"path": "$.data", "exists": true, "count": 10}
+        ],
+        "schema": {...} | "schema_file": "user.schema.json",
+        "model": "models:User"  # pydantic-Modell (optional)
+    }
+
+Beispiel:
+    rules = compile_assertions({"status": "2xx", "max_ms": 300, "json": [{"path": "$.id", "exists": True}]})
+    failures = rules.evaluate(ResponseContext(response.status_code, 120.0, response.headers, parse_response(response)))
+"""
+
+import importlib
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from json_codec import ParsedBody, dumps
+from json_query import QueryError, compile_query
+
+# Anzahl unterschiedlicher Regelsätze im Cache
+ASSERTION_CACHE_SIZE = 1024
+
+# Maximale Länge von Werten in Fehlermeldungen
+MAX_VALUE_CHARS = 120
+
+_KNOWN_KEYS = {'status', 'max_ms', 'headers', 'json', 'schema', 'schema_file', 'model'}
+
+
+class AssertionConfigError(ValueError):
+    """Ungültige Prüfregel (wird beim Übersetzen erkannt, nicht erst beim Prüfen)"""
+
+
+@dataclass
+class ResponseContext:
+    """Was eine Prüfregel über eine Antwort wissen darf"""
+    status_code: Optional[int]
+    elapsed_ms: Optional[float]
+    headers: Mapping[str, str]  # requests liefert ein CaseInsensitiveDict
+    body: Optional[ParsedBody] = None  # nur nötig, wenn needs_body gesetzt ist
+
+
+# Eine Prüfung liefert None (bestanden) oder eine Fehlermeldung
+Check = Callable[[ResponseContext], Optional[str]]
+
+
+class AssertionSet:
+    """Übersetzte Regeln eines Endpoints"""
+
+    def __init__(self, checks: Tuple[Check, ...], needs_body: bool, has_status: bool):
+        self.checks = checks
+        # True, wenn mindestens eine Regel den geparsten Body braucht
+        self.needs_body = needs_body
+        # True, wenn die Regeln den erlaubten Status selbst festlegen (sonst gilt 2xx)
+        self.has_status = has_status
+
+    def __len__(self) -> int:
+        return len(self.checks)
+
+    def evaluate(self, context: ResponseContext) -> List[str]:
+        """Fehlermeldungen aller nicht bestandenen Regeln (leer = alles bestanden)"""
+        failures = []
+        for check in self.checks:
+            message = check(context)
+            if message:
+                failures.append(message)
+        return failures
+
+
+EMPTY = AssertionSet((), needs_body=False, has_status=False)
+
+
+def compile_assertions(spec: Optional[Dict[str, Any]]) -> AssertionSet:
+    """
+    Übersetzt einen Regelsatz; gleiche Regelsätze liefern dasselbe AssertionSet.
+
+    :raises AssertionConfigError: Bei unbekannten Schlüsseln, ungültigen Regex/Ausdrücken/Schemas
+    """
+    if not spec:
+        return EMPTY
+    if not isinstance(spec, dict):
+        raise AssertionConfigError(f"Prüfregeln müssen ein Objekt sein, nicht {type(spec).__name__}")
+    return _compile_cached(dumps(spec, sort_keys=True))
+
+
+@lru_cache(maxsize=ASSERTION_CACHE_SIZE)
+def _compile_cached(key: str) -> AssertionSet:
+    spec = json.loads(key)
+    unknown = set(spec) - _KNOWN_KEYS
+    if unknown:
+        raise AssertionConfigError(f"Unbekannte Prüfregel(n): {', '.join(sorted(unknown))}")
+
+    checks: List[Check] = []
+    needs_body = False
+    if 'status' in spec:
+        checks.append(_status_check(spec['status']))
+    if 'max_ms' in spec:
+        checks.append(_latency_check(spec['max_ms']))
+    for name, expected in (spec.get('headers') or {}).items():
+        checks.append(_header_check(name, expected))
+    for rule in spec.get('json') or []:
+        checks.append(_json_check(rule))
+        needs_body = True
+    if 'schema' in spec or 'schema_file' in spec:
+        checks.append(_schema_check(spec.get('schema'), spec.get('schema_file')))
+        needs_body = True
+    if 'model' in spec:
+        checks.append(_model_check(spec['model']))
+        needs_body = True
+    return AssertionSet(tuple(checks), needs_body=needs_body, has_status='status' in spec)
+
+
+def _short(value: Any) -> str:
+    text = dumps(value) if not isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + '…'
+
+
+def _status_check(spec: Any) -> Check:
+    """Status als Zahl, Liste oder Klasse ("2xx"); wird zu einem frozenset aufgelöst"""
+    allowed = set()
+    for item in spec if isinstance(spec, list) else [spec]:
+        if isinstance(item, int) and not isinstance(item, bool):
+            allowed.add(item)
+        elif isinstance(item, str) and re.fullmatch(r'[1-5]xx', item.strip().lower()):
+            base = int(item.strip()[0]) * 100
+            allowed.update(range(base, base + 100))
+        elif isinstance(item, str) and item.strip().isdigit():
+            allowed.add(int(item))
+        else:
+            raise AssertionConfigError(f"Ungültiger Status {item!r} (erlaubt: 200, [200, 204], \"2xx\")")
+    allowed = frozenset(allowed)
+    label = _short(spec)
+
+    def check(context: ResponseContext) -> Optional[str]:
+        if context.status_code not in allowed:
+            return f"Status {context.status_code} nicht in {label}"
+        return None
+    return check
+
+
+def _latency_check(max_ms: Any) -> Check:
+    if not isinstance(max_ms, (int, float)) or isinstance(max_ms, bool) or max_ms <= 0:
+        raise AssertionConfigError(f"max_ms muss eine positive Zahl sein, nicht {max_ms!r}")
+
+    def check(context: ResponseContext) -> Optional[str]:
+        if context.elapsed_ms is None or context.elapsed_ms > max_ms:
+            return f"Antwortzeit {context.elapsed_ms} ms über dem Budget von {max_ms} ms"
+        return None
+    return check
+
+
+def _regex(pattern: str, where: str) -> 're.Pattern[str]':
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise AssertionConfigError(f"Ungültiger regulärer Ausdruck in {where}: {e}") from e
+
+
+def _header_check(name: str, expected: Any) -> Check:
+    """true/false = vorhanden/nicht vorhanden, "/regex/" = Regex, sonst Teilstring (ohne Groß-/Kleinschreibung)"""
+    if isinstance(expected, bool):
+        def presence(context: ResponseContext) -> Optional[str]:
+            present = context.headers.get(name) is not None
+            if present != expected:
+                return f"Header {name} {'fehlt' if expected else 'ist unerwartet vorhanden'}"
+            return None
+        return presence
+    if not isinstance(expected, str):
+        raise AssertionConfigError(f"Header-Regel für {name} muss Text oder true/false sein")
+
+    if len(expected) >= 2 and expected.startswith('/') and expected.endswith('/'):
+        pattern = _regex(expected[1:-1], f"Header {name}")
+
+        def matches(value: str) -> bool:
+            return pattern.search(value) is not None
+    else:
+        needle = expected.lower()
+
+        def matches(value: str) -> bool:
+            return needle in value.lower()
+
+    def check(context: ResponseContext) -> Optional[str]:
+        value = context.headers.get(name)
+        if value is None:
+            return f"Header {name} fehlt"
+        if not matches(value):
+            return f"Header {name}={_short(value)} passt nicht zu {expected!r}"
+        return None
+    return check
+
+
+def _json_check(rule: Any) -> Check:
+    """Eine JSON-Regel: path + equals / matches / exists / count (alle Treffer müssen passen)"""
+    if not isinstance(rule, dict) or 'path' not in rule:
+        raise AssertionConfigError(f"JSON-Regel braucht einen 'path': {rule!r}")
+    unknown = set(rule) - {'path', 'equals', 'matches', 'exists', 'count'}
+    if unknown:
+        raise AssertionConfigError(f"Unbekannte Schlüssel in JSON-Regel: {', '.join(sorted(unknown))}")
+    path = rule['path']
+    try:
+        query = compile_query(path)
+    except QueryError as e:
+        raise AssertionConfigError(str(e)) from e
+
+    has_equals = 'equals' in rule
+    expected = rule.get('equals')
+    pattern = _regex(rule['matches'], f"JSON-Regel {path}") if 'matches' in rule else None
+    exists = rule.get('exists')
+    count = rule.get('count')
+    if count is not None and (not isinstance(count, int) or isinstance(count, bool)):
+        raise AssertionConfigError(f"count muss eine Ganzzahl sein ({path})")
+    # Ohne weitere Angaben muss der Pfad mindestens einen Treffer haben
+    if not has_equals and pattern is None and exists is None and count is None:
+        exists = True
+
+    def check(context: ResponseContext) -> Optional[str]:
+        body = context.body
+        if body is None or not body.is_json:
+            return f"{path}: Body ist kein JSON"
+        values = query.find(body.data)
+        if exists is not None and bool(values) != exists:
+            return f"{path}: {'kein Treffer' if exists else f'{len(values)} unerwartete Treffer'}"
+        if count is not None and len(values) != count:
+            return f"{path}: {len(values)} Treffer statt {count}"
+        if has_equals:
+            if not values:
+                return f"{path}: kein Treffer (erwartet {_short(expected)})"
+            for value in values:
+                if value != expected or (type(value) is bool) != (type(expected) is bool):
+                    return f"{path}: {_short(value)} ≠ {_short(expected)}"
+        if pattern is not None:
+            if not values:
+                return f"{path}: kein Treffer für /{pattern.pattern}/"
+            for value in values:
+                if not isinstance(value, str) or pattern.search(value) is None:
+                    return f"{path}: {_short(value)} passt nicht zu /{pattern.pattern}/"
+        return None
+    return check
+
+
+def _schema_check(schema: Optional[Dict[str, Any]], schema_file: Optional[str]) -> Check:
+    """
+    JSON-Schema-Validierung; der Validator wird einmal gebaut. Für Schemas im Umfang von
+    schema_infer.py wird ein eigens erzeugter Validator genutzt, sonst jsonschema.
+    """
+    if schema is None:
+        try:
+            with open(schema_file, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+        except (OSError, ValueError) as e:
+            raise AssertionConfigError(f"Schema-Datei {schema_file} nicht lesbar: {e}") from e
+
+    from schema_infer import UnsupportedSchema, compile_validator
+    try:
+        generated = compile_validator(schema)
+    except UnsupportedSchema:
+        generated = None
+    if generated is not None:
+        def fast_check(context: ResponseContext) -> Optional[str]:
+            body = context.body
+            if body is None or not body.is_json:
+                return "Schema: Body ist kein JSON"
+            errors = generated(body.data)
+            return f"Schema: {errors[0]}" + (f" (+{len(errors) - 1} weitere)" if len(errors) > 1 else '') if errors else None
+        return fast_check
+
+    try:
+        from jsonschema import exceptions as schema_exceptions
+        from jsonschema import validators
+    except ImportError as e:
+        raise AssertionConfigError("JSON-Schema-Regeln benötigen das Paket 'jsonschema' (pip install jsonschema)") from e
+    validator_class = validators.validator_for(schema)
+    try:
+        validator_class.check_schema(schema)
+    except schema_exceptions.SchemaError as e:
+        raise AssertionConfigError(f"Ungültiges JSON-Schema: {e.message}") from e
+    validator = validator_class(schema)
+
+    def check(context: ResponseContext) -> Optional[str]:
+        body = context.body
+        if body is None or not body.is_json:
+            return "Schema: Body ist kein JSON"
+        error = next(validator.iter_errors(body.data), None)
+        if error is not None:
+            location = '$' + ''.join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in error.absolute_path)
+            return f"Schema: {location}: {error.message}"
+        return None
+    return check
+
+
+def _model_check(target: Any) -> Check:
+    """Validierung gegen ein pydantic-Modell, angegeben als "modul:Klasse" (benötigt pydantic)"""
+    if not isinstance(target, str) or ':' not in target:
+        raise AssertionConfigError(f"model muss die Form 'modul:Klasse' haben, nicht {target!r}")
+    try:
+        import pydantic
+    except ImportError as e:
+        raise AssertionConfigError("Modell-Regeln benötigen das Paket 'pydantic' (pip install pydantic)") from e
+    module_name, class_name = target.split(':', 1)
+    try:
+        model = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError) as e:
+        raise AssertionConfigError(f"Modell {target} nicht gefunden: {e}") from e
+    # TypeAdapter erlaubt auch Listen-Modelle wie List[User]
+    adapter = pydantic.TypeAdapter(model)
+
+    def check(context: ResponseContext) -> Optional[str]:
+        body = context.body
+        if body is None or not body.is_json:
+            return f"Modell {class_name}: Body ist kein JSON"
+        try:
+            adapter.validate_python(body.data)
+        except pydantic.ValidationError as e:
+            first = e.errors()[0]
+            location = '.'.join(str(part) for part in first.get('loc', ()))
+            return f"Modell {class_name}: {location}: {first.get('msg')}"
+        return None
+    return check
@@ -0,0 +1,469 @@
+"""
+schema_infer.py
+Leitet aus aufgezeichneten Antworten ein JSON-Schema (oder pydantic-Modelle) ab und
+erzeugt daraus einen schnellen Validator.
+
+Mehrere Beispiele werden zusammengeführt: beobachtete Typen werden vereinigt, Felder,
+die nicht in jedem Objekt vorkommen, werden optional, Texte mit wenigen verschiedenen
+Werten (bei genügend Beispielen) werden zu Enums. Der Validator wird als Python-Code
+für genau dieses Schema erzeugt und einmal kompiliert; er ist deutlich schneller als ein
+allgemeiner JSON-Schema-Validator und eignet sich daher, jede Antwort eines Dauerlaufs
+zu prüfen und Schema-Drift zu melden. Die Prüfregel "schema" des API Checkers nutzt ihn
+automatisch, wenn das Schema nur die hier erzeugten Schlüsselwörter enthält.
+
+Beispiel:
+    python schema_infer.py antworten/*.json --out user.schema.json
+    python schema_infer.py verlauf.jsonl --history --pydantic --name User
+    python schema_infer.py --schema user.schema.json --validate neue_antwort.json
+
+    inferrer = SchemaInferrer()
+    for body in bodies:
+        inferrer.add(body)
+    validate = compile_validator(inferrer.to_json_schema())
+    errors = validate(response_data)  # [] = passt zum Schema
+"""
+
+import argparse
+import keyword
+import re
+import sys
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from json_codec import dumps, loads
+
+# Enum nur bei 2 bis höchstens so vielen verschiedenen Werten ...
+ENUM_MAX_VALUES = 10
+# ... und mindestens so vielen Beobachtungen (und mindestens 3 pro Wert)
+ENUM_MIN_SAMPLES = 10
+
+# Erkannte Textformate (alle beobachteten Werte müssen passen)
+STRING_FORMATS = {
+    'date-time': re.compile(r'^\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([Zz]|[+-]\d{2}:?\d{2})?$'),
+    'date': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+    'email': re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$'),
+    'uri': re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*://\S+$'),
+    'uuid': re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'),
+}
+
+JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+
+# Reihenfolge der Typen in erzeugten Schemas
+_TYPE_ORDER = ('object', 'array', 'string', 'integer', 'number', 'boolean', 'null')
+
+
+def json_type(value: Any) -> str:
+    """JSON-Schema-Typname eines geparsten Werts"""
+    value_type = type(value)
+    if value_type is dict:
+        return 'object'
+    if value_type is list:
+        return 'array'
+    if value_type is str:
+        return 'string'
+    if value_type is bool:
+        return 'boolean'
+    if value_type is int:
+        return 'integer'
+    if value_type is float:
+        return 'number'
+    if value is None:
+        return 'null'
+    return value_type.__name__
+
+
+class _Node:
+    """Gesammelte Beobachtungen für eine Stelle im Dokument"""
+    __slots__ = ('types', 'objects', 'properties', 'items', 'strings', 'string_count', 'formats')
+
+    def __init__(self):
+        self.types: Counter = Counter()
+        self.objects = 0  # Anzahl beobachteter Objekte (für Pflichtfelder)
+        self.properties: Dict[str, '_Node'] = {}
+        self.items: Optional['_Node'] = None
+        self.strings: Optional[set] = set()  # None = zu viele verschiedene Werte für ein Enum
+        self.string_count = 0
+        self.formats: Optional[set] = None  # Noch mögliche Formate (None = noch kein Text gesehen)
+
+    def add(self, value: Any):
+        kind = json_type(value)
+        self.types[kind] += 1
+        if kind == 'object':
+            self.objects += 1
+            for key, child in value.items():
+                node = self.properties.get(key)
+                if node is None:
+                    node = self.properties[key] = _Node()
+                node.add(child)
+        elif kind == 'array':
+            if self.items is None:
+                self.items = _Node()
+            for item in value:
+                self.items.add(item)
+        elif kind == 'string':
+            self.string_count += 1
+            if self.strings is not None:
+                self.strings.add(value)
+                if len(self.strings) > ENUM_MAX_VALUES:
+                    self.strings = None
+            if self.formats is None:
+                self.formats = {name for name, pattern in STRING_FORMATS.items() if pattern.match(value)}
+            elif self.formats:
+                self.formats = {name for name in self.formats if STRING_FORMATS[name].match(value)}
+
+    def required(self) -> List[str]:
+        return [key for key, node in self.properties.items() if node.present == self.objects]
+
+    @property
+    def present(self) -> int:
+        """Anzahl der Beobachtungen dieses Felds"""
+        return sum(self.types.values())
+
+    def enum(self) -> Optional[List[str]]:
+        # Konstanten und formatierte Werte (Datum, E-Mail, ...) sind keine sinnvollen Enums
+        if not self.strings or len(self.strings) < 2 or self.formats:
+            return None
+        if self.string_count < max(ENUM_MIN_SAMPLES, 3 * len(self.strings)):
+            return None
+        return sorted(self.strings)
+
+    def type_names(self) -> List[str]:
+        types = set(self.types)
+        if 'integer' in types and 'number' in types:
+            types.discard('integer')
+        return [name for name in _TYPE_ORDER if name in types]
+
+    def to_schema(self, strict: bool) -> Dict[str, Any]:
+        types = self.type_names()
+        schema: Dict[str, Any] = {}
+        if types:
+            schema['type'] = types[0] if len(types) == 1 else types
+        if 'object' in types:
+            schema['properties'] = {key: node.to_schema(strict) for key, node in self.properties.items()}
+            required = self.required()
+            if required:
+                schema['required'] = required
+            if strict:
+                schema['additionalProperties'] = False
+        if 'array' in types and self.items is not None and self.items.types:
+            schema['items'] = self.items.to_schema(strict)
+        if 'string' in types:
+            enum = self.enum()
+            if enum is not None:
+                schema['enum'] = enum + ([None] if 'null' in types else [])
+            elif self.formats:
+                schema['format'] = sorted(self.formats)[0]
+        return schema
+
+
+class SchemaInferrer:
+    """Sammelt Beispiele und leitet daraus ein gemeinsames Schema ab"""
+
+    def __init__(self, strict: bool = False):
+        # strict: unbekannte Felder gelten als Verstoß (additionalProperties: false)
+        self.strict = strict
+        self.samples = 0
+        self._root = _Node()
+
+    def add(self, value: Any) -> 'SchemaInferrer':
+        self._root.add(value)
+        self.samples += 1
+        return self
+
+    def add_all(self, values: Iterable[Any]) -> 'SchemaInferrer':
+        for value in values:
+            self.add(value)
+        return self
+
+    def to_json_schema(self, title: Optional[str] = None) -> Dict[str, Any]:
+        """JSON-Schema (Draft 2020-12) aller bisherigen Beispiele"""
+        schema: Dict[str, Any] = {'$schema': JSON_SCHEMA_DIALECT}
+        if title:
+            schema['title'] = title
+        schema.update(self._root.to_schema(self.strict))
+        return schema
+
+    def to_pydantic(self, name: str = 'Response') -> str:
+        """Quelltext von pydantic-Modellen (v2) für das abgeleitete Schema"""
+        return generate_pydantic(self.to_json_schema(), name)
+
+
+# --- Validator-Erzeugung ---------------------------------------------------------
+
+# Schlüsselwörter, die der erzeugte Validator versteht (alles andere -> jsonschema)
+SUPPORTED_KEYWORDS = {'$schema', 'title', 'description', 'type', 'properties', 'required',
+                      'additionalProperties', 'items', 'enum', 'format'}
+
+_TYPE_TESTS = {
+    'object': "t is dict",
+    'array': "t is list",
+    'string': "t is str",
+    'integer': "(t is int or (t is float and v.is_integer()))",
+    'number': "(t is int or t is float)",
+    'boolean': "t is bool",
+    'null': "v is None",
+}
+
+
+class UnsupportedSchema(ValueError):
+    """Das Schema nutzt Schlüsselwörter, für die kein Validator erzeugt werden kann"""
+
+
+def compile_validator(schema: Dict[str, Any]) -> Callable[[Any], List[str]]:
+    """
+    Erzeugt Python-Code, der genau dieses Schema prüft, und kompiliert ihn einmal.
+
+    Unterstützt die Schlüsselwörter aus SUPPORTED_KEYWORDS (alles, was SchemaInferrer erzeugt);
+    `format` wird wie bei jsonschema standardmäßig nur als Anmerkung behandelt.
+
+    :returns: validate(value) -> Liste von Fehlermeldungen (leer = gültig)
+    :raises UnsupportedSchema: Bei anderen Schlüsselwörtern (dann jsonschema verwenden)
+    """
+    builder = _ValidatorBuilder()
+    entry = builder.build(schema)
+    namespace: Dict[str, Any] = dict(builder.constants, MISSING=object(), type_name=json_type)
+    exec(compile('\n'.join(builder.lines), '<schema-validator>', 'exec'), namespace)
+    node = namespace[entry]
+
+    def validate(value: Any) -> List[str]:
+        errors: List[str] = []
+        node(value, '$', errors)
+        return errors
+    return validate
+
+
+class _ValidatorBuilder:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self.counter = 0
+
+    def constant(self, value: Any) -> str:
+        name = f"C{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def build(self, schema: Any) -> str:
+        """Erzeugt eine Funktion für einen Schema-Knoten und liefert ihren Namen"""
+        name = f"node{self.counter}"
+        self.counter += 1
+        if schema is True or schema == {}:
+            self.lines += [f"def {name}(v, p, e):", "    return"]
+            return name
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"Schema-Knoten {schema!r} nicht unterstützt")
+        unknown = set(schema) - SUPPORTED_KEYWORDS
+        if unknown:
+            raise UnsupportedSchema(f"Nicht unterstützte Schlüsselwörter: {', '.join(sorted(unknown))}")
+
+        types = schema.get('type')
+        types = [types] if isinstance(types, str) else list(types or [])
+        if any(kind not in _TYPE_TESTS for kind in types):
+            raise UnsupportedSchema(f"Unbekannter Typ in {types}")
+
+        # Kinder zuerst erzeugen, damit ihre Funktionsnamen feststehen
+        properties = {key: self.build(child) for key, child in (schema.get('properties') or {}).items()}
+        items = self.build(schema['items']) if 'items' in schema else None
+        additional = schema.get('additionalProperties', True)
+        if additional not in (True, False):
+            raise UnsupportedSchema("additionalProperties muss true oder false sein")
+
+        body = ["    t = type(v)"]
+        if 'enum' in schema:
+            enum = schema['enum']
+            if not all(isinstance(item, str) or item is None for item in enum):
+                raise UnsupportedSchema("enum wird nur für Texte (und null) unterstützt")
+            allowed = self.constant(frozenset(enum))
+            label = self.constant(dumps(enum)[:120])
+            body += [f"    if (t is str or v is None) and v not in {allowed}:",
+                     f"        e.append(p + ': ' + repr(v) + ' nicht in ' + {label})",
+                     "        return"]
+
+        if types:
+            body.append(f"    if not ({' or '.join(_TYPE_TESTS[kind] for kind in types)}):")
+            body.append(f"        e.append(p + ': Typ ' + type_name(v) + ' statt {'/'.join(types)}')")
+            body.append("        return")
+
+        if properties or schema.get('required') or additional is False:
+            body.append("    if t is dict:")
+            for key in schema.get('required') or []:
+                key_const = self.constant(key)
+                body.append(f"        if {key_const} not in v:")
+                body.append(f"            e.append(p + ': Pflichtfeld ' + {self.constant(repr(key))} + ' fehlt')")
+            for key, child in properties.items():
+                key_const = self.constant(key)
+                suffix = self.constant(f".{key}" if key.isidentifier() else f"[{key!r}]")
+                body.append(f"        x = v.get({key_const}, MISSING)")
+                body.append(f"        if x is not MISSING:")
+                body.append(f"            {child}(x, p + {suffix}, e)")
+            if additional is False:
+                known = self.constant(frozenset(properties))
+                body.append("        for k in v:")
+                body.append(f"            if k not in {known}:")
+                body.append("                e.append(p + ': unbekanntes Feld ' + repr(k))")
+        if items is not None:
+            body.append("    if t is list:")
+            body.append("        for i, x in enumerate(v):")
+            body.append(f"            {items}(x, p + '[' + str(i) + ']', e)")
+
+        self.lines.append(f"def {name}(v, p, e):")
+        self.lines += body
+        return name
+
+
+# --- pydantic-Modelle --------------------------------------------------------------
+
+_PYTHON_TYPES = {'string': 'str', 'integer': 'int', 'number': 'float', 'boolean': 'bool', 'null': 'None'}
+
+
+def generate_pydantic(schema: Dict[str, Any], name: str = 'Response') -> str:
+    """Erzeugt Quelltext von pydantic-Modellen (v2) aus einem (abgeleiteten) JSON-Schema"""
+    models: List[str] = []
+    used_names: set = set()
+
+    def class_name(hint: str) -> str:
+        base = ''.join(part[:1].upper() + part[1:] for part in re.split(r'[^0-9a-zA-Z]+', hint) if part) or 'Model'
+        if base[0].isdigit():
+            base = f"M{base}"
+        candidate, index = base, 2
+        while candidate in used_names:
+            candidate, index = f"{base}{index}", index + 1
+        used_names.add(candidate)
+        return candidate
+
+    def annotation(node: Dict[str, Any], hint: str) -> str:
+        types = node.get('type')
+        types = [types] if isinstance(types, str) else list(types or [])
+        if not types:
+            return 'Any'
+        parts = []
+        for kind in types:
+            if kind == 'object':
+                parts.append(model(node, hint) if node.get('properties') else 'Dict[str, Any]')
+            elif kind == 'array':
+                items = node.get('items')
+                singular = hint[:-1] if hint.endswith('s') and len(hint) > 1 else f"{hint}Item"
+                parts.append(f"List[{annotation(items, singular) if items else 'Any'}]")
+            elif kind == 'string' and node.get('enum'):
+                values = [value for value in node['enum'] if value is not None]
+                parts.append(f"Literal[{', '.join(repr(value) for value in values)}]")
+            else:
+                parts.append(_PYTHON_TYPES[kind])
+        if 'None' in parts and len(parts) > 1:
+            parts.remove('None')
+            inner = parts[0] if len(parts) == 1 else f"Union[{', '.join(parts)}]"
+            return f"Optional[{inner}]"
+        return parts[0] if len(parts) == 1 else f"Union[{', '.join(parts)}]"
+
+    def model(node: Dict[str, Any], hint: str) -> str:
+        cls = class_name(hint)
+        required = set(node.get('required') or [])
+        lines = [f"class {cls}(BaseModel):"]
+        if node.get('additionalProperties') is False:
+            lines.append("    model_config = ConfigDict(extra='forbid')")
+        for key, child in (node.get('properties') or {}).items():
+            field = re.sub(r'\W', '_', key)
+            if not field or field[0].isdigit() or keyword.iskeyword(field) or field.startswith('_'):
+                field = f"field_{field.lstrip('_')}"
+            field_type = annotation(child, key)
+            if key in required:
+                default = f" = Field(alias={key!r})" if field != key else ''
+            else:
+                if not field_type.startswith('Optional['):
+                    field_type = f"Optional[{field_type}]"
+                default = f" = Field(None, alias={key!r})" if field != key else ' = None'
+            lines.append(f"    {field}: {field_type}{default}")
+        if len(lines) == 1 or (len(lines) == 2 and 'model_config' in lines[1]):
+            lines.append("    pass")
+        models.append('\n'.join(lines))
+        return cls
+
+    root = annotation(schema, name)
+    header = [
+        '"""Automatisch aus Beispielantworten erzeugt (schema_infer.py)"""',
+        '',
+        'from typing import Any, Dict, List, Literal, Optional, Union',
+        '',
+        'from pydantic import BaseModel, ConfigDict, Field',
+    ]
+    code = '\n'.join(header) + '\n\n\n' + '\n\n\n'.join(models)
+    if root != name:
+        # Wurzel ist kein Objekt (z.B. Liste von Objekten): Typalias für TypeAdapter / Prüfregel "model"
+        code += f"\n\n\n{name} = {root}"
+    return code.rstrip() + '\n'
+
+
+# --- Kommandozeile -----------------------------------------------------------------
+
+def read_samples(paths: List[str], history: bool = False) -> List[Any]:
+    """Liest Beispiele aus JSON-Dateien oder JSON-Lines (eine Antwort pro Zeile)"""
+    samples = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if path.endswith('.jsonl'):
+            entries = [loads(line) for line in raw.splitlines() if line.strip()]
+        else:
+            entries = [loads(raw)]
+        for entry in entries:
+            # Verlaufsexport der GUI: der Body steht unter "body"
+            samples.append(entry.get('body') if history and isinstance(entry, dict) else entry)
+    return samples
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion mit Argument-Parsing"""
+    parser = argparse.ArgumentParser(description="Leitet ein JSON-Schema bzw. pydantic-Modelle aus Beispielantworten ab")
+    parser.add_argument("samples", nargs="*", help="JSON-Dateien oder JSON-Lines (.jsonl) mit Beispielantworten")
+    parser.add_argument("--history", action="store_true", help="Eingaben sind ein Verlaufsexport der GUI (Body unter 'body')")
+    parser.add_argument("--strict", action="store_true", help="Unbekannte Felder als Verstoß werten (additionalProperties: false)")
+    parser.add_argument("--pydantic", action="store_true", help="pydantic-Modelle statt JSON-Schema ausgeben")
+    parser.add_argument("--name", default="Response", help="Name des Wurzelmodells bzw. Schema-Titel (Standard: Response)")
+    parser.add_argument("--out", help="Ausgabedatei (Standard: stdout)")
+    parser.add_argument("--schema", help="Vorhandenes Schema laden statt es abzuleiten (für --validate)")
+    parser.add_argument("--validate", nargs="+", help="Diese Antworten gegen das Schema prüfen und Drift melden")
+    args = parser.parse_args(argv)
+
+    if args.schema:
+        with open(args.schema, 'rb') as f:
+            schema = loads(f.read())
+    else:
+        if not args.samples:
+            parser.error("Beispieldateien oder --schema angeben")
+        inferrer = SchemaInferrer(strict=args.strict).add_all(read_samples(args.samples, args.history))
+        schema = inferrer.to_json_schema(title=args.name)
+        output = generate_pydantic(schema, args.name) if args.pydantic else dumps(schema, indent=True) + '\n'
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                f.write(output)
+            print(f"✅ {'Modelle' if args.pydantic else 'Schema'} aus {inferrer.samples} Beispielen nach {args.out} geschrieben")
+        elif not args.validate:
+            sys.stdout.write(output)
+
+    if not args.validate:
+        return 0
+    try:
+        validate = compile_validator(schema)
+    except UnsupportedSchema as e:
+        print(f"ℹ️ {e} - nutze jsonschema")
+        from jsonschema import validators
+        validator = validators.validator_for(schema)(schema)
+
+        def validate(value):
+            return [f"${''.join(f'[{p!r}]' for p in error.absolute_path)}: {error.message}" for error in validator.iter_errors(value)]
+
+    drift = 0
+    for index, sample in enumerate(read_samples(args.validate, args.history)):
+        errors = validate(sample)
+        if errors:
+            drift += 1
+            print(f"⚠️ Antwort {index + 1}: {len(errors)} Abweichung(en) vom Schema")
+            for error in errors[:20]:
+                print(f"   {error}")
+        else:
+            print(f"✅ Antwort {index + 1}: passt zum Schema")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_upstream_calls.py
+Zählt die Upstream-Aufrufe des Weltwetter-Servers über einen Kalt-Start und einen Stale-Zyklus.
+
+Ein lokaler Open-Meteo-Ersatz (Koordinatenlisten wie das Original) zählt jeden Aufruf.
+Der Server wird mit kurzer TTL importiert und über den Flask-Test-Client abgefragt:
+
+1. Kalt-Start: /api/weather/all und /api/forecast/stats mit leerem Cache
+2. Stale-Zyklus: nach Ablauf der TTL dieselben Abfragen (veraltete Daten werden sofort
+   ausgeliefert) und warten, bis die Hintergrund-Aktualisierung fertig ist
+
+Beide Phasen müssen mit höchstens --budget Aufrufen auskommen (Standard: 5, also
+gebündelte Multi-Location-Requests statt eines Aufrufs pro Stadt); sonst Exit-Code 1.
+
+Beispiel:
+    python bench_upstream_calls.py
+    python bench_upstream_calls.py --ttl 3 --budget 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Zeit, die die Hintergrund-Aktualisierung höchstens brauchen darf (Sekunden)
+REFRESH_TIMEOUT = 15
+
+
+class UpstreamStub(BaseHTTPRequestHandler):
+    """Open-Meteo-Ersatz: eine Location pro Koordinatenpaar, zählt alle Aufrufe"""
+
+    calls = 0
+    lock = threading.Lock()
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        lats = [float(x) for x in query['latitude'][0].split(',')]
+        lons = [float(x) for x in query['longitude'][0].split(',')]
+        with UpstreamStub.lock:
+            UpstreamStub.calls += 1
+        hours = [f"2026-01-01T{h:02d}:00" for h in range(24)]
+        locations = [{
+            "latitude": lat,
+            "longitude": lon,
+            "current_weather": {"temperature": 10.0, "windspeed": 5.0, "winddirection": 90,
+                                "weathercode": 3, "is_day": 1, "time": hours[12]},
+            "hourly": {"time": hours, "temperature_2m": [10.0] * 24,
+                       "relativehumidity_2m": [50] * 24, "windspeed_10m": [5.0] * 24},
+        } for lat, lon in zip(lats, lons)]
+        body = json.dumps(locations if len(locations) > 1 else locations[0]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub() -> str:
+    """Startet den Ersatz-Server auf einem freien Port und liefert die Forecast-URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), UpstreamStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/v1/forecast"
+
+
+def poll(client) -> dict:
+    """Eine Runde Abfragen; liefert die Cache-Zähler von /api/weather/all"""
+    weather = client.get('/api/weather/all').get_json()
+    client.get('/api/forecast/stats')
+    return weather['cache']
+
+
+def measure(ttl: int) -> dict:
+    """Kalt-Start und ein Stale-Zyklus; liefert die Anzahl Upstream-Aufrufe pro Phase"""
+    os.environ['OPEN_METEO_URL'] = start_stub()
+    os.environ['WEATHER_CACHE_TTL'] = str(ttl)
+    os.environ['WEATHER_CACHE_URL'] = 'memory://'
+    os.environ['WEATHER_ARCHIVE_PATH'] = os.path.join(tempfile.mkdtemp(), 'weather_archive.db')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import simple_server
+
+    client = simple_server.app.test_client()
+    poll(client)
+    cold = UpstreamStub.calls
+
+    time.sleep(ttl + 0.5)
+    poll(client)
+    # Warten, bis die Hintergrund-Aktualisierung alle Städte wieder frisch gemacht hat
+    deadline = time.monotonic() + REFRESH_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        cache_counts = poll(client)
+        if not cache_counts['stale'] and not cache_counts['miss']:
+            break
+    else:
+        raise RuntimeError("Hintergrund-Aktualisierung nicht rechtzeitig abgeschlossen")
+    return {'cold': cold, 'stale': UpstreamStub.calls - cold}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion mit Argument-Parsing"""
+    parser = argparse.ArgumentParser(description="Zählt Upstream-Aufrufe über Kalt-Start und Stale-Zyklus")
+    parser.add_argument("--ttl", type=int, default=2, help="Cache-TTL in Sekunden für die Messung (Standard: 2)")
+    parser.add_argument("--budget", type=int, default=5,
+                        help="Maximal erlaubte Upstream-Aufrufe pro Phase (Standard: 5)")
+    args = parser.parse_args(argv)
+
+    calls = measure(args.ttl)
+    print(f"🌍 Upstream-Aufrufe | Kalt-Start: {calls['cold']} | Stale-Zyklus: {calls['stale']}")
+    if max(calls.values()) > args.budget:
+        print(f"❌ Mehr als {args.budget} Upstream-Aufrufe in einer Phase")
+        return 1
+    print(f"✅ Innerhalb des Budgets von {args.budget} Upstream-Aufrufen pro Phase")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Speicher-Backends für den Wetter-Cache (weather_cache.TTLCache)
+
+- MemoryStore: Dictionary im Prozess (Standard, ein Worker)
+- SqliteStore: SQLite-Datei (WAL), von allen Worker-Prozessen eines Rechners geteilt;
+  unter Linux standardmäßig in /dev/shm, also im Arbeitsspeicher
+- RedisStore: Redis-Server (optional, Paket "redis"), auch über Rechner hinweg geteilt
+
+Geteilte Backends bieten zusätzlich Lade-Sperren (acquire/release), damit bei mehreren
+Workern nur einer eine Stadt von Open-Meteo lädt und die anderen das Ergebnis übernehmen.
+
+Auswahl über eine URL (WEATHER_CACHE_URL):
+    memory://
+    sqlite:///dev/shm/weltwetter_cache.db
+    redis://localhost:6379/0
+
+Beispiel:
+    store = create_store(os.environ.get("WEATHER_CACHE_URL", "memory://"))
+    cache = TTLCache(loader, store=store)
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Schlüsselpräfix in Redis und Standardpfad der SQLite-Datei
+REDIS_PREFIX = "weltwetter:cache:"
+SHM_DIR = "/dev/shm"
+DEFAULT_SQLITE_NAME = "weltwetter_cache.db"
+
+# Abgelaufene Einträge in SQLite bzw. im Prozess nach so vielen Schreibvorgängen entfernen
+SQLITE_PURGE_EVERY = 500
+MEMORY_PURGE_EVERY = 500
+
+
+@dataclass
+class CacheEntry:
+    """Gespeicherter Wert mit Zeitstempeln (Uhr des Caches; bei geteilten Backends time.time)"""
+    value: Any
+    stored_at: float
+    fresh_until: float
+    stale_until: float
+    valid: bool = True
+    retry_at: float = 0.0  # Nach fehlgeschlagener Aktualisierung erst ab hier erneut versuchen
+
+
+def key_to_str(key: Hashable) -> str:
+    """Cache-Schlüssel für geteilte Backends (Stadtname oder z.B. Gitterzelle als Tupel)"""
+    return key if isinstance(key, str) else repr(key)
+
+
+def encode_entry(entry: CacheEntry) -> str:
+    return json.dumps(asdict(entry))
+
+
+def decode_entry(raw) -> CacheEntry:
+    return CacheEntry(**json.loads(raw))
+
+
+def default_sqlite_path() -> str:
+    base_dir = SHM_DIR if os.path.isdir(SHM_DIR) else tempfile.gettempdir()
+    return os.path.join(base_dir, DEFAULT_SQLITE_NAME)
+
+
+class MemoryStore:
+    """Einträge im Prozess; Sperren sind nicht nötig (TTLCache fasst Misses selbst zusammen)"""
+
+    shared = False
+
+    def __init__(self):
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        with self._lock:
+            return {key: self._entries[key] for key in keys if key in self._entries}
+
+    def set(self, key: Hashable, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._writes += 1
+            if self._writes % MEMORY_PURGE_EVERY == 0:
+                # Beliebige Schlüssel (z.B. Gitterzellen aus Client-Koordinaten) nicht ewig behalten.
+                # stored_at stammt von der Uhr des Caches, also derselben wie stale_until
+                now = entry.stored_at
+                for expired in [k for k, e in self._entries.items() if e.stale_until < now]:
+                    del self._entries[expired]
+
+    def delete(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def acquire(self, key: Hashable, owner: str, ttl: float) -> bool:
+        return True
+
+    def release(self, key: Hashable, owner: str):
+        pass
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def describe(self) -> str:
+        return "memory://"
+
+
+class SqliteStore:
+    """SQLite-Datei als prozessübergreifender Cache (eine Verbindung pro Thread und Prozess)"""
+
+    shared = True
+
+    def __init__(self, path: Optional[str] = None, namespace: str = "weather"):
+        self.path = path or default_sqlite_path()
+        self.namespace = namespace
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, entry TEXT NOT NULL, expires REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # Verbindungen dürfen weder zwischen Threads noch über fork() hinweg geteilt werden
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # Cache: Haltbarkeit unwichtig
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        by_name = {self._name(key): key for key in keys}
+        names = list(by_name)
+        found = {}
+        now = time.time()
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            rows = self._conn().execute(
+                f"SELECT key, entry FROM entries WHERE expires > ? AND key IN ({','.join('?' * len(chunk))})",
+                [now] + chunk
+            ).fetchall()
+            for name, raw in rows:
+                found[by_name[name]] = decode_entry(raw)
+        return found
+
+    def set(self, key: Hashable, entry: CacheEntry):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                     (self._name(key), encode_entry(entry), entry.stale_until))
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+
+    def delete(self, key: Optional[Hashable] = None):
+        if key is None:
+            self._conn().execute("DELETE FROM entries WHERE key LIKE ?", (self.namespace + ":%",))
+        else:
+            self._conn().execute("DELETE FROM entries WHERE key = ?", (self._name(key),))
+
+    def acquire(self, key: Hashable, owner: str, ttl: float) -> bool:
+        """Lade-Sperre setzen; abgelaufene Sperren (abgestürzter Worker) werden übernommen"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires < ?", (self._name(key), now))
+            cursor = conn.execute("INSERT OR IGNORE INTO locks VALUES (?, ?, ?)", (self._name(key), owner, now + ttl))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release(self, key: Hashable, owner: str):
+        self._conn().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (self._name(key), owner))
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM entries WHERE expires > ? AND key LIKE ?",
+                                    (time.time(), self.namespace + ":%")).fetchone()[0]
+
+    def describe(self) -> str:
+        return f"sqlite://{self.path}"
+
+    def _name(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key_to_str(key)}"
+
+
+class RedisStore:
+    """Redis als Cache für mehrere Worker und Rechner (Einträge laufen per PX automatisch ab)"""
+
+    shared = True
+
+    # Sperre nur löschen, wenn sie noch dem Aufrufer gehört
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, url: str, namespace: str = "weather"):
+        if redis is None:
+            raise ImportError("Für redis:// wird das Paket 'redis' benötigt (pip install redis)")
+        self.url = url
+        self.prefix = f"{REDIS_PREFIX}{namespace}:"
+        self.client = redis.Redis.from_url(url)
+        self._release = self.client.register_script(self.RELEASE_SCRIPT)
+
+    def _key(self, key: Hashable) -> str:
+        return self.prefix + key_to_str(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        raw_values = self.client.mget([self._key(key) for key in keys])
+        return {key: decode_entry(raw) for key, raw in zip(keys, raw_values) if raw is not None}
+
+    def set(self, key: Hashable, entry: CacheEntry):
+        ttl_ms = max(1, int((entry.stale_until - time.time()) * 1000))
+        self.client.set(self._key(key), encode_entry(entry), px=ttl_ms)
+
+    def delete(self, key: Optional[Hashable] = None):
+        if key is not None:
+            self.client.delete(self._key(key))
+            return
+        names = list(self.client.scan_iter(match=self.prefix + "*"))
+        if names:
+            self.client.delete(*names)
+
+    def acquire(self, key: Hashable, owner: str, ttl: float) -> bool:
+        return bool(self.client.set(self._key(key) + ":lock", owner, nx=True, px=int(ttl * 1000)))
+
+    def release(self, key: Hashable, owner: str):
+        self._release(keys=[self._key(key) + ":lock"], args=[owner])
+
+    def size(self) -> int:
+        return sum(1 for name in self.client.scan_iter(match=self.prefix + "*") if not name.endswith(b":lock"))
+
+    def describe(self) -> str:
+        return self.url
+
+
+def create_store(url: Optional[str] = None, namespace: str = "weather"):
+    """
+    Backend aus einer URL: memory://, sqlite:///pfad/datei.db (leerer Pfad: Standardpfad), redis://...
+
+    :param namespace: Trennt mehrere Caches im selben geteilten Backend
+
+    :raises ValueError: Bei unbekanntem Schema
+    """
+    if not url or url.startswith("memory://"):
+        return MemoryStore()
+    if url.startswith("sqlite://"):
+        return SqliteStore(url[len("sqlite://"):] or None, namespace)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url, namespace)
+    raise ValueError(f"Unbekanntes Cache-Backend: {url} (memory://, sqlite:///pfad, redis://host:port/db)")
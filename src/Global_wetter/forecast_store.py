@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spaltenorientierter Speicher für die stündlichen Vorhersagen aller Städte (NumPy)
+
+Pro Variable (temperature_2m, relativehumidity_2m, windspeed_10m) eine Matrix
+Stadt × Stunde. Alle Auswertungen laufen vektorisiert über alle Städte gleichzeitig:
+
+- Minimum, Maximum und Mittelwert pro Stadt über die ersten n Stunden
+- Aggregate pro Kontinent (gruppiert über Index-Arrays, ohne Schleife über Städte)
+- Top-N-Städte (z.B. die heißesten oder windigsten)
+
+Spalte j ist die j-te Stunde der Vorhersage in Ortszeit der Stadt (Open-Meteo mit
+timezone=auto beginnt um 00:00 des aktuellen Tages). Fehlende Werte sind NaN.
+
+Beispiel:
+    store = ForecastStore(["Berlin", "Paris"], ["Europa", "Europa"])
+    store.update("Berlin", {"time": [...], "temperature_2m": [...], "fetched_at": 1760000000.0})
+    store.city_stats("temperature_2m", hours=24)     # {"min": array, "max": array, "mean": array}
+    store.top("windspeed_10m", n=5, hours=24)        # [("Wellington", 41.2), ...]
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Gespeicherte Variablen (wie im hourly-Parameter der Open-Meteo-Abfrage)
+VARIABLES = ('temperature_2m', 'relativehumidity_2m', 'windspeed_10m')
+
+# Open-Meteo liefert standardmäßig 7 Tage
+DEFAULT_HOURS = 168
+
+STATS = ('min', 'max', 'mean')
+
+
+class ForecastStore:
+    """Threadsichere Matrizen Stadt × Stunde mit vektorisierten Aggregaten"""
+
+    def __init__(self, cities: Sequence[str], continents: Sequence[str], hours: int = DEFAULT_HOURS):
+        self.cities = list(cities)
+        self.hours = hours
+        self.index = {city: row for row, city in enumerate(self.cities)}
+        # Kontinente als Ganzzahl-Codes für gruppierte Aggregate
+        self.continents, self.continent_codes = np.unique(np.asarray(continents, dtype=object).astype(str),
+                                                          return_inverse=True)
+        self.data = {variable: np.full((len(self.cities), hours), np.nan, dtype=np.float32) for variable in VARIABLES}
+        self.fetched_at = np.zeros(len(self.cities))
+        self.start_times: List[Optional[str]] = [None] * len(self.cities)
+        self._lock = threading.Lock()
+
+    def update(self, city: str, hourly: Dict) -> bool:
+        """
+        Übernimmt die hourly-Daten einer Stadt (nur, wenn sie neuer sind als die gespeicherten).
+
+        :returns: True, wenn die Zeile geändert wurde
+        """
+        row = self.index.get(city)
+        if row is None or not hourly:
+            return False
+        fetched_at = hourly.get('fetched_at', 0.0)
+        with self._lock:
+            if fetched_at and fetched_at <= self.fetched_at[row]:
+                return False
+            for variable in VARIABLES:
+                values = np.asarray(hourly.get(variable) or [], dtype=np.float32)[:self.hours]
+                self.data[variable][row, :len(values)] = values
+                self.data[variable][row, len(values):] = np.nan
+            self.fetched_at[row] = fetched_at
+            times = hourly.get('time') or [None]
+            self.start_times[row] = times[0]
+        return True
+
+    def filled(self) -> np.ndarray:
+        """Bool-Array: für welche Städte liegen Daten vor"""
+        return self.fetched_at > 0
+
+    def _window(self, variable: str, hours: Optional[int]) -> np.ndarray:
+        if variable not in self.data:
+            raise ValueError(f"Unbekannte Variable: {variable} (erlaubt: {', '.join(VARIABLES)})")
+        hours = self.hours if hours is None else hours
+        if not 1 <= hours <= self.hours:
+            raise ValueError(f"hours muss zwischen 1 und {self.hours} liegen")
+        with self._lock:
+            return self.data[variable][:, :hours].copy()
+
+    def city_stats(self, variable: str, hours: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Minimum, Maximum, Mittelwert und Anzahl Werte pro Stadt (Arrays in Stadt-Reihenfolge)"""
+        window = self._window(variable, hours)
+        valid = ~np.isnan(window)
+        counts = valid.sum(axis=1)
+        sums = np.where(valid, window, 0).sum(axis=1, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        return {
+            # fmin/fmax ignorieren NaN und liefern NaN nur für Städte ganz ohne Werte
+            'min': np.fmin.reduce(window, axis=1),
+            'max': np.fmax.reduce(window, axis=1),
+            'mean': means,
+            'count': counts,
+            'sum': sums
+        }
+
+    def continent_stats(self, variable: str, hours: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """Minimum, Maximum und Mittelwert (über alle Stundenwerte) pro Kontinent"""
+        stats = self.city_stats(variable, hours)
+        groups = len(self.continents)
+        group_min = np.full(groups, np.nan)
+        group_max = np.full(groups, np.nan)
+        np.fmin.at(group_min, self.continent_codes, stats['min'])
+        np.fmax.at(group_max, self.continent_codes, stats['max'])
+        group_sum = np.bincount(self.continent_codes, weights=stats['sum'], minlength=groups)
+        group_count = np.bincount(self.continent_codes, weights=stats['count'], minlength=groups)
+        cities_with_data = np.bincount(self.continent_codes, weights=stats['count'] > 0, minlength=groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            group_mean = np.where(group_count > 0, group_sum / group_count, np.nan)
+        return {
+            str(continent): {
+                'min': to_float(group_min[i]),
+                'max': to_float(group_max[i]),
+                'mean': to_float(group_mean[i]),
+                'cities': int(cities_with_data[i])
+            }
+            for i, continent in enumerate(self.continents)
+        }
+
+    def top(self, variable: str, n: int = 10, hours: Optional[int] = None, stat: str = 'max',
+            ascending: bool = False) -> List[Tuple[str, float]]:
+        """Die n Städte mit dem höchsten (bzw. bei ascending niedrigsten) Wert der Kennzahl"""
+        if stat not in STATS:
+            raise ValueError(f"Unbekannte Kennzahl: {stat} (erlaubt: {', '.join(STATS)})")
+        values = self.city_stats(variable, hours)[stat]
+        present = ~np.isnan(values)
+        candidates = np.flatnonzero(present)
+        order = np.argsort(values[candidates] if ascending else -values[candidates], kind='stable')[:n]
+        return [(self.cities[i], to_float(values[i])) for i in candidates[order]]
+
+
+def to_float(value) -> Optional[float]:
+    """NumPy-Wert -> gerundeter float für JSON (NaN -> None)"""
+    return None if np.isnan(value) else round(float(value), 1)
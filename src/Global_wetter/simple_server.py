@@ -16,19 +16,28 @@ Changelog:
 - [2025-10-09] Erweiterte Fehlerbehandlung und Logging
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS, cross_origin
+from a2wsgi import WSGIMiddleware
+import argparse
 import webbrowser
 import time
 import os
 import csv
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import logging
 from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+from cache_store import create_store
+from forecast_store import DEFAULT_HOURS, STATS, VARIABLES, ForecastStore, to_float
+from spatial_index import CityIndex, snap_to_grid
+from static_assets import AssetCache, asset_response, compress_response
+from upstream_client import get_client
+from weather_cache import DEFAULT_BATCH_SIZE, DEFAULT_STALE_TTL, DEFAULT_TTL, TTLCache
+from weather_archive import RESOLUTIONS, Snapshotter, WeatherArchive, format_timestamp, parse_timestamp
+from weather_delta import DeltaTracker, parse_fields, project
+
 # Logging konfigurieren
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +53,55 @@ CORS(app)  # CORS aktivieren
 _city_coords_cache: Dict = {}
 _cache_loaded: bool = False
 
+# Open-Meteo Endpoint (per Umgebungsvariable z.B. auf einen lokalen Mock umstellbar)
+OPEN_METEO_URL = os.environ.get('OPEN_METEO_URL', 'https://api.open-meteo.com/v1/forecast')
+
+# Wetter-Cache: frisch für WEATHER_CACHE_TTL Sekunden, danach noch WEATHER_CACHE_STALE Sekunden
+# ausgeliefert, während im Hintergrund aktualisiert wird
+WEATHER_CACHE_TTL = int(os.environ.get('WEATHER_CACHE_TTL', DEFAULT_TTL))
+WEATHER_CACHE_STALE = int(os.environ.get('WEATHER_CACHE_STALE', DEFAULT_STALE_TTL))
+
+# Speicher des Wetter-Caches: memory:// (Standard), sqlite:///pfad oder redis://host:port/db.
+# Im Produktionsmodus mit mehreren Workern wird ohne Angabe eine SQLite-Datei in /dev/shm geteilt.
+WEATHER_CACHE_URL = os.environ.get('WEATHER_CACHE_URL', 'memory://')
+
+# Produktionsmodus: Standard-Adresse und Anzahl Worker-Prozesse
+PROD_HOST = '0.0.0.0'
+PROD_PORT = 5000
+PROD_WORKERS = int(os.environ.get('WELTWETTER_WORKERS', os.cpu_count() or 2))
+PROD_THREADS = int(os.environ.get('WELTWETTER_THREADS', 32))
+
+# Open-Meteo akzeptiert kommagetrennte Koordinatenlisten: Städte pro Multi-Location-Request
+# (156 Städte -> 4 Requests) und Timeout für einen solchen Request
+WEATHER_BATCH_SIZE = int(os.environ.get('WEATHER_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+WEATHER_BATCH_TIMEOUT = 10
+
+# HTML/CSS einmal laden und komprimiert im Speicher halten; im Entwicklungsmodus
+# (WELTWETTER_DEV=1) werden geänderte Dateien automatisch neu geladen
+DEV_MODE = os.environ.get('WELTWETTER_DEV', '').lower() in ('1', 'true', 'yes')
+static_assets = AssetCache(os.path.dirname(os.path.abspath(__file__)), watch=DEV_MODE)
+
+# Räumliche Abfragen: Gittergröße für Punkt-Wetter (0.1° ≈ 11 km, etwa die Modellauflösung;
+# alle Abfragen in derselben Zelle teilen sich einen Upstream-Aufruf) und maximales k
+WEATHER_GRID_DEG = float(os.environ.get('WEATHER_GRID_DEG', 0.1))
+MAX_NEAREST = 20
+
+# Wetter-Archiv: SQLite-Datei und Abstand der Snapshots in Sekunden (0 = kein Archiv).
+# Standard ist die Cache-Lebensdauer, häufigere Snapshots würden nur dieselben Werte speichern.
+WEATHER_ARCHIVE_PATH = os.environ.get(
+    'WEATHER_ARCHIVE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_archive.db'))
+WEATHER_ARCHIVE_INTERVAL = int(os.environ.get('WEATHER_ARCHIVE_INTERVAL', WEATHER_CACHE_TTL))
+
+# Standard-Zeitraum für /api/history/<city> ohne from= (Sekunden)
+HISTORY_DEFAULT_RANGE = 24 * 3600
+
+# Abfrageparameter für alle Wetter-Requests (Koordinaten kommen pro Aufruf hinzu)
+WEATHER_PARAMS = {
+    'current_weather': True,
+    'timezone': 'auto',
+    'hourly': 'temperature_2m,relativehumidity_2m,windspeed_10m'
+}
+
 # === UTILITY FUNCTIONS ===
 
 @lru_cache(maxsize=1)
@@ -142,51 +200,38 @@ def get_weather_description(weather_code: int) -> str:
 @app.route('/')
 def index():
     """Zeigt die HTML-Weltkugel an"""
-    # HTML-Datei im selben Verzeichnis suchen
-    html_path = os.path.join(os.path.dirname(__file__), 'weltwetter.html')
-    
-    try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
+    # HTML-Datei im selben Verzeichnis (aus dem Asset-Cache)
+    asset = static_assets.get('weltwetter.html')
+    if asset is None:
         return """
         <h1>❌ weltwetter.html nicht gefunden</h1>
         <p>Bitte stellen Sie sicher, dass weltwetter.html im selben Verzeichnis liegt.</p>
         """
+    return asset_response(asset, request)
 
 @app.route('/test_globe.html')
 def test_globe():
     """Test-Seite für 3D-Debugging"""
-    html_path = os.path.join(os.path.dirname(__file__), 'test_globe.html')
-    
-    try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
+    asset = static_assets.get('test_globe.html')
+    if asset is None:
         return "<h1>❌ test_globe.html nicht gefunden</h1>"
+    return asset_response(asset, request)
 
 @app.route('/einfach')
 def einfach():
     """Einfache CSS-Version ohne Three.js"""
-    html_path = os.path.join(os.path.dirname(__file__), 'weltwetter_einfach.html')
-    
-    try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
+    asset = static_assets.get('weltwetter_einfach.html')
+    if asset is None:
         return "<h1>❌ weltwetter_einfach.html nicht gefunden</h1>"
+    return asset_response(asset, request)
 
 @app.route('/weltwetter.css')
 def serve_css():
     """CSS-Datei für das Wetter-Interface servieren"""
-    css_path = os.path.join(os.path.dirname(__file__), 'weltwetter.css')
-    
-    try:
-        with open(css_path, 'r', encoding='utf-8') as f:
-            from flask import Response
-            return Response(f.read(), mimetype='text/css')
-    except FileNotFoundError:
+    asset = static_assets.get('weltwetter.css')
+    if asset is None:
         return "/* CSS-Datei nicht gefunden */", 404
+    return asset_response(asset, request)
 
 @app.route('/api/weather/<city>')
 def get_weather(city: str):
@@ -214,12 +259,12 @@ def get_weather(city: str):
             "status": "error"
         }), 404
     
-    coords = city_coords[city]
-    
     try:
-        # Open-Meteo API aufrufen
-        weather_data = fetch_city_weather_data(city, coords)
-        return jsonify(weather_data)
+        # Aus dem Cache; Open-Meteo wird nur bei Miss oder (im Hintergrund) bei veralteten Daten gefragt
+        weather_data, cache_status = weather_cache.get(city)
+        response = jsonify(weather_data)
+        response.headers['X-Cache'] = cache_status.upper()
+        return response
         
     except Exception as e:
         logger.error(f"❌ Serverfehler für {city}: {str(e)}")
@@ -228,62 +273,43 @@ def get_weather(city: str):
             "status": "error"
         }), 500
 
+def build_weather_result(city_name, coords, data, keep_hourly=False):
+    """
+    Wandelt eine Open-Meteo-Antwort (eine Location) in das Ergebnis-Format des Servers um.
+    
+    :param keep_hourly: Stündliche Vorhersage unter "_hourly" anhängen (siehe split_hourly)
+    """
+    current = data['current_weather']
+    result = {
+        "city": city_name,
+        "country": coords['country'],
+        "temperature": round(current['temperature'], 1),
+        "description": get_weather_description(current['weathercode']),
+        "windspeed": current['windspeed'],
+        "winddirection": current['winddirection'],
+        "is_day": current['is_day'] == 1,
+        "coordinates": {
+            "lat": coords['lat'],
+            "lon": coords['lon']
+        },
+        "abrufzeit": datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
+        "status": "success"
+    }
+    if keep_hourly and data.get('hourly'):
+        result["_hourly"] = dict(data['hourly'], fetched_at=time.time())
+    return result
+
 # Hilfsfunktion für parallele API-Aufrufe
-def fetch_city_weather_data(city_name, coords):
+def fetch_city_weather_data(city_name, coords, keep_hourly=False):
     """Lädt Wetterdaten für eine einzelne Stadt - threadsafe"""
     try:
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            'latitude': coords['lat'],
-            'longitude': coords['lon'],
-            'current_weather': True,
-            'timezone': 'auto',
-            'hourly': 'temperature_2m,relativehumidity_2m,windspeed_10m'
-        }
-        
-        # Schnellerer Timeout für bessere Performance
-        response = requests.get(url, params=params, timeout=2)
+        params = dict(WEATHER_PARAMS, latitude=coords['lat'], longitude=coords['lon'])
         
-        if response.ok:
-            data = response.json()
-            current = data['current_weather']
-            
-            # Wetter-Code in deutschen Text umwandeln
-            weather_descriptions = {
-                0: "Klar", 1: "Überwiegend klar", 2: "Teilweise bewölkt", 3: "Bedeckt",
-                45: "Nebel", 48: "Eisnebel",
-                51: "Leichter Nieselregen", 53: "Nieselregen", 55: "Starker Nieselregen",
-                61: "Leichter Regen", 63: "Regen", 65: "Starker Regen",
-                71: "Leichter Schnee", 73: "Schnee", 75: "Starker Schnee",
-                80: "Regenschauer", 81: "Starke Regenschauer", 82: "Heftige Regenschauer",
-                95: "Gewitter", 96: "Gewitter mit Hagel", 99: "Starkes Gewitter"
-            }
-            
-            description = weather_descriptions.get(current['weathercode'], f"Code {current['weathercode']}")
-            
-            from datetime import datetime
-            abrufzeit = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-            
-            return {
-                "city": city_name,
-                "country": coords['country'],
-                "temperature": round(current['temperature'], 1),
-                "description": description,
-                "windspeed": current['windspeed'],
-                "winddirection": current['winddirection'],
-                "is_day": current['is_day'] == 1,
-                "coordinates": {
-                    "lat": coords['lat'],
-                    "lon": coords['lon']
-                },
-                "abrufzeit": abrufzeit,
-                "status": "success"
-            }
-        else:
-            raise Exception(f"API Error: {response.status_code}")
+        # Schnellerer Timeout für bessere Performance; Verbindung aus dem gemeinsamen Keep-Alive-Pool
+        data = get_client().get_json(OPEN_METEO_URL, params, timeout=2)
+        return build_weather_result(city_name, coords, data, keep_hourly)
             
     except Exception as e:
-        from datetime import datetime
         return {
             "city": city_name,
             "country": coords['country'],
@@ -298,11 +324,257 @@ def fetch_city_weather_data(city_name, coords):
             "error": str(e)
         }
 
+def fetch_weather_batch(cities: Dict[str, Dict], keep_hourly: bool = False) -> Dict[str, Dict]:
+    """
+    Lädt Wetterdaten für mehrere Städte mit einem Multi-Location-Request.
+    
+    Open-Meteo liefert bei kommagetrennten Koordinaten eine Liste mit einem Eintrag pro
+    Location in derselben Reihenfolge (bei nur einer Location ein einzelnes Objekt).
+    
+    :param cities: Stadtname -> Koordinaten (lat, lon, country)
+    :returns: Stadtname -> Wetterdaten
+    :raises UpstreamError: Bei HTTP-Fehlern (der Aufrufer lädt dann einzeln)
+    :raises Exception: Bei Verbindungsfehlern oder unpassender Antwort
+    """
+    names = list(cities)
+    params = dict(
+        WEATHER_PARAMS,
+        latitude=','.join(str(cities[name]['lat']) for name in names),
+        longitude=','.join(str(cities[name]['lon']) for name in names)
+    )
+    data = get_client().get_json(OPEN_METEO_URL, params, timeout=WEATHER_BATCH_TIMEOUT)
+    locations = data if isinstance(data, list) else [data]
+    if len(locations) != len(names):
+        raise Exception(f"{len(locations)} Ergebnisse für {len(names)} Städte erhalten")
+    
+    results = {}
+    for name, location in zip(names, locations):
+        try:
+            results[name] = build_weather_result(name, cities[name], location, keep_hourly)
+        except (KeyError, TypeError) as e:
+            # Unvollständige Location: diese Stadt wird einzeln nachgeladen
+            logger.warning(f"⚠️ Unvollständige Daten für {name} im Batch: {e}")
+    return results
+
+def split_hourly(city_name, result):
+    """Trennt die stündliche Vorhersage vom Ergebnis und legt sie im Vorhersage-Cache ab"""
+    hourly = result.pop('_hourly', None)
+    if hourly:
+        hourly_cache.put(city_name, hourly)
+    return hourly or {}
+
+def load_city_weather(city_name):
+    """Loader für den Wetter-Cache: Stadtname -> Wetterdaten"""
+    result = fetch_city_weather_data(city_name, load_city_coordinates()[city_name], keep_hourly=True)
+    split_hourly(city_name, result)
+    return result
+
+def load_city_weather_batch(city_names):
+    """Batch-Loader für den Wetter-Cache: Liste von Stadtnamen -> {Stadtname: Wetterdaten}"""
+    city_coords = load_city_coordinates()
+    results = fetch_weather_batch({name: city_coords[name] for name in city_names}, keep_hourly=True)
+    for name, result in results.items():
+        split_hourly(name, result)
+    return results
+
+def load_city_hourly(city_name):
+    """Loader für den Vorhersage-Cache (aktuelles Wetter landet dabei im Wetter-Cache)"""
+    result = fetch_city_weather_data(city_name, load_city_coordinates()[city_name], keep_hourly=True)
+    hourly = result.pop('_hourly', {})
+    weather_cache.put(city_name, result)
+    return hourly
+
+def load_city_hourly_batch(city_names):
+    """
+    Batch-Loader für den Vorhersage-Cache: Liste von Stadtnamen -> {Stadtname: hourly}.
+    
+    Lädt über den Wetter-Cache, dessen Loader die Vorhersagen im Vorhersage-Cache ablegen.
+    Beide kommen aus denselben Upstream-Antworten; eine laufende (Hintergrund-)Aktualisierung
+    des Wetter-Caches wird so mitgenutzt statt ein zweites Mal abgefragt.
+    """
+    weather_cache.load_many(city_names)
+    now = hourly_cache.clock()
+    entries = hourly_cache.store.get_many(list(city_names))
+    return {name: entry.value for name, entry in entries.items() if entry.valid and now < entry.fresh_until}
+
+# Ein Cache für alle Routen; nur erfolgreiche Abrufe gelten als gültig (Fallbacks nur kurz gemerkt).
+# Abgelaufene Städte werden wie Misses gebündelt über Multi-Location-Requests aktualisiert
+weather_cache = TTLCache(
+    load_city_weather,
+    ttl=WEATHER_CACHE_TTL,
+    stale_ttl=WEATHER_CACHE_STALE,
+    is_valid=lambda data: data.get('status') == 'success',
+    store=create_store(WEATHER_CACHE_URL, namespace='weather'),
+    batch_loader=load_city_weather_batch,
+    batch_size=WEATHER_BATCH_SIZE
+)
+
+# Stündliche Vorhersagen pro Stadt (im selben Speicher wie der Wetter-Cache, also auch
+# zwischen Workern geteilt); werden bei jedem Wetterabruf mitgeliefert
+hourly_cache = TTLCache(
+    load_city_hourly,
+    ttl=WEATHER_CACHE_TTL,
+    stale_ttl=WEATHER_CACHE_STALE,
+    is_valid=lambda hourly: bool(hourly.get('time')),
+    store=create_store(WEATHER_CACHE_URL, namespace='hourly'),
+    batch_loader=load_city_hourly_batch,
+    batch_size=WEATHER_BATCH_SIZE
+)
+
+def load_point_weather(cell):
+    """Loader für den Punkt-Cache: Gitterzelle (lat, lon) -> Wetterdaten am Zellmittelpunkt"""
+    lat, lon = cell
+    return fetch_city_weather_data(f"{lat}, {lon}", {'lat': lat, 'lon': lon, 'country': None})
+
+# Wetter an beliebigen Koordinaten, Schlüssel ist die eingerastete Gitterzelle
+point_cache = TTLCache(
+    load_point_weather,
+    ttl=WEATHER_CACHE_TTL,
+    stale_ttl=WEATHER_CACHE_STALE,
+    is_valid=lambda data: data.get('status') == 'success',
+    store=create_store(WEATHER_CACHE_URL, namespace='point')
+)
+
+# Räumlicher Index über alle Städte, einmal beim Start aufgebaut
+city_index = CityIndex.from_coords(load_city_coordinates())
+
+# Matrizen Stadt × Stunde für die Vorhersage-Auswertungen
+forecast_store = ForecastStore(
+    list(load_city_coordinates()),
+    [coords.get('continent', '') for coords in load_city_coordinates().values()]
+)
+
+# Voreinstellungen für /api/forecast/top?by=...: (Variable, Kennzahl, aufsteigend)
+TOP_PRESETS = {
+    'hottest': ('temperature_2m', 'max', False),
+    'coldest': ('temperature_2m', 'min', True),
+    'windiest': ('windspeed_10m', 'max', False),
+    'humid': ('relativehumidity_2m', 'mean', False)
+}
+MAX_TOP = 50
+
+def collect_weather_snapshot():
+    """Aktuelle Werte aller Städte für das Archiv (aus dem Wetter-Cache, fehlende werden geladen)"""
+    cached = weather_cache.get_many(load_city_coordinates())
+    return {city: data for city, (data, _) in cached.items() if data.get('status') == 'success'}
+
+# Historische Werte aller Städte; mehrere Worker schreiben dieselben ausgerichteten Zeitpunkte
+weather_archive = WeatherArchive(WEATHER_ARCHIVE_PATH)
+archive_snapshotter = Snapshotter(weather_archive, collect_weather_snapshot, WEATHER_ARCHIVE_INTERVAL)
+
+def parse_coordinate_args(*names_and_limits):
+    """
+    Liest Float-Parameter aus der Query und prüft ihren Wertebereich.
+    
+    :param names_and_limits: (Name, Minimum, Maximum) je Parameter
+    :returns: Liste der Werte in derselben Reihenfolge
+    :raises ValueError: Wenn ein Parameter fehlt, keine Zahl ist oder außerhalb des Bereichs liegt
+    """
+    values = []
+    for name, low, high in names_and_limits:
+        raw = request.args.get(name)
+        if raw is None:
+            raise ValueError(f"Parameter '{name}' fehlt")
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ValueError(f"Parameter '{name}' ist keine Zahl: {raw}")
+        if not (low <= value <= high) or value != value:
+            raise ValueError(f"Parameter '{name}' muss zwischen {low} und {high} liegen")
+        values.append(value)
+    return values
+
+@app.route('/api/weather/nearest')
+def get_nearest_weather():
+    """
+    Wetter der k nächsten Städte zu beliebigen Koordinaten ("Wetter hier").
+    
+    Query-Parameter: lat, lon, k (Standard 1, max. MAX_NEAREST), point=1 für zusätzlich das
+    Wetter am Punkt selbst (über die Gitterzelle gecacht).
+    
+    Beispiel:
+        GET /api/weather/nearest?lat=52.4&lon=13.1&k=3
+        Returns: {"cities": [{"city": "Berlin", "distance_km": 24.6, ...}, ...], ...}
+    """
+    try:
+        lat, lon = parse_coordinate_args(('lat', -90, 90), ('lon', -180, 180))
+        raw_k = request.args.get('k', '1')
+        try:
+            k = int(raw_k)
+        except ValueError:
+            raise ValueError(f"Parameter 'k' ist keine ganze Zahl: {raw_k}")
+        if not 1 <= k <= MAX_NEAREST:
+            raise ValueError(f"Parameter 'k' muss zwischen 1 und {MAX_NEAREST} liegen")
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    
+    matches = city_index.nearest(lat, lon, k)
+    cached = weather_cache.get_many([name for name, _ in matches])
+    cities = []
+    for name, distance in matches:
+        weather_data = cached[name][0] if name in cached else {"error": "Keine Daten", "status": "error", "city": name}
+        cities.append(dict(weather_data, distance_km=distance))
+    
+    result = {
+        "query": {"lat": lat, "lon": lon, "k": k},
+        "cities": cities,
+        "status": "success"
+    }
+    if request.args.get('point') in ('1', 'true'):
+        cell = snap_to_grid(lat, lon, WEATHER_GRID_DEG)
+        point_data, cache_status = point_cache.get(cell)
+        result["point"] = dict(point_data, grid_cell={"lat": cell[0], "lon": cell[1]}, cache=cache_status)
+    return jsonify(result)
+
+@app.route('/api/cities/bbox')
+def get_cities_in_bbox():
+    """
+    Städte innerhalb einer Bounding-Box (west > east: Box über die Datumsgrenze).
+    
+    Beispiel:
+        GET /api/cities/bbox?south=45&west=5&north=55&east=15
+    """
+    try:
+        south, west, north, east = parse_coordinate_args(
+            ('south', -90, 90), ('west', -180, 180), ('north', -90, 90), ('east', -180, 180))
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    
+    city_coords = load_city_coordinates()
+    names = city_index.within_bbox(south, west, north, east)
+    return jsonify({
+        "bbox": {"south": south, "west": west, "north": north, "east": east},
+        "cities": {name: city_coords[name] for name in names},
+        "total": len(names),
+        "status": "success"
+    })
+
+# Versionszähler für Delta-Antworten von /api/weather/all; liegt im selben Speicher wie der
+# Wetter-Cache, damit alle Worker dieselben Versionen vergeben
+weather_versions = DeltaTracker(store=create_store(WEATHER_CACHE_URL, namespace='versions'))
+
 # TURBO: API für alle Städte parallel - CSV-optimiert
 @app.route('/api/weather/all')
 @cross_origin()
 def get_all_weather_fast():
-    """Gibt Wetterdaten für alle Städte zurück - PARALLEL und SCHNELL mit CSV-Daten!"""
+    """
+    Gibt Wetterdaten für alle Städte zurück - PARALLEL und SCHNELL mit CSV-Daten!
+    
+    Kompakter Modus für regelmäßige Abfragen (ohne city_coords und Textfelder):
+    - fields=temperature,description: nur diese Felder pro Stadt
+    - since=<version>: nur Städte, die sich seit dieser Version geändert haben
+      (bei unbekannter Version vollständig, erkennbar an "full": true)
+    
+    Beispiel:
+        GET /api/weather/all?fields=temperature,is_day&since=3f2a9c1b-12
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    since = request.args.get('since')
+    compact = fields is not None or since is not None
+    
     start_time = time.time()
     city_coords = load_city_coordinates()
     
@@ -492,42 +764,274 @@ def get_all_weather_fast():
     
     start_time = time.time()
     weather_data = {}
+    cache_counts = {'hit': 0, 'stale': 0, 'miss': 0}
     
-    # PARALLEL: Alle API-Calls gleichzeitig mit ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        # Alle Future-Tasks starten
-        future_to_city = {
-            executor.submit(fetch_city_weather_data, city, coords): city 
-            for city, coords in city_coords.items()
-        }
-        
-        # Ergebnisse sammeln, sobald sie fertig sind
-        for future in as_completed(future_to_city):
-            city = future_to_city[future]
-            try:
-                result = future.result()
-                weather_data[city] = result
-            except Exception as exc:
-                print(f'⚠️ {city} generierte Exception: {exc}')
-                weather_data[city] = {
-                    "error": str(exc), 
-                    "status": "error",
-                    "city": city
-                }
+    # Aus dem Cache; fehlende Städte werden in wenigen Multi-Location-Requests nachgeladen
+    # (schlägt ein Batch fehl, werden dessen Städte einzeln abgefragt)
+    cached = weather_cache.get_many(city_coords)
+    for city in city_coords:
+        if city not in cached:
+            weather_data[city] = {"error": "Keine Daten", "status": "error", "city": city}
+            continue
+        weather_data[city], cache_status = cached[city]
+        cache_counts[cache_status] += 1
+    
+    version, changed = weather_versions.update(weather_data, since)
     
     end_time = time.time()
     duration = round(end_time - start_time, 2)
     
-    from datetime import datetime
-    return jsonify({
+    if compact:
+        cities = weather_data if changed is None else {city: weather_data[city] for city in changed}
+        response = jsonify({
+            "cities": {city: project(data, fields) for city, data in cities.items()},
+            "version": version,
+            "full": changed is None,
+            "anzahl_staedte": len(weather_data),
+            "geaendert": len(cities),
+            "cache": cache_counts,
+            "status": "success"
+        })
+        return compress_response(response, request)
+    
+    response = jsonify({
         "cities": weather_data,
         "city_coords": city_coords,  # Koordinaten hinzufügen
         "abrufzeit": datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
         "anzahl_staedte": len(weather_data),
         "dauer_sekunden": duration,
         "performance": f"⚡ {len(weather_data)} Städte in {duration}s geladen",
+        "cache": cache_counts,
+        "version": version,
+        "status": "success"
+    })
+    return compress_response(response, request)
+
+def sse_event(event, payload):
+    """Formatiert ein Server-Sent Event (JSON in einer data-Zeile)"""
+    return f"event: {event}\ndata: {app.json.dumps(payload)}\n\n"
+
+@app.route('/api/weather/stream')
+def stream_all_weather():
+    """
+    Wetterdaten aller Städte als Server-Sent Events, damit die Weltkugel schrittweise zeichnen kann.
+    
+    - event "city": ein Stadt-Eintrag, aus dem Cache sofort, sonst sobald sein Abruf fertig ist
+    - event "summary": zum Schluss Zähler, Dauer und Version (wie /api/weather/all)
+    
+    fields= beschränkt die Felder pro Stadt. Der Client sollte die Verbindung nach "summary"
+    schließen, sonst verbindet sich EventSource automatisch neu.
+    
+    Beispiel (JavaScript):
+        const source = new EventSource('/api/weather/stream?fields=temperature,is_day');
+        source.addEventListener('city', e => paint(JSON.parse(e.data)));
+        source.addEventListener('summary', () => source.close());
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    city_coords = load_city_coordinates()
+    
+    def generate():
+        start_time = time.time()
+        weather_data = {}
+        cache_counts = {'hit': 0, 'stale': 0, 'miss': 0}
+        # Abstand für automatische Neuverbindungen, falls der Client nach "summary" nicht schließt
+        yield "retry: 60000\n\n"
+        for city, data, cache_status in weather_cache.iter_many(city_coords):
+            weather_data[city] = data
+            cache_counts[cache_status] += 1
+            yield sse_event('city', dict(project(data, fields), city=city))
+        for city in city_coords:
+            if city not in weather_data:
+                weather_data[city] = {"error": "Keine Daten", "status": "error", "city": city}
+                yield sse_event('city', dict(project(weather_data[city], fields), city=city))
+        version, _ = weather_versions.update(weather_data)
+        duration = round(time.time() - start_time, 2)
+        yield sse_event('summary', {
+            "anzahl_staedte": len(weather_data),
+            "dauer_sekunden": duration,
+            "cache": cache_counts,
+            "version": version,
+            "abrufzeit": datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
+            "status": "success"
+        })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def sync_forecasts():
+    """
+    Bringt den Vorhersage-Speicher auf den Stand des Vorhersage-Caches; fehlende Städte
+    werden in Multi-Location-Requests nachgeladen.
+    
+    :returns: Cache-Zähler {'hit', 'stale', 'miss'}
+    """
+    cache_counts = {'hit': 0, 'stale': 0, 'miss': 0}
+    for city, hourly, cache_status in hourly_cache.iter_many(forecast_store.cities):
+        forecast_store.update(city, hourly)
+        cache_counts[cache_status] += 1
+    return cache_counts
+
+def parse_forecast_args():
+    """
+    Liest variable= und hours= einer Vorhersage-Abfrage.
+    
+    :returns: (Variable, Stunden)
+    :raises ValueError: Bei unbekannter Variable oder ungültiger Stundenzahl
+    """
+    variable = request.args.get('variable', 'temperature_2m')
+    if variable not in VARIABLES:
+        raise ValueError(f"Unbekannte Variable: {variable} (erlaubt: {', '.join(VARIABLES)})")
+    try:
+        hours = int(request.args.get('hours', 24))
+    except ValueError:
+        raise ValueError("hours muss eine ganze Zahl sein")
+    if not 1 <= hours <= DEFAULT_HOURS:
+        raise ValueError(f"hours muss zwischen 1 und {DEFAULT_HOURS} liegen")
+    return variable, hours
+
+@app.route('/api/forecast/stats')
+def get_forecast_stats():
+    """
+    Minimum, Maximum und Mittelwert der stündlichen Vorhersage pro Stadt.
+    
+    Parameter: variable (temperature_2m, relativehumidity_2m, windspeed_10m), hours (1-168,
+    Standard 24), city (optional, nur diese Stadt)
+    
+    Beispiel:
+        GET /api/forecast/stats?variable=windspeed_10m&hours=48&city=Berlin
+    """
+    try:
+        variable, hours = parse_forecast_args()
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    city = request.args.get('city')
+    if city and city not in forecast_store.index:
+        return jsonify({"error": f"Stadt {city} nicht gefunden", "status": "error"}), 404
+    
+    cache_counts = sync_forecasts()
+    stats = forecast_store.city_stats(variable, hours)
+    rows = [forecast_store.index[city]] if city else range(len(forecast_store.cities))
+    response = jsonify({
+        "variable": variable,
+        "hours": hours,
+        "cities": {
+            forecast_store.cities[row]: {stat: to_float(stats[stat][row]) for stat in STATS}
+            for row in rows
+        },
+        "cache": cache_counts,
         "status": "success"
     })
+    return compress_response(response, request)
+
+@app.route('/api/forecast/continents')
+def get_forecast_continents():
+    """
+    Minimum, Maximum und Mittelwert der stündlichen Vorhersage pro Kontinent.
+    
+    Beispiel:
+        GET /api/forecast/continents?variable=temperature_2m&hours=24
+    """
+    try:
+        variable, hours = parse_forecast_args()
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    cache_counts = sync_forecasts()
+    return jsonify({
+        "variable": variable,
+        "hours": hours,
+        "continents": forecast_store.continent_stats(variable, hours),
+        "cache": cache_counts,
+        "status": "success"
+    })
+
+@app.route('/api/forecast/top')
+def get_forecast_top():
+    """
+    Die n Städte mit dem höchsten (oder niedrigsten) Wert, z.B. die heißesten oder windigsten.
+    
+    Parameter: by (hottest, coldest, windiest, humid) oder variable + stat (min, max, mean)
+    + order (desc, asc); dazu n (1-50, Standard 10) und hours
+    
+    Beispiel:
+        GET /api/forecast/top?by=windiest&n=5&hours=48
+        GET /api/forecast/top?variable=temperature_2m&stat=mean&order=asc
+    """
+    try:
+        variable, hours = parse_forecast_args()
+        stat = request.args.get('stat', 'max')
+        ascending = request.args.get('order', 'desc') == 'asc'
+        preset = request.args.get('by')
+        if preset:
+            if preset not in TOP_PRESETS:
+                raise ValueError(f"Unbekannte Auswahl: {preset} (erlaubt: {', '.join(TOP_PRESETS)})")
+            variable, stat, ascending = TOP_PRESETS[preset]
+        if stat not in STATS:
+            raise ValueError(f"Unbekannte Kennzahl: {stat} (erlaubt: {', '.join(STATS)})")
+        n = min(max(int(request.args.get('n', 10)), 1), MAX_TOP)
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    
+    cache_counts = sync_forecasts()
+    top = forecast_store.top(variable, n=n, hours=hours, stat=stat, ascending=ascending)
+    city_coords = load_city_coordinates()
+    return jsonify({
+        "variable": variable,
+        "stat": stat,
+        "hours": hours,
+        "order": "asc" if ascending else "desc",
+        "cities": [
+            {"city": city, "value": value, "country": city_coords[city].get('country'),
+             "continent": city_coords[city].get('continent')}
+            for city, value in top
+        ],
+        "cache": cache_counts,
+        "status": "success"
+    })
+
+@app.route('/api/history/<city>')
+def get_weather_history(city):
+    """
+    Historische Werte einer Stadt aus dem Wetter-Archiv.
+    
+    Parameter: from, to (Unix-Sekunden oder ISO 8601, UTC; Standard: die letzten 24 Stunden),
+    resolution (auto, raw, hourly, daily). Bei auto wird die feinste Auflösung gewählt,
+    die für den ganzen Zeitraum noch vorliegt.
+    
+    Beispiel:
+        GET /api/history/Berlin?from=2025-10-01&to=2025-10-08&resolution=daily
+    """
+    if city not in load_city_coordinates():
+        return jsonify({"error": f"Stadt {city} nicht gefunden", "status": "error"}), 404
+    try:
+        end = parse_timestamp(request.args.get('to'), default=time.time())
+        start = parse_timestamp(request.args.get('from'), default=end - HISTORY_DEFAULT_RANGE)
+        resolution = request.args.get('resolution', 'auto')
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unbekannte Auflösung: {resolution} (erlaubt: {', '.join(RESOLUTIONS)})")
+        if start >= end:
+            raise ValueError("from muss vor to liegen")
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    
+    if resolution == 'auto':
+        resolution = weather_archive.choose_resolution(start)
+    points = weather_archive.query(city, start, end, resolution)
+    response = jsonify({
+        "city": city,
+        "from": format_timestamp(start),
+        "to": format_timestamp(end),
+        "resolution": resolution,
+        "anzahl": len(points),
+        "points": points,
+        "status": "success"
+    })
+    return compress_response(response, request)
 
 # Alternative: Einzelne Stadt (optimiert)
 @app.route('/api/weather/fast/<city>')
@@ -568,14 +1072,81 @@ def get_cities():
 @app.route('/health')
 def health():
     """Server-Status"""
-    return jsonify({"status": "ok", "message": "Server läuft!"})
+    return jsonify({
+        "status": "ok",
+        "message": "Server läuft!",
+        "weather_cache": weather_cache.stats(),
+        "point_cache": point_cache.stats(),
+        "hourly_cache": hourly_cache.stats(),
+        "forecast_store": {"cities": len(forecast_store.cities), "filled": int(forecast_store.filled().sum())},
+        "archive": dict(weather_archive.stats(), interval=WEATHER_ARCHIVE_INTERVAL,
+                        last_snapshot=archive_snapshotter.last_run),
+        "upstream": get_client().stats()
+    })
+
+# WSGI-Adapter für uvicorn; ein Thread pro gleichzeitiger Anfrage (SSE-Verbindungen
+# belegen ihren Thread bis zum Ende des Streams)
+wsgi_adapter = WSGIMiddleware(app, workers=PROD_THREADS)
 
-def main():
+async def asgi_app(scope, receive, send):
+    """
+    ASGI-Einstieg der uvicorn-Worker. Beim Lifespan-Start eines Workers startet der
+    Archiv-Snapshotter (nicht schon beim Import des Moduls); alles andere geht an die Flask-App.
+    """
+    if scope['type'] != 'lifespan':
+        await wsgi_adapter(scope, receive, send)
+        return
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            archive_snapshotter.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            archive_snapshotter.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+def run_production(host: str, port: int, workers: int):
+    """
+    Startet den Server mit mehreren Worker-Prozessen über uvicorn (auch unter Windows); die
+    Flask-App läuft dabei über den WSGI-Adapter asgi_app (a2wsgi).
+    
+    Ohne WEATHER_CACHE_URL teilen sich die Worker eine SQLite-Datei in /dev/shm bzw. im
+    Temp-Verzeichnis, damit zusätzliche Worker keine zusätzlichen Upstream-Aufrufe erzeugen.
+    """
+    import uvicorn
+    
+    if workers > 1 and 'WEATHER_CACHE_URL' not in os.environ:
+        # Worker importieren das Modul neu und lesen die Umgebungsvariable beim Start
+        os.environ['WEATHER_CACHE_URL'] = 'sqlite://'
+    cache_url = os.environ.get('WEATHER_CACHE_URL', 'memory://')
+    print(f"🏭 Produktionsmodus: {workers} Worker auf http://{host}:{port} (Cache: {cache_url})")
+    uvicorn.run(
+        'simple_server:asgi_app',
+        host=host,
+        port=port,
+        workers=workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        log_level='info'
+    )
+
+def main(argv=None):
     """Startet den kompletten Server"""
+    parser = argparse.ArgumentParser(description="Weltwetter-Server")
+    parser.add_argument("--prod", action="store_true", help="Produktionsmodus mit mehreren Worker-Prozessen (uvicorn)")
+    parser.add_argument("--workers", type=int, default=PROD_WORKERS, help=f"Anzahl Worker im Produktionsmodus (Standard: {PROD_WORKERS})")
+    parser.add_argument("--host", default=None, help=f"Adresse (Standard: 127.0.0.1, mit --prod {PROD_HOST})")
+    parser.add_argument("--port", type=int, default=PROD_PORT, help=f"Port (Standard: {PROD_PORT})")
+    args = parser.parse_args(argv)
+    
+    if args.prod:
+        run_production(args.host or PROD_HOST, args.port, max(1, args.workers))
+        return
+    
     print("� Weltwetter-Server")
     print("=" * 40)
     print("� Server startet...")
-    print("🌐 URL: http://localhost:5000")
+    print(f"🌐 URL: http://localhost:{args.port}")
     print("⏹️  Strg+C zum Beenden")
     print("=" * 40)
     
@@ -583,7 +1154,7 @@ def main():
     def open_browser():
         time.sleep(2)
         try:
-            webbrowser.open('http://localhost:5000')
+            webbrowser.open(f'http://localhost:{args.port}')
             print("✅ Browser geöffnet!")
         except:
             print("⚠️ Browser konnte nicht geöffnet werden")
@@ -591,10 +1162,12 @@ def main():
     import threading
     threading.Timer(2, open_browser).start()
     
+    archive_snapshotter.start()
+    
     # Server starten
     app.run(
-        host='127.0.0.1',
-        port=5000,
+        host=args.host or '127.0.0.1',
+        port=args.port,
         debug=False,
         use_reloader=False
     )
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Räumlicher Index über die Städte des Weltwetter-Servers
+
+- KD-Baum über Einheitsvektoren (x, y, z) auf der Kugel: keine Sonderfälle an der
+  Datumsgrenze oder an den Polen, die k nächsten Städte in Mikrosekunden
+- Bounding-Box-Abfragen über eine nach Breitengrad sortierte Liste (bisect),
+  Boxen über die Datumsgrenze (west > east) werden unterstützt
+- snap_to_grid(): rastet Koordinaten auf Gitterzellen ein, damit nahe beieinander
+  liegende Abfragen denselben Cache-Schlüssel (und denselben Upstream-Aufruf) nutzen
+
+Beispiel:
+    index = CityIndex.from_coords(load_city_coordinates())
+    index.nearest(52.4, 13.1, k=3)          # [("Berlin", 24.6), ("Prag", 274.7), ...]
+    index.within_bbox(45, 5, 55, 15)         # ["Berlin", "Bern", ...]
+    snap_to_grid(52.5213, 13.4094, 0.1)      # (52.55, 13.45)
+"""
+
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Mittlerer Erdradius (km)
+EARTH_RADIUS_KM = 6371.0088
+
+Vector = Tuple[float, float, float]
+
+
+def to_unit_vector(lat: float, lon: float) -> Vector:
+    """Breiten-/Längengrad -> Punkt auf der Einheitskugel"""
+    lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat_rad)
+    return (cos_lat * math.cos(lon_rad), cos_lat * math.sin(lon_rad), math.sin(lat_rad))
+
+
+def chord_to_km(chord_squared: float) -> float:
+    """Quadrierte Sehnenlänge auf der Einheitskugel -> Großkreisentfernung in km"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+def snap_to_grid(lat: float, lon: float, cell_deg: float) -> Tuple[float, float]:
+    """
+    Mittelpunkt der Gitterzelle, in der der Punkt liegt (Längengrad normiert auf [-180, 180)).
+
+    :param cell_deg: Kantenlänge einer Zelle in Grad (0.1° ≈ 11 km)
+    """
+    lon = (lon + 180.0) % 360.0 - 180.0
+    lat = min(max(lat, -90.0), 90.0 - 1e-9)
+    snapped_lat = (math.floor(lat / cell_deg) + 0.5) * cell_deg
+    snapped_lon = (math.floor(lon / cell_deg) + 0.5) * cell_deg
+    return round(min(snapped_lat, 90.0), 6), round(snapped_lon, 6)
+
+
+class KDTree:
+    """Statischer 3D-KD-Baum (Knoten als flache Listen, Aufbau über den Median)"""
+
+    def __init__(self, points: Sequence[Vector]):
+        self.points = list(points)
+        self._index: List[int] = []
+        self._axis: List[int] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, indices: List[int], depth: int) -> int:
+        if not indices:
+            return -1
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        median = len(indices) // 2
+        node = len(self._index)
+        self._index.append(indices[median])
+        self._axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._left[node] = self._build(indices[:median], depth + 1)
+        self._right[node] = self._build(indices[median + 1:], depth + 1)
+        return node
+
+    def query(self, point: Vector, k: int = 1) -> List[Tuple[float, int]]:
+        """Die k nächsten Punkte als (quadrierter Abstand, Index), aufsteigend sortiert"""
+        heap: List[Tuple[float, int]] = []  # Max-Heap über negierte Abstände
+        stack = [self._root]
+        # Iterative Suche mit Rücksprung: (Knoten, Abstand zur Teilungsebene) für die Gegenseite
+        pending: List[Tuple[int, float]] = []
+        while stack or pending:
+            if not stack:
+                node, plane_distance = pending.pop()
+                if len(heap) == k and plane_distance >= -heap[0][0]:
+                    continue
+                stack.append(node)
+                continue
+            node = stack.pop()
+            if node < 0:
+                continue
+            candidate = self.points[self._index[node]]
+            distance = ((point[0] - candidate[0]) ** 2 + (point[1] - candidate[1]) ** 2
+                        + (point[2] - candidate[2]) ** 2)
+            if len(heap) < k:
+                heapq.heappush(heap, (-distance, self._index[node]))
+            elif distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-distance, self._index[node]))
+            diff = point[self._axis[node]] - candidate[self._axis[node]]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            pending.append((far, diff * diff))
+            stack.append(near)
+        return sorted((-negative, index) for negative, index in heap)
+
+
+class CityIndex:
+    """Nächste Städte und Bounding-Box-Abfragen über die Städte-Koordinaten"""
+
+    def __init__(self, names: Sequence[str], lats: Sequence[float], lons: Sequence[float]):
+        self.names = list(names)
+        self.lats = list(lats)
+        self.lons = list(lons)
+        self.tree = KDTree([to_unit_vector(lat, lon) for lat, lon in zip(self.lats, self.lons)])
+        order = sorted(range(len(self.names)), key=lambda i: self.lats[i])
+        self._lat_sorted = [self.lats[i] for i in order]
+        self._lat_order = order
+
+    @classmethod
+    def from_coords(cls, city_coords: Dict[str, Dict]) -> 'CityIndex':
+        """Aus dem Dictionary von load_city_coordinates() (Stadtname -> {'lat', 'lon', ...})"""
+        names = list(city_coords)
+        return cls(names, [city_coords[n]['lat'] for n in names], [city_coords[n]['lon'] for n in names])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[str, float]]:
+        """Die k nächsten Städte als (Stadtname, Entfernung in km), die nächste zuerst"""
+        if not self.names or k < 1:
+            return []
+        matches = self.tree.query(to_unit_vector(lat, lon), min(k, len(self.names)))
+        return [(self.names[index], round(chord_to_km(distance), 1)) for distance, index in matches]
+
+    def within_bbox(self, south: float, west: float, north: float, east: float,
+                    limit: Optional[int] = None) -> List[str]:
+        """
+        Städte in der Box (Grenzen inklusive), von Süd nach Nord.
+        Liegt west östlich von east, überquert die Box die Datumsgrenze.
+        """
+        start = bisect_left(self._lat_sorted, south)
+        stop = bisect_right(self._lat_sorted, north)
+        crosses_antimeridian = west > east
+        names = []
+        for position in range(start, stop):
+            index = self._lat_order[position]
+            lon = self.lons[index]
+            inside = (lon >= west or lon <= east) if crosses_antimeridian else (west <= lon <= east)
+            if inside:
+                names.append(self.names[index])
+                if limit is not None and len(names) >= limit:
+                    break
+        return names
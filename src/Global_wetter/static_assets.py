@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-Memory-Cache für die statischen Dateien der Weltwetter-Oberfläche (HTML, CSS)
+
+- Jede Datei wird einmal gelesen und mit vorberechneten gzip- und (falls das Paket
+  installiert ist) brotli-Varianten im Speicher gehalten
+- Starke ETags pro Variante und 304-Antworten bei If-None-Match
+- Auslieferung der kleinsten Variante, die der Client laut Accept-Encoding versteht
+- compress_response() komprimiert zusätzlich dynamische Antworten (z.B. JSON) beim Versand
+- Im Entwicklungsmodus prüft ein Hintergrund-Thread die Änderungszeit der Dateien und
+  verwirft geänderte Einträge (ohne externe Watcher-Bibliothek)
+
+Beispiel:
+    assets = AssetCache(os.path.dirname(__file__), watch=True)
+    asset = assets.get("weltwetter.css")
+    return asset_response(asset, request)
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Kleinere Dateien werden nicht komprimiert (Header-Overhead überwiegt)
+MIN_COMPRESS_SIZE = 256
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Dynamische Antworten werden bei jedem Request komprimiert: schnellere Stufen
+DYNAMIC_GZIP_LEVEL = 6
+DYNAMIC_BROTLI_QUALITY = 5
+
+# Prüfintervall des Datei-Watchers im Entwicklungsmodus (Sekunden)
+WATCH_INTERVAL = 1.0
+
+
+@dataclass
+class StaticAsset:
+    """Datei im Speicher mit vorberechneten Varianten"""
+    filename: str
+    mimetype: str
+    body: bytes
+    etag: str
+    mtime: float
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    def variants(self) -> Dict[str, bytes]:
+        """Content-Encoding -> Inhalt ('identity' immer vorhanden)"""
+        variants = {'identity': self.body}
+        if self.gzip is not None:
+            variants['gzip'] = self.gzip
+        if self.br is not None:
+            variants['br'] = self.br
+        return variants
+
+    def etag_for(self, encoding: str) -> str:
+        # Starke ETags müssen sich je Darstellung unterscheiden
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+
+def load_asset(path: str) -> StaticAsset:
+    """Liest eine Datei und berechnet ETag sowie komprimierte Varianten"""
+    with open(path, 'rb') as f:
+        body = f.read()
+    mtime = os.path.getmtime(path)
+    filename = os.path.basename(path)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    asset = StaticAsset(filename, mimetype, body, hashlib.sha256(body).hexdigest()[:32], mtime)
+    if len(body) >= MIN_COMPRESS_SIZE:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(body):
+            asset.gzip = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            if len(compressed) < len(body):
+                asset.br = compressed
+    return asset
+
+
+class AssetCache:
+    """Threadsicherer Cache für Dateien eines Verzeichnisses"""
+
+    def __init__(self, base_dir: str, watch: bool = False, interval: float = WATCH_INTERVAL):
+        self.base_dir = base_dir
+        # None = Datei fehlt (ebenfalls gemerkt, damit fehlende Seiten keinen Plattenzugriff kosten)
+        self._assets: Dict[str, Optional[StaticAsset]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        if watch:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="asset-watcher", daemon=True)
+            self._watcher.start()
+
+    def get(self, filename: str) -> Optional[StaticAsset]:
+        """Datei aus dem Cache (beim ersten Zugriff geladen); None, wenn sie nicht existiert"""
+        with self._lock:
+            if filename in self._assets:
+                return self._assets[filename]
+        try:
+            asset = load_asset(os.path.join(self.base_dir, filename))
+        except FileNotFoundError:
+            asset = None
+        with self._lock:
+            self._assets[filename] = asset
+        return asset
+
+    def invalidate(self, filename: Optional[str] = None):
+        with self._lock:
+            if filename is None:
+                self._assets.clear()
+            else:
+                self._assets.pop(filename, None)
+
+    def close(self):
+        self._stop.set()
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            with self._lock:
+                cached = dict(self._assets)
+            for filename, asset in cached.items():
+                try:
+                    mtime = os.path.getmtime(os.path.join(self.base_dir, filename))
+                except OSError:
+                    mtime = None
+                if (asset is None) != (mtime is None) or (asset is not None and mtime != asset.mtime):
+                    logger.info(f"🔄 {filename} geändert, Cache verworfen")
+                    self.invalidate(filename)
+
+
+def asset_response(asset: StaticAsset, request) -> Response:
+    """
+    Flask-Antwort für eine Datei: 304 bei passendem If-None-Match, sonst die kleinste vom
+    Client akzeptierte Variante.
+    """
+    variants = asset.variants()
+    accepted = [encoding for encoding in variants
+                if encoding == 'identity' or request.accept_encodings[encoding] > 0]
+    encoding = min(accepted, key=lambda name: len(variants[name]))
+    etag = asset.etag_for(encoding)
+
+    headers = {
+        'ETag': f'"{etag}"',
+        'Vary': 'Accept-Encoding',
+        # Immer revalidieren: bei unveränderter Datei kostet das nur eine 304-Antwort
+        'Cache-Control': 'no-cache'
+    }
+    # Jede Variante derselben Fassung gilt als aktuell (der Client kennt den Inhalt bereits)
+    known = {asset.etag_for(name) for name in variants}
+    if request.if_none_match and (request.if_none_match.star_tag
+                                  or any(tag in known for tag in request.if_none_match.as_set())):
+        return Response(status=304, headers=headers)
+
+    response = Response(variants[encoding], mimetype=asset.mimetype, headers=headers)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def compress_response(response: Response, request) -> Response:
+    """Komprimiert eine fertige Antwort (brotli oder gzip), sofern der Client das akzeptiert"""
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+    if brotli is not None and request.accept_encodings['br'] > 0:
+        response.set_data(brotli.compress(data, quality=DYNAMIC_BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    elif request.accept_encodings['gzip'] > 0:
+        response.set_data(gzip.compress(data, compresslevel=DYNAMIC_GZIP_LEVEL, mtime=0))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prozessweiter asynchroner HTTP-Client für Upstream-Aufrufe (Open-Meteo)
+
+- Eine Event-Loop in einem langlebigen Hintergrund-Thread, ein Client für den ganzen Prozess
+- Keep-Alive-Verbindungspool: TCP- und TLS-Verbindungen werden über Requests hinweg wiederverwendet
+- Globale Obergrenze für gleichzeitige Upstream-Aufrufe (Semaphore), egal wie viele
+  Flask-Threads oder Cache-Worker gleichzeitig anfragen
+- Brücke für synchrone Flask-Handler: get_json() wartet auf die Coroutine in der Loop
+
+Backends:
+- httpx.AsyncClient (falls installiert): echtes asynchrones I/O mit HTTP-Verbindungspool
+- sonst requests.Session mit gemeinsamem Verbindungspool, ausgeführt in einem festen
+  Executor mit genau max_connections Threads (keine Threads pro Request)
+
+Beispiel:
+    client = get_client()
+    data = client.get_json("https://api.open-meteo.com/v1/forecast", {"latitude": 52.52, "longitude": 13.4})
+    results = client.run(asyncio.gather(client.aget_json(url_a), client.aget_json(url_b)))
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, Optional
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Gleichzeitige Upstream-Verbindungen pro Prozess und Standard-Timeout (Sekunden)
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_TIMEOUT = 10
+
+
+class UpstreamError(Exception):
+    """Upstream hat mit einem HTTP-Fehlerstatus geantwortet"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"API Error: {status_code}")
+        self.status_code = status_code
+
+
+class UpstreamClient:
+    """Langlebiger HTTP-Client mit eigener Event-Loop, Keep-Alive-Pool und Parallelitätsgrenze"""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS, timeout: float = DEFAULT_TIMEOUT):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.backend = 'httpx' if httpx is not None else 'requests'
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="upstream-loop", daemon=True)
+        self._thread.start()
+        # Semaphore und Client gehören zur Loop und werden dort angelegt
+        self._semaphore: asyncio.Semaphore = self.run(self._create_semaphore())
+        self._client = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._session: Optional[requests.Session] = None
+        if httpx is not None:
+            self._client = self.run(self._create_httpx_client())
+        else:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+            self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="upstream-io")
+        self._stats = {'requests': 0, 'errors': 0, 'active': 0, 'max_active': 0}
+        self._closed = False
+
+    async def _create_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_connections)
+
+    async def _create_httpx_client(self):
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        return httpx.AsyncClient(limits=limits, timeout=self.timeout)
+
+    # --- Asynchrone API (läuft in der Client-Loop) ---------------------------------
+
+    async def aget_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                        timeout: Optional[float] = None) -> Any:
+        """
+        GET-Request mit JSON-Antwort.
+
+        :raises UpstreamError: Bei HTTP-Fehlerstatus
+        :raises Exception: Bei Verbindungsfehlern oder Timeouts (Fehler des Backends)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            self._stats['requests'] += 1
+            self._stats['active'] += 1
+            self._stats['max_active'] = max(self._stats['max_active'], self._stats['active'])
+            try:
+                if self._client is not None:
+                    response = await self._client.get(url, params=params, timeout=timeout)
+                    status_code = response.status_code
+                else:
+                    response = await self._loop.run_in_executor(
+                        self._executor, lambda: self._session.get(url, params=params, timeout=timeout))
+                    status_code = response.status_code
+                if status_code >= 400:
+                    raise UpstreamError(status_code)
+                return response.json()
+            except Exception:
+                self._stats['errors'] += 1
+                raise
+            finally:
+                self._stats['active'] -= 1
+
+    # --- Brücke für synchronen Code (Flask-Handler, Cache-Worker) --------------------
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Führt eine Coroutine in der Client-Loop aus und wartet auf das Ergebnis"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run() darf nicht aus der Client-Loop aufgerufen werden (await verwenden)")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+        """Synchrone Variante von aget_json()"""
+        return self.run(self.aget_json(url, params, timeout))
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, backend=self.backend, max_connections=self.max_connections)
+
+    def close(self):
+        """Schließt Verbindungen und beendet die Loop"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._client is not None:
+            self.run(self._client.aclose())
+        if self._session is not None:
+            self._session.close()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_client: Optional[UpstreamClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> UpstreamClient:
+    """
+    Prozessweiter Client (lazy angelegt). Nach einem fork() (z.B. Worker mit Preload) bekommt
+    der neue Prozess einen eigenen Client, da Loop-Thread und Verbindungen nicht mitkopiert werden.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = UpstreamClient(
+                max_connections=int(os.environ.get('UPSTREAM_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)),
+                timeout=float(os.environ.get('UPSTREAM_TIMEOUT', DEFAULT_TIMEOUT))
+            )
+            _client_pid = os.getpid()
+            logger.info(f"🔌 Upstream-Client gestartet ({_client.backend}, max. {_client.max_connections} Verbindungen)")
+        return _client
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archiv historischer Wetterdaten (SQLite) mit stündlichen und täglichen Verdichtungen
+
+- Ein Hintergrund-Thread (Snapshotter) legt in festen Abständen die aktuellen Werte aller
+  Städte ab; Zeitpunkte sind auf das Intervall ausgerichtet, so dass mehrere Worker
+  denselben Zeitpunkt schreiben und doppelte Zeilen ignoriert werden
+- Abgeschlossene Stunden werden zu Stundenwerten (Anzahl, Min, Max, Summe) verdichtet,
+  abgeschlossene Tage zu Tageswerten; Rohwerte bleiben RAW_RETENTION, Stundenwerte
+  HOURLY_RETENTION erhalten, Tageswerte dauerhaft
+- Alle Tabellen sind nach (Stadt, Zeit) geclustert (WITHOUT ROWID), eine Zeitraum-Abfrage
+  für eine Stadt liest also nur den passenden Ausschnitt des Primärschlüssels
+
+Zeitpunkte sind Unix-Sekunden (UTC); Tage beginnen um 00:00 UTC.
+
+Beispiel:
+    archive = WeatherArchive("weather_archive.db")
+    archive.append({"Berlin": {"temperature": 12.3, "windspeed": 8.1, ...}}, ts=1760000400)
+    archive.compact()
+    archive.query("Berlin", 1759900000, 1760100000, resolution="hourly")
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 86400
+
+# Aufbewahrung der Rohwerte und Stundenwerte (Sekunden)
+RAW_RETENTION = 2 * DAY
+HOURLY_RETENTION = 30 * DAY
+
+# Gültiger Bereich für Zeitangaben (1970 bis Ende 9999, überall als datetime darstellbar)
+MIN_TIMESTAMP = 0
+MAX_TIMESTAMP = 253402300799
+
+# Obergrenze für Punkte pro Abfrage
+MAX_POINTS = 5000
+
+RESOLUTIONS = ('auto', 'raw', 'hourly', 'daily')
+
+# Spalten der Rohwerte (wie im Ergebnis von build_weather_result)
+SNAPSHOT_FIELDS = ('temperature', 'windspeed', 'winddirection', 'is_day', 'description')
+
+# Stunden- und Tageswerte haben dasselbe Schema, nur die Bucket-Breite unterscheidet sich
+ROLLUP_TABLES = {'hourly': HOUR, 'daily': DAY}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    city TEXT NOT NULL, ts INTEGER NOT NULL,
+    temperature REAL, windspeed REAL, winddirection REAL, is_day INTEGER, description TEXT,
+    PRIMARY KEY (city, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts);
+CREATE TABLE IF NOT EXISTS hourly (
+    city TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL,
+    temp_min REAL, temp_max REAL, temp_sum REAL, wind_max REAL, wind_sum REAL,
+    PRIMARY KEY (city, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hourly_bucket ON hourly (bucket);
+CREATE TABLE IF NOT EXISTS daily (
+    city TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL,
+    temp_min REAL, temp_max REAL, temp_sum REAL, wind_max REAL, wind_sum REAL,
+    PRIMARY KEY (city, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def parse_timestamp(value: Optional[str], default: Optional[float] = None) -> Optional[int]:
+    """
+    Zeitangabe als Unix-Sekunden oder ISO 8601 ("2025-10-01", "2025-10-01T12:00"; ohne
+    Zeitzone UTC) -> Unix-Sekunden.
+
+    :raises ValueError: Bei unlesbarer Angabe oder außerhalb von MIN_TIMESTAMP..MAX_TIMESTAMP
+    """
+    if value is None or value == '':
+        return None if default is None else int(default)
+    try:
+        ts = int(float(value))
+    except OverflowError:
+        # inf, -inf
+        raise ValueError(f"Zeitangabe außerhalb des gültigen Bereichs: {value} (1970 bis 9999)")
+    except ValueError:
+        ts = None
+    if ts is None:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"Ungültige Zeitangabe: {value} (Unix-Sekunden oder ISO 8601)")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        ts = int(parsed.timestamp())
+    if not MIN_TIMESTAMP <= ts <= MAX_TIMESTAMP:
+        raise ValueError(f"Zeitangabe außerhalb des gültigen Bereichs: {value} (1970 bis 9999)")
+    return ts
+
+
+def format_timestamp(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class WeatherArchive:
+    """SQLite-Archiv; eine Verbindung pro Thread und Prozess (wie cache_store.SqliteStore)"""
+
+    def __init__(self, path: str, raw_retention: int = RAW_RETENTION, hourly_retention: int = HOURLY_RETENTION):
+        self.path = path
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Datei und Schema erst beim ersten Zugriff anlegen (nicht schon beim Import des Servers)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def append(self, records: Dict[str, Dict[str, Any]], ts: Optional[int] = None) -> int:
+        """
+        Legt die Werte aller Städte zu einem Zeitpunkt ab (bereits vorhandene Zeilen bleiben).
+
+        :param records: Stadtname -> Wetter-Eintrag
+        :returns: Anzahl neu geschriebener Zeilen
+        """
+        ts = int(time.time()) if ts is None else int(ts)
+        rows = [
+            (city, ts, *(record.get(field) for field in SNAPSHOT_FIELDS))
+            for city, record in records.items()
+        ]
+        conn = self._conn()
+        before = conn.total_changes
+        with _transaction(conn):
+            conn.executemany("INSERT OR IGNORE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return conn.total_changes - before
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Verdichtet abgeschlossene Stunden und Tage und löscht Daten jenseits der Aufbewahrung.
+
+        Die letzte bereits verdichtete Stunde bzw. der letzte Tag wird erneut berechnet, damit
+        verspätet geschriebene Zeilen (anderer Worker) nicht verloren gehen.
+
+        :returns: Anzahl geschriebener Stunden- und Tageswerte
+        """
+        now = int(time.time() if now is None else now)
+        conn = self._conn()
+        written = {}
+        with _transaction(conn):
+            hourly_until = self._rollup(conn, 'snapshots', 'ts', 'hourly', now)
+            daily_until = self._rollup(conn, 'hourly', 'bucket', 'daily', now)
+            written['hourly'], written['daily'] = hourly_until[1], daily_until[1]
+            # Nie löschen, was noch nicht verdichtet ist
+            conn.execute("DELETE FROM snapshots WHERE ts < ?",
+                         (min(now - self.raw_retention, hourly_until[0] - HOUR),))
+            conn.execute("DELETE FROM hourly WHERE bucket < ?",
+                         (min(now - self.hourly_retention, daily_until[0] - DAY),))
+        return written
+
+    def _rollup(self, conn: sqlite3.Connection, source: str, time_column: str, target: str, now: int):
+        width = ROLLUP_TABLES[target]
+        end = now // width * width
+        done = conn.execute("SELECT value FROM meta WHERE name = ?", (target,)).fetchone()
+        start = done[0] - width if done else 0
+        if end <= start:
+            return (done[0] if done else 0), 0
+        if source == 'snapshots':
+            columns = "COUNT(temperature), MIN(temperature), MAX(temperature), SUM(temperature), MAX(windspeed), SUM(windspeed)"
+        else:
+            columns = "SUM(count), MIN(temp_min), MAX(temp_max), SUM(temp_sum), MAX(wind_max), SUM(wind_sum)"
+        cursor = conn.execute(
+            f"INSERT OR REPLACE INTO {target} "
+            f"SELECT city, {time_column} / {width} * {width} AS slot, {columns} FROM {source} "
+            f"WHERE {time_column} >= ? AND {time_column} < ? GROUP BY city, slot",
+            (start, end)
+        )
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (target, end))
+        return end, cursor.rowcount
+
+    def choose_resolution(self, start: int, now: Optional[float] = None) -> str:
+        """Feinste Auflösung, für die der ganze Zeitraum noch vorliegt"""
+        now = time.time() if now is None else now
+        if start >= now - self.raw_retention:
+            return 'raw'
+        if start >= now - self.hourly_retention:
+            return 'hourly'
+        return 'daily'
+
+    def query(self, city: str, start: int, end: int, resolution: str = 'auto',
+              limit: int = MAX_POINTS) -> List[Dict[str, Any]]:
+        """
+        Werte einer Stadt im Zeitraum [start, end), aufsteigend nach Zeit.
+
+        Stunden- und Tageswerte gibt es nur für abgeschlossene Stunden bzw. Tage.
+
+        :raises ValueError: Bei unbekannter Auflösung
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unbekannte Auflösung: {resolution} (erlaubt: {', '.join(RESOLUTIONS)})")
+        if resolution == 'auto':
+            resolution = self.choose_resolution(start)
+        if resolution == 'raw':
+            rows = self._conn().execute(
+                "SELECT ts, temperature, windspeed, winddirection, is_day, description FROM snapshots "
+                "WHERE city = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+                (city, start, end, limit)
+            ).fetchall()
+            return [
+                {'time': format_timestamp(ts), 'ts': ts, 'temperature': temperature, 'windspeed': windspeed,
+                 'winddirection': winddirection, 'is_day': is_day, 'description': description}
+                for ts, temperature, windspeed, winddirection, is_day, description in rows
+            ]
+        rows = self._conn().execute(
+            f"SELECT bucket, count, temp_min, temp_max, temp_sum, wind_max, wind_sum FROM {resolution} "
+            "WHERE city = ? AND bucket >= ? AND bucket < ? ORDER BY bucket LIMIT ?",
+            (city, start, end, limit)
+        ).fetchall()
+        return [
+            {'time': format_timestamp(bucket), 'ts': bucket, 'count': count,
+             'temperature_min': temp_min, 'temperature_max': temp_max,
+             'temperature_mean': _mean(temp_sum, count),
+             'windspeed_max': wind_max, 'windspeed_mean': _mean(wind_sum, count)}
+            for bucket, count, temp_min, temp_max, temp_sum, wind_max, wind_sum in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'path': self.path}
+        if not os.path.exists(self.path):
+            return dict(stats, snapshots=0, hourly=0, daily=0, newest=None)
+        conn = self._conn()
+        for table in ('snapshots', 'hourly', 'daily'):
+            stats[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        newest = conn.execute("SELECT MAX(ts) FROM snapshots").fetchone()[0]
+        stats['newest'] = format_timestamp(newest) if newest else None
+        return stats
+
+
+class Snapshotter:
+    """Hintergrund-Thread: alle interval Sekunden collect() abfragen, archivieren und verdichten"""
+
+    def __init__(self, archive: WeatherArchive, collect: Callable[[], Dict[str, Dict[str, Any]]],
+                 interval: float):
+        self.archive = archive
+        self.collect = collect
+        self.interval = interval
+        self.last_run: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="weather-snapshotter", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self, ts: Optional[int] = None) -> int:
+        """Ein Durchlauf; ts ist der auf das Intervall ausgerichtete Zeitpunkt"""
+        ts = self._slot(time.time()) if ts is None else ts
+        written = self.archive.append(self.collect(), ts)
+        self.archive.compact()
+        self.last_run = ts
+        return written
+
+    def _slot(self, now: float) -> int:
+        return int(now // self.interval * self.interval)
+
+    def _run(self):
+        # Auf den nächsten Intervall-Beginn warten, damit alle Worker dieselben Zeitpunkte treffen
+        while not self._stop.wait(self.interval - time.time() % self.interval):
+            try:
+                # wait() kann knapp vor der Grenze zurückkehren: Zeitpunkt des neuen Intervalls
+                written = self.snapshot(self._slot(time.time() + 1))
+                logger.info(f"🗄️ Wetter-Archiv: {written} Werte gespeichert")
+            except Exception as e:
+                logger.error(f"❌ Wetter-Archiv: Snapshot fehlgeschlagen: {e}")
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """BEGIN IMMEDIATE ... COMMIT (bei Fehler ROLLBACK) für Verbindungen im Autocommit-Modus"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _mean(total: Union[float, None], count: int) -> Optional[float]:
+    return round(total / count, 2) if total is not None and count else None
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTL-Cache mit Stale-While-Revalidate für die Wetterdaten des Weltwetter-Servers
+
+- Frische Einträge (jünger als ttl) werden direkt ausgeliefert.
+- Abgelaufene Einträge innerhalb des Stale-Fensters werden sofort ausgeliefert, während
+  genau eine Hintergrund-Aktualisierung pro Schlüssel läuft.
+- Gleichzeitige Misses für denselben Schlüssel werden zusammengefasst: nur der erste
+  Aufrufer lädt, alle anderen warten auf dasselbe Ergebnis.
+- Optional lädt ein Batch-Loader viele Misses mit wenigen Aufrufen (z.B. Multi-Location-Requests);
+  schlägt ein Batch fehl, wird für dessen Schlüssel einzeln über den normalen Loader geladen.
+  Abgelaufene Einträge eines Aufrufs werden ebenfalls gesammelt in einem Hintergrund-Job
+  über den Batch-Loader aktualisiert, nicht Schlüssel für Schlüssel.
+- Ungültige Ergebnisse (z.B. Fallback bei Timeout) überschreiben keinen guten Eintrag und
+  werden nur kurz (error_ttl) gemerkt, damit ein ausgefallener Upstream nicht bei jedem
+  Request erneut angefragt wird.
+- Mit einem geteilten Speicher (cache_store.SqliteStore/RedisStore) nutzen mehrere
+  Worker-Prozesse dieselben Einträge; Lade-Sperren verhindern doppelte Upstream-Aufrufe.
+
+Beispiel:
+    cache = TTLCache(lambda city: fetch_city_weather_data(city, coords[city]), ttl=600, stale_ttl=3600,
+                     batch_loader=fetch_batch)
+    data, status = cache.get("Berlin")  # status: "hit" | "stale" | "miss"
+    results = cache.get_many(coords, batch_size=50)
+    shared = TTLCache(loader, store=create_store("sqlite://"))
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from cache_store import CacheEntry, MemoryStore
+
+logger = logging.getLogger(__name__)
+
+# Standardwerte (Sekunden); Open-Meteo aktualisiert current_weather etwa alle 15 Minuten
+DEFAULT_TTL = 600
+DEFAULT_STALE_TTL = 3600
+DEFAULT_ERROR_TTL = 30
+
+# Threads für Hintergrund-Aktualisierungen und parallele Misses
+REFRESH_WORKERS = 4
+FETCH_WORKERS = 20
+
+# Schlüssel pro Aufruf des Batch-Loaders
+DEFAULT_BATCH_SIZE = 50
+
+# Geteilter Speicher: Gültigkeit einer Lade-Sperre und Abfrageintervall, während ein
+# anderer Worker lädt (Sekunden)
+LOCK_TTL = 15
+PEER_POLL_INTERVAL = 0.05
+
+
+class _PeerValue:
+    """Von einem anderen Worker geladener Wert (liegt bereits im Speicher)"""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class TTLCache:
+    """Threadsicherer TTL-Cache mit Stale-While-Revalidate und zusammengefassten Misses"""
+
+    def __init__(self, loader: Callable[[Hashable], Any], ttl: float = DEFAULT_TTL,
+                 stale_ttl: float = DEFAULT_STALE_TTL, error_ttl: float = DEFAULT_ERROR_TTL,
+                 is_valid: Callable[[Any], bool] = lambda value: True,
+                 refresh_workers: int = REFRESH_WORKERS, fetch_workers: int = FETCH_WORKERS,
+                 clock: Optional[Callable[[], float]] = None, store=None,
+                 batch_loader: Optional[Callable[[List[Hashable]], Dict[Hashable, Any]]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.loader = loader
+        # Standard-Batch-Loader für get_many()/iter_many() und Hintergrund-Aktualisierungen
+        self.batch_loader = batch_loader
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.is_valid = is_valid
+        self.store = store if store is not None else MemoryStore()
+        # Geteilte Speicher brauchen eine Uhr, die in allen Prozessen gleich läuft
+        self.clock = clock or (time.time if self.store.shared else time.monotonic)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        # Einmal angelegte Pools statt eines neuen ThreadPoolExecutors pro Request
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="cache-fetch")
+        self._stats = {'hit': 0, 'stale': 0, 'miss': 0, 'loads': 0, 'errors': 0, 'peer': 0}
+
+    # --- Lesen -----------------------------------------------------------------
+
+    def peek(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """
+        Wert ohne Laden: ("hit" | "stale" | "miss"). Bei "stale" wird eine Aktualisierung angestoßen.
+        """
+        return self._peek_many([key])[key]
+
+    def get(self, key: Hashable) -> Tuple[Any, str]:
+        """Wert aus dem Cache oder (blockierend, zusammengefasst) neu geladen"""
+        value, status = self.peek(key)
+        if status != 'miss':
+            return value, status
+        return self._load(key), 'miss'
+
+    def get_many(self, keys: Iterable[Hashable],
+                 batch_loader: Optional[Callable[[List[Hashable]], Dict[Hashable, Any]]] = None,
+                 batch_size: Optional[int] = None) -> Dict[Hashable, Tuple[Any, str]]:
+        """
+        Mehrere Schlüssel; Misses werden parallel im gemeinsamen Pool geladen (Fehlschläge fehlen im Ergebnis).
+
+        :param batch_loader: Optional: lädt eine Liste von Schlüsseln mit einem Aufruf und liefert
+                             {Schlüssel: Wert}; fehlende Schlüssel werden einzeln nachgeladen
+                             (Standard: der Batch-Loader des Caches)
+        :param batch_size: Maximale Anzahl Schlüssel pro Aufruf des Batch-Loaders (Standard: die des Caches)
+        """
+        return {key: (value, status) for key, value, status in self.iter_many(keys, batch_loader, batch_size)}
+
+    def iter_many(self, keys: Iterable[Hashable],
+                  batch_loader: Optional[Callable[[List[Hashable]], Dict[Hashable, Any]]] = None,
+                  batch_size: Optional[int] = None) -> Iterator[Tuple[Hashable, Any, str]]:
+        """
+        Wie get_many(), liefert aber (Schlüssel, Wert, Status) sofort: zuerst alle Cache-Treffer,
+        danach jeden Miss, sobald er geladen ist (Fehlschläge werden übersprungen).
+        """
+        batch_loader = batch_loader or self.batch_loader
+        batch_size = max(1, batch_size or self.batch_size)
+        misses: List[Hashable] = []
+        # Ein Lesezugriff auf den Speicher für alle Schlüssel (bei Redis ein MGET); abgelaufene
+        # Einträge werden gemeinsam über denselben Batch-Loader aktualisiert
+        for key, (value, status) in self._peek_many(list(keys), batch_loader, batch_size).items():
+            if status == 'miss':
+                misses.append(key)
+            else:
+                yield key, value, status
+
+        if batch_loader is None:
+            pending = {key: self._fetch_pool.submit(self._load, key) for key in misses}
+        else:
+            pending = self._load_batched(misses, batch_loader, batch_size)
+        keys_by_future: Dict[Future, List[Hashable]] = {}
+        for key, future in pending.items():
+            keys_by_future.setdefault(future, []).append(key)
+        for future in as_completed(keys_by_future):
+            for key in keys_by_future[future]:
+                try:
+                    yield key, future.result(), 'miss'
+                except Exception as e:
+                    # Fehlende Schlüssel im Ergebnis; der Aufrufer entscheidet über den Ersatzwert
+                    logger.warning(f"⚠️ Laden von {key} fehlgeschlagen: {e}")
+
+    def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Lädt Schlüssel unabhängig vom Alter ihrer Einträge über den Batch-Loader des Caches
+        (blockierend). Laufende Ladevorgänge und Hintergrund-Aktualisierungen derselben Schlüssel
+        werden geteilt; Fehlschläge fehlen im Ergebnis.
+        """
+        if self.batch_loader is None:
+            pending = {key: self._fetch_pool.submit(self._load, key) for key in keys}
+        else:
+            pending = self._load_batched(list(keys), self.batch_loader, max(1, self.batch_size))
+        results = {}
+        for key, future in pending.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.warning(f"⚠️ Laden von {key} fehlgeschlagen: {e}")
+        return results
+
+    def _peek_many(self, keys: List[Hashable], batch_loader: Optional[Callable] = None,
+                   batch_size: Optional[int] = None) -> Dict[Hashable, Tuple[Optional[Any], str]]:
+        entries = self.store.get_many(keys)
+        now = self.clock()
+        results = {}
+        stale: List[Hashable] = []
+        with self._lock:
+            for key in keys:
+                entry = entries.get(key)
+                if entry is not None and now < entry.fresh_until:
+                    self._stats['hit'] += 1
+                    results[key] = (entry.value, 'hit')
+                elif entry is not None and now < entry.stale_until:
+                    self._stats['stale'] += 1
+                    if now >= entry.retry_at:
+                        stale.append(key)
+                    results[key] = (entry.value, 'stale')
+                else:
+                    self._stats['miss'] += 1
+                    results[key] = (None, 'miss')
+            if stale:
+                self._schedule_refresh(stale, batch_loader or self.batch_loader, max(1, batch_size or self.batch_size))
+        return results
+
+    # --- Schreiben ---------------------------------------------------------------
+
+    def put(self, key: Hashable, value: Any):
+        """Speichert einen Wert; ungültige Werte verdrängen keinen noch nutzbaren gültigen Eintrag"""
+        now = self.clock()
+        if self.is_valid(value):
+            self.store.set(key, CacheEntry(value, now, now + self.ttl, now + self.ttl + self.stale_ttl))
+            return
+        with self._lock:
+            self._stats['errors'] += 1
+        current = self.store.get_many([key]).get(key)
+        if current is not None and current.valid and now < current.stale_until:
+            # Alten Wert weiter ausliefern, den Upstream aber nicht bei jedem Request erneut fragen
+            current.retry_at = now + self.error_ttl
+            self.store.set(key, current)
+            return
+        self.store.set(key, CacheEntry(value, now, now + self.error_ttl, now + self.error_ttl, valid=False))
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Entfernt einen Schlüssel (oder alle)"""
+        self.store.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.store.size()
+        with self._lock:
+            return dict(self._stats, entries=entries, inflight=len(self._inflight), store=self.store.describe())
+
+    def close(self):
+        self._refresh_pool.shutdown(wait=False, cancel_futures=True)
+        self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Intern ------------------------------------------------------------------
+
+    def _schedule_refresh(self, keys: List[Hashable], batch_loader: Optional[Callable], batch_size: int):
+        # Aufruf unter self._lock: höchstens eine Hintergrund-Aktualisierung pro Schlüssel
+        keys = [key for key in keys if key not in self._refreshing and key not in self._inflight]
+        if not keys:
+            return
+        self._refreshing.update(keys)
+        if batch_loader is None:
+            for key in keys:
+                self._refresh_pool.submit(self._refresh, [key], None, batch_size)
+        else:
+            # Ein Hintergrund-Job für alle abgelaufenen Schlüssel dieses Aufrufs
+            self._refresh_pool.submit(self._refresh, keys, batch_loader, batch_size)
+
+    def _refresh(self, keys: List[Hashable], batch_loader: Optional[Callable], batch_size: int):
+        try:
+            if batch_loader is None:
+                self._load(keys[0])
+                return
+            futures = self._load_batched(keys, batch_loader, batch_size)
+            for key, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Hintergrund-Aktualisierung für {key} fehlgeschlagen: {e}")
+        except Exception as e:
+            logger.warning(f"⚠️ Hintergrund-Aktualisierung für {keys[0]} fehlgeschlagen: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def _load(self, key: Hashable) -> Any:
+        """Lädt einen Schlüssel; parallele Aufrufe für denselben Schlüssel teilen sich einen Ladevorgang"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self._stats['loads'] += 1
+        if not owner:
+            return future.result()
+        self._complete(key, future, self._load_shared)
+        return future.result()
+
+    def _load_shared(self, key: Hashable) -> Any:
+        """Loader mit prozessübergreifender Sperre: lädt ein anderer Worker, wird dessen Ergebnis übernommen"""
+        if not self.store.shared:
+            return self.loader(key)
+        owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        if self.store.acquire(key, owner, LOCK_TTL):
+            try:
+                # Ein anderer Worker kann gerade fertig geworden sein und die Sperre freigegeben haben
+                entry = self._fresh_entries([key]).get(key)
+                return _PeerValue(entry.value) if entry is not None else self.loader(key)
+            finally:
+                self.store.release(key, owner)
+        entry = self._wait_for_peer(key)
+        if entry is not None:
+            return _PeerValue(entry.value)
+        # Anderer Worker hängt oder ist abgestürzt: selbst laden
+        return self.loader(key)
+
+    def _fresh_entries(self, keys: List[Hashable]) -> Dict[Hashable, CacheEntry]:
+        """Frische Einträge im Speicher (z.B. gerade von einem anderen Worker geladen)"""
+        now = self.clock()
+        fresh = {key: entry for key, entry in self.store.get_many(keys).items() if now < entry.fresh_until}
+        if fresh:
+            with self._lock:
+                self._stats['peer'] += len(fresh)
+        return fresh
+
+    def _wait_for_peer(self, key: Hashable) -> Optional[CacheEntry]:
+        """Wartet (höchstens LOCK_TTL), bis ein anderer Worker einen frischen Eintrag gespeichert hat"""
+        deadline = time.monotonic() + LOCK_TTL
+        while time.monotonic() < deadline:
+            entry = self._fresh_entries([key]).get(key)
+            if entry is not None:
+                return entry
+            time.sleep(PEER_POLL_INTERVAL)
+        return None
+
+    def _load_batched(self, keys: List[Hashable], batch_loader: Callable, batch_size: int) -> Dict[Hashable, Future]:
+        """Übernimmt nicht bereits ladende Schlüssel und verteilt sie in Batches auf den Pool"""
+        futures: Dict[Hashable, Future] = {}
+        claimed: List[Hashable] = []
+        with self._lock:
+            for key in keys:
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    self._stats['loads'] += 1
+                    claimed.append(key)
+                futures[key] = future
+        for start in range(0, len(claimed), batch_size):
+            chunk = claimed[start:start + batch_size]
+            self._fetch_pool.submit(self._run_batch, chunk, {key: futures[key] for key in chunk}, batch_loader)
+        return futures
+
+    def _run_batch(self, keys: List[Hashable], futures: Dict[Hashable, Future], batch_loader: Callable):
+        owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        mine = keys
+        if self.store.shared:
+            # Nur Schlüssel laden, die kein anderer Worker gerade lädt; die übrigen übernehmen
+            mine = [key for key in keys if self.store.acquire(key, owner, LOCK_TTL)]
+            for key in set(keys) - set(mine):
+                self._fetch_pool.submit(self._complete, key, futures[key], self._load_shared)
+            for key, entry in self._fresh_entries(mine).items():
+                self._complete(key, futures[key], lambda k, value=entry.value: _PeerValue(value))
+                self.store.release(key, owner)
+                mine.remove(key)
+        if not mine:
+            return
+        try:
+            values = batch_loader(mine)
+        except Exception as e:
+            logger.warning(f"⚠️ Batch mit {len(mine)} Schlüsseln fehlgeschlagen, lade einzeln: {e}")
+            values = {}
+        for key in mine:
+            if key in values:
+                self._complete(key, futures[key], lambda k, value=values[key]: value)
+            if self.store.shared:
+                self.store.release(key, owner)
+            if key not in values:
+                # Einzeln nachladen, ohne diesen Worker zu blockieren (kein Warten auf den eigenen Pool)
+                self._fetch_pool.submit(self._complete, key, futures[key], self._load_shared)
+
+    def _complete(self, key: Hashable, future: Future, load: Callable[[Hashable], Any]):
+        """Lädt einen übernommenen Schlüssel, speichert ihn und erfüllt den Future"""
+        try:
+            value = load(key)
+            if isinstance(value, _PeerValue):
+                value = value.value
+            else:
+                self.put(key, value)
+            future.set_result(value)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
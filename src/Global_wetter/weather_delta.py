@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Versionierte Deltas und Feld-Projektion für /api/weather/all
+
+Die Weltkugel fragt /api/weather/all regelmäßig ab, obwohl sich zwischen zwei Abfragen
+meist nur wenige Städte ändern. Der DeltaTracker merkt sich pro Stadt, in welcher Version
+sich ihre Werte zuletzt geändert haben:
+
+- Jede Änderung (Abrufzeit zählt nicht) erhöht die Version um 1
+- Ein Client schickt seine letzte Version (since=...) und erhält nur neuere Städte
+- Der Zähler und die Versionen pro Stadt liegen im Cache-Speicher (cache_store); bei einem
+  geteilten Speicher vergeben alle Worker-Prozesse dieselben Versionen
+- Versionen tragen eine Epoche (Anlage des Zählers); passt sie nicht (z.B. Neustart mit
+  MemoryStore), bekommt der Client eine vollständige Antwort
+
+Beispiel:
+    tracker = DeltaTracker(store=create_store("sqlite://", namespace="versions"))
+    version, changed = tracker.update(weather_data, since="3f2a-41")
+    payload = {city: project(weather_data[city], ["temperature", "description"]) for city in changed}
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cache_store import CacheEntry, MemoryStore
+
+# Felder eines Stadt-Eintrags, die sich für die Delta-Erkennung nicht "ändern"
+VOLATILE_FIELDS = ('abrufzeit',)
+
+# Schlüssel des Versionszustands im Speicher und Lebensdauer der Schreibsperre (Sekunden)
+STATE_KEY = '__versions__'
+STATE_LOCK_TTL = 5
+STATE_LOCK_POLL = 0.01
+
+# Der Zustand läuft im Speicher praktisch nicht ab
+STATE_LIFETIME = 10 * 365 * 24 * 3600
+
+# Felder, die per fields= angefordert werden können
+RECORD_FIELDS = (
+    'city', 'country', 'temperature', 'description', 'windspeed', 'winddirection',
+    'is_day', 'coordinates', 'abrufzeit', 'status', 'error'
+)
+
+
+def parse_fields(spec: Optional[str]) -> Optional[List[str]]:
+    """
+    Liest "temperature,description" in eine Feldliste (None = alle Felder).
+
+    :raises ValueError: Bei unbekannten Feldern
+    """
+    if not spec:
+        return None
+    fields = [field.strip() for field in spec.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in RECORD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unbekannte Felder: {', '.join(unknown)} (erlaubt: {', '.join(RECORD_FIELDS)})")
+    return fields
+
+
+def project(record: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Stadt-Eintrag auf die angeforderten Felder reduzieren (fehlende Felder entfallen)"""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def _comparable(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+
+
+def _fingerprint(record: Dict[str, Any]) -> str:
+    """Kurzer Hash über die vergleichbaren Felder eines Eintrags"""
+    text = json.dumps(_comparable(record), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class DeltaTracker:
+    """
+    Versionszähler über alle Städte; threadsicher und mit geteiltem Speicher auch
+    prozessübergreifend.
+
+    Zustand im Speicher: {"epoch": ..., "version": n, "cities": {Stadt: [Fingerprint, Version]}}
+    """
+
+    def __init__(self, store=None):
+        self.store = store or MemoryStore()
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Fingerprints pro Stadt, solange der Cache dasselbe Objekt liefert (spart das Hashen)
+        self._fingerprints: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def format_version(state: Dict[str, Any]) -> str:
+        return f"{state['epoch']}-{state['version']}"
+
+    @staticmethod
+    def parse_version(token: Optional[str], state: Dict[str, Any]) -> Optional[int]:
+        """Versionsnummer aus einem Token dieses Zählers; None bei fremder Epoche oder Unsinn"""
+        if not token:
+            return None
+        epoch, _, number = token.rpartition('-')
+        if epoch != state['epoch'] or not number.isdigit() or int(number) > state['version']:
+            return None
+        return int(number)
+
+    def update(self, records: Dict[str, Dict[str, Any]], since: Optional[str] = None) -> Tuple[str, Optional[List[str]]]:
+        """
+        Übernimmt den aktuellen Stand aller Städte.
+
+        :param records: Stadtname -> Eintrag
+        :param since: Letzte Version des Clients
+        :returns: (aktuelle Version, Städte mit Änderungen seit since) - None statt Liste,
+                  wenn der Client eine vollständige Antwort braucht
+        """
+        fingerprints = self._fingerprints_for(records)
+        state = self._load()
+        if state is None or self._changed(state, fingerprints):
+            # Nur bei Änderungen schreiben; unter Sperre neu lesen, da ein anderer Worker
+            # dieselben Änderungen inzwischen eingetragen haben kann
+            with self._lock:
+                self._acquire()
+                try:
+                    # Kopie: MemoryStore liefert dasselbe Objekt, das andere Threads gerade lesen
+                    state = self._load() or {'epoch': uuid.uuid4().hex[:8], 'version': 0, 'cities': {}}
+                    state = dict(state, cities=dict(state['cities']))
+                    changed_now = self._changed(state, fingerprints)
+                    if changed_now:
+                        state['version'] += 1
+                        for city in changed_now:
+                            state['cities'][city] = [fingerprints[city], state['version']]
+                        self._save(state)
+                finally:
+                    self.store.release(STATE_KEY, self._owner)
+
+        base = self.parse_version(since, state)
+        if base is None:
+            return self.format_version(state), None
+        return self.format_version(state), [
+            city for city in records if state['cities'][city][1] > base
+        ]
+
+    def _fingerprints_for(self, records: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        fingerprints = {}
+        for city, record in records.items():
+            cached = self._fingerprints.get(city)
+            if cached is None or cached[0] is not record:
+                cached = (record, _fingerprint(record))
+                self._fingerprints[city] = cached
+            fingerprints[city] = cached[1]
+        return fingerprints
+
+    @staticmethod
+    def _changed(state: Dict[str, Any], fingerprints: Dict[str, str]) -> List[str]:
+        cities = state['cities']
+        return [city for city, fingerprint in fingerprints.items()
+                if city not in cities or cities[city][0] != fingerprint]
+
+    def _acquire(self):
+        # Abgelaufene Sperren (abgestürzter Worker) übernimmt der Speicher selbst
+        while not self.store.acquire(STATE_KEY, self._owner, STATE_LOCK_TTL):
+            time.sleep(STATE_LOCK_POLL)
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        entry = self.store.get_many([STATE_KEY]).get(STATE_KEY)
+        return None if entry is None else entry.value
+
+    def _save(self, state: Dict[str, Any]):
+        now = time.time()
+        self.store.set(STATE_KEY, CacheEntry(state, now, now + STATE_LIFETIME, now + STATE_LIFETIME))
@@ -0,0 +1,595 @@
+"""
+tool_runner.py
+Warmer Runner für die m*.py-Werkzeuge der GUI.
+
+Plugin-Protokoll: Ein m-Skript stellt eine Einstiegsfunktion `main(argv=None)` bereit,
+die ihre Argumente mit `parser.parse_args(argv)` liest und optional einen Exit-Code
+zurückgibt. Solche Skripte laufen in vorgestarteten Worker-Prozessen, in denen
+requests, psutil und env_config bereits importiert sind - Interpreterstart und
+Imports sind beim Klick schon erledigt. Jeder Worker führt genau einen Lauf aus
+und beendet sich danach (Isolation pro Lauf); ein Ersatz wird sofort im
+Hintergrund vorgewärmt.
+
+Skripte ohne Einstiegsfunktion laufen wie bisher als eigener Python-Prozess.
+
+Die Ausgabe wird zeilenweise gestreamt und in einem Ringpuffer begrenzt; Läufe haben
+einen Timeout und können abgebrochen werden (inklusive aller Kindprozesse).
+
+Beispiel:
+    runner = ToolRunner(os.path.dirname(__file__))
+    result = runner.run("m004_api_checker.py", ["--url", "https://example.com"])
+    print(result.stdout)
+
+    run = runner.start("m005_gesundheitschecker.py", ["--url", "https://example.com"], timeout=60)
+    print(run.output())  # bisherige Ausgabe, der Lauf geht im Hintergrund weiter
+"""
+
+import ast
+import importlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+import psutil
+
+# Module, die jeder Worker vor dem ersten Lauf importiert
+PRELOAD_MODULES = ["requests", "psutil", "json", "argparse", "env_config"]
+
+# Anzahl vorgewärmter Worker-Prozesse
+WARM_WORKERS = 2
+
+# Standard-Timeout pro Lauf (Sekunden); None = unbegrenzt
+DEFAULT_TIMEOUT = 120
+
+# Ringpuffer für die Ausgabe: maximale Zeilenzahl und Zeichen pro Zeile
+MAX_OUTPUT_LINES = 2000
+MAX_LINE_CHARS = 4000
+
+# Maximale Anzahl gemerkter Läufe (ältere, beendete Läufe werden verworfen)
+MAX_TRACKED_RUNS = 500
+
+# Gleichzeitige Läufe eines Batches (Werkzeuge × URLs)
+BATCH_MAX_PARALLEL = 8
+
+
+@dataclass(frozen=True)
+class ToolInfo:
+    """Ein gefundenes m*.py-Werkzeug"""
+    name: str
+    path: str
+    entry: bool  # True = stellt main(argv) bereit und läuft im warmen Worker
+
+
+@dataclass
+class ToolResult:
+    """Ergebnis eines Werkzeuglaufs"""
+    tool: str
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    duration_ms: float
+    mode: str  # "warm" | "subprocess"
+
+
+def has_entry_function(path: str) -> bool:
+    """Prüft ohne Import, ob das Skript eine Funktion main(argv) auf Modulebene definiert."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return False
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == 'main':
+            return bool(node.args.args or node.args.vararg)
+    return False
+
+
+class ToolRegistry:
+    """
+    Gecachte Erkennung der m*.py-Werkzeuge.
+
+    Das Verzeichnis wird nur neu gelesen, wenn sich seine Änderungszeit ändert;
+    einzelne Dateien werden nur neu geparst, wenn sich ihre Änderungszeit ändert.
+    """
+
+    def __init__(self, base_path: str, prefix: str = 'm'):
+        self.base_path = base_path
+        self.prefix = prefix
+        self._dir_mtime: Optional[float] = None
+        self._tools: List[ToolInfo] = []
+        self._parsed: Dict[str, Tuple[float, ToolInfo]] = {}
+        self._lock = threading.Lock()
+
+    def tools(self) -> List[ToolInfo]:
+        """Liefert alle Werkzeuge, sortiert nach Dateiname"""
+        with self._lock:
+            dir_mtime = os.stat(self.base_path).st_mtime
+            if dir_mtime != self._dir_mtime:
+                self._tools = self._scan()
+                self._dir_mtime = dir_mtime
+            return list(self._tools)
+
+    def get(self, name: str) -> Optional[ToolInfo]:
+        """Liefert ein Werkzeug anhand des Dateinamens; geänderte Dateien werden neu geprüft"""
+        tool = next((t for t in self.tools() if t.name == name), None)
+        if tool is None:
+            return None
+        with self._lock:
+            return self._info(tool.name, tool.path)
+
+    def _scan(self) -> List[ToolInfo]:
+        tools = []
+        for entry in sorted(os.scandir(self.base_path), key=lambda e: e.name):
+            if entry.is_file() and entry.name.startswith(self.prefix) and entry.name.endswith('.py'):
+                tools.append(self._info(entry.name, entry.path))
+        return tools
+
+    def _info(self, name: str, path: str) -> ToolInfo:
+        mtime = os.stat(path).st_mtime
+        cached = self._parsed.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, ToolInfo(name=name, path=path, entry=has_entry_function(path)))
+            self._parsed[path] = cached
+        return cached[1]
+
+
+def _worker_main(preload: List[str]):
+    """
+    Einstieg des Worker-Prozesses: Module vorladen, auf genau einen Auftrag
+    (eine JSON-Zeile auf stdin) warten und ihn mit den echten stdout/stderr ausführen.
+    """
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+    line = sys.stdin.readline()
+    if not line:
+        return 0
+    task = json.loads(line)
+    path, argv = task['path'], task['argv']
+    sys.argv = [path] + argv
+
+    # Eigener Modulname: der __main__-Block des Skripts wird nicht ausgeführt
+    spec = importlib.util.spec_from_file_location("_mp_tool", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    result = module.main(argv)
+    return result if isinstance(result, int) else 0
+
+
+def _worker_entry(preload: List[str]):
+    """Führt den Auftrag aus und beendet den Prozess ohne langsamen Interpreter-Abbau."""
+    try:
+        code = _worker_main(preload)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+def _worker_env() -> Dict[str, str]:
+    # Ungepufferte UTF-8-Ausgabe, damit Zeilen sofort bei der GUI ankommen
+    return dict(os.environ, PYTHONIOENCODING='utf-8', PYTHONUNBUFFERED='1')
+
+
+class _WarmWorker:
+    """Ein vorgestarteter Python-Prozess, der auf seinen Auftrag wartet"""
+
+    def __init__(self, base_path: str, preload: List[str]):
+        # cwd (= Werkzeugverzeichnis) steht bei -c bereits vorne in sys.path
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        code = (f"import sys; sys.path.append({module_dir!r}); "
+                f"import tool_runner; tool_runner._worker_entry({preload!r})")
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", code],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            cwd=base_path,
+            env=_worker_env()
+        )
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    @staticmethod
+    def task(path: str, argv: List[str]) -> str:
+        """Auftragszeile für stdin; danach gehören stdout/stderr des Prozesses diesem Lauf"""
+        return json.dumps({'path': path, 'argv': list(argv)}) + '\n'
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+def kill_process_tree(process: subprocess.Popen):
+    """Beendet einen Prozess samt aller Kindprozesse (z.B. von Werkzeugen gestartete Subprozesse)."""
+    try:
+        parent = psutil.Process(process.pid)
+        children = parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        children = []
+    for child in children:
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
+    if process.poll() is None:
+        process.kill()
+    psutil.wait_procs(children, timeout=3)
+
+
+class ToolRun:
+    """
+    Ein laufender oder abgeschlossener Werkzeuglauf.
+
+    stdout und stderr werden zeilenweise von Hintergrund-Threads gelesen und in einem
+    Ringpuffer abgelegt, damit die GUI die Ausgabe live anzeigen kann, ohne dass ein
+    außer Kontrolle geratenes Skript den Speicher des Streamlit-Servers füllt.
+    """
+
+    def __init__(self, run_id: str, tool: ToolInfo, mode: str, process: subprocess.Popen,
+                 timeout: Optional[float] = None, max_lines: int = MAX_OUTPUT_LINES):
+        self.run_id = run_id
+        self.tool = tool
+        self.mode = mode
+        self.process = process
+        self.timeout = timeout
+        self.status = 'running'  # running | done | timeout | cancelled
+        self.returncode: Optional[int] = None
+        self.dropped_lines = 0
+        self._lines: Deque[Tuple[str, str]] = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._end_time: Optional[float] = None
+        self._finished = threading.Event()
+        self._readers = [
+            threading.Thread(target=self._read, args=(process.stdout, 'stdout'), daemon=True),
+            threading.Thread(target=self._read, args=(process.stderr, 'stderr'), daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def duration_ms(self) -> float:
+        end_time = self._end_time or time.time()
+        return round((end_time - self._start_time) * 1000, 2)
+
+    def lines(self, channel: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Gepufferte Ausgabe als (Kanal, Zeile); mit channel nur 'stdout' oder 'stderr'"""
+        with self._lock:
+            return [entry for entry in self._lines if channel is None or entry[0] == channel]
+
+    def output(self, channel: Optional[str] = None) -> str:
+        """Gepufferte Ausgabe als Text"""
+        return ''.join(line for _, line in self.lines(channel))
+
+    def cancel(self):
+        """Bricht den Lauf ab und beendet den gesamten Prozessbaum"""
+        with self._lock:
+            if self.status != 'running':
+                return
+            self.status = 'cancelled'
+        kill_process_tree(self.process)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wartet auf das Ende des Laufs; True, wenn er beendet ist"""
+        return self._finished.wait(timeout)
+
+    def result(self) -> ToolResult:
+        """Wartet auf das Ende und liefert das Ergebnis mit der (ggf. gekürzten) Ausgabe"""
+        self.wait()
+        return ToolResult(tool=self.tool.name, returncode=self.returncode, stdout=self.output('stdout'),
+                          stderr=self.output('stderr'), duration_ms=self.duration_ms, mode=self.mode)
+
+    def _read(self, stream, channel: str):
+        # Begrenzte Zeilenlänge: auch Ausgabe ohne Zeilenumbrüche landet stückweise im Ringpuffer
+        for line in iter(lambda: stream.readline(MAX_LINE_CHARS), ''):
+            with self._lock:
+                if len(self._lines) == self._lines.maxlen:
+                    self.dropped_lines += 1
+                self._lines.append((channel, line))
+        stream.close()
+
+    def _watch(self):
+        try:
+            self.process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            with self._lock:
+                timed_out = self.status == 'running'
+                if timed_out:
+                    self.status = 'timeout'
+            if timed_out:
+                kill_process_tree(self.process)
+            self.process.wait()
+        for reader in self._readers:
+            reader.join()
+        with self._lock:
+            self.returncode = self.process.returncode
+            self._end_time = time.time()
+            if self.status == 'running':
+                self.status = 'done'
+        self._finished.set()
+
+
+class ToolRunner:
+    """
+    Führt m*.py-Werkzeuge aus: mit Einstiegsfunktion in warmen Einmal-Workern,
+    sonst als klassischer Subprozess.
+    """
+
+    def __init__(self, base_path: str, warm_workers: int = WARM_WORKERS,
+                 preload: Optional[List[str]] = None):
+        self.base_path = base_path
+        self.registry = ToolRegistry(base_path)
+        self.warm_workers = warm_workers
+        self.preload = list(PRELOAD_MODULES if preload is None else preload)
+        self._spares: List[_WarmWorker] = []
+        # Zusätzliche Ziele laufender prewarm()-Aufrufe und gerade startende Worker
+        self._boosts: List[int] = []
+        self._spawning = 0
+        self._runs: "OrderedDict[str, ToolRun]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._refill()
+
+    def tools(self) -> List[ToolInfo]:
+        """Gecachte Liste der verfügbaren Werkzeuge"""
+        return self.registry.tools()
+
+    def start(self, name: str, argv: List[str], timeout: Optional[float] = DEFAULT_TIMEOUT,
+              run_id: Optional[str] = None) -> ToolRun:
+        """Startet ein Werkzeug im Hintergrund; die Ausgabe ist sofort über ToolRun abrufbar."""
+        tool = self.registry.get(name)
+        if tool is None:
+            raise FileNotFoundError(f"Werkzeug nicht gefunden: {name}")
+
+        if tool.entry:
+            process = self._take_worker().process
+            try:
+                process.stdin.write(_WarmWorker.task(tool.path, argv))
+                process.stdin.close()
+            except OSError:
+                # Worker ist zwischenzeitlich gestorben - der Lauf endet mit dessen Exit-Code
+                pass
+            mode = 'warm'
+        else:
+            process = subprocess.Popen(
+                [sys.executable, tool.path] + list(argv),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                cwd=self.base_path,
+                env=_worker_env()
+            )
+            mode = 'subprocess'
+
+        run = ToolRun(run_id or uuid.uuid4().hex, tool, mode, process, timeout=timeout)
+        with self._lock:
+            self._runs[run.run_id] = run
+            self._prune()
+        return run
+
+    def run(self, name: str, argv: List[str], timeout: Optional[float] = DEFAULT_TIMEOUT) -> ToolResult:
+        """Führt ein Werkzeug aus und wartet auf das Ergebnis."""
+        return self.start(name, argv, timeout=timeout).result()
+
+    def get(self, run_id: str) -> Optional[ToolRun]:
+        """Liefert den Lauf zu einer Run-ID"""
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def shutdown(self):
+        """Bricht laufende Werkzeuge ab und beendet alle vorgewärmten Worker"""
+        with self._lock:
+            self._closed = True
+            spares, self._spares = self._spares, []
+            runs = list(self._runs.values())
+        for run in runs:
+            run.cancel()
+        for worker in spares:
+            worker.close()
+
+    def _take_worker(self) -> _WarmWorker:
+        worker = None
+        with self._lock:
+            while self._spares and worker is None:
+                candidate = self._spares.pop(0)
+                if candidate.alive():
+                    worker = candidate
+                else:
+                    candidate.close()
+        # Verbrauchten Worker sofort im Hintergrund ersetzen
+        threading.Thread(target=self._refill, daemon=True).start()
+        return worker or _WarmWorker(self.base_path, self.preload)
+
+    def prewarm(self, count: int):
+        """
+        Wärmt vorübergehend bis zu `count` Worker vor (z.B. vor einem Batch-Lauf); mit
+        end_prewarm(count) wieder freigeben.
+        """
+        with self._lock:
+            self._boosts.append(count)
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def end_prewarm(self, count: int):
+        """Gibt ein prewarm(count) frei und beendet überzählige Reserve-Worker"""
+        with self._lock:
+            if count in self._boosts:
+                self._boosts.remove(count)
+            target = self._target()
+            surplus, self._spares = self._spares[target:], self._spares[:target]
+        for worker in surplus:
+            worker.close()
+
+    def _target(self) -> int:
+        return max([self.warm_workers] + self._boosts)
+
+    def _refill(self):
+        # Prozesse außerhalb der Sperre starten, damit _take_worker() nicht auf Popen wartet
+        while True:
+            with self._lock:
+                if self._closed or len(self._spares) + self._spawning >= self._target():
+                    return
+                self._spawning += 1
+            worker = None
+            try:
+                worker = _WarmWorker(self.base_path, self.preload)
+            finally:
+                with self._lock:
+                    self._spawning -= 1
+                    # Inzwischen geschlossen oder Ziel gesenkt: Worker wird nicht mehr gebraucht
+                    if worker is not None and not self._closed and len(self._spares) < self._target():
+                        self._spares.append(worker)
+                        worker = None
+            if worker is not None:
+                worker.close()
+                return
+
+    def _prune(self):
+        # Nur beendete Läufe verwerfen, laufende bleiben abrufbar
+        while len(self._runs) > MAX_TRACKED_RUNS:
+            oldest_done = next((rid for rid, run in self._runs.items() if run.done), None)
+            if oldest_done is None:
+                break
+            del self._runs[oldest_done]
+
+
+class ToolBatch:
+    """
+    Führt mehrere Werkzeuge gegen viele URLs aus (alle Kombinationen URL × Werkzeug).
+
+    Ein Dispatcher-Thread startet die Läufe über den ToolRunner und hält dabei höchstens
+    `max_parallel` Prozesse gleichzeitig am Laufen. Der Zustand jeder Zelle ist jederzeit
+    über matrix() abrufbar, sodass die GUI die Ergebnisse live anzeigen kann.
+    """
+
+    def __init__(self, runner: ToolRunner, tools: List[str], urls: List[str],
+                 max_parallel: int = BATCH_MAX_PARALLEL, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 extra_args: Optional[List[str]] = None):
+        self.batch_id = uuid.uuid4().hex
+        self.runner = runner
+        self.tools = list(tools)
+        self.urls = list(urls)
+        self.max_parallel = max(1, max_parallel)
+        self.timeout = timeout
+        self.extra_args = list(extra_args or [])
+        self.cells: Dict[Tuple[str, str], Optional[ToolRun]] = {(url, tool): None for url in self.urls for tool in self.tools}
+        self.errors: Dict[Tuple[str, str], str] = {}
+        self._slots = threading.Semaphore(self.max_parallel)
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._prewarm_count = min(self.max_parallel, len(self.cells))
+        self.runner.prewarm(self._prewarm_count)
+        self._dispatcher.start()
+
+    @property
+    def done(self) -> bool:
+        finished, total = self.progress()
+        if finished == total:
+            return True
+        # Abgebrochen: fertig, sobald keine gestarteten Läufe mehr aktiv sind
+        with self._lock:
+            runs = [run for run in self.cells.values() if run is not None]
+        return self._cancelled.is_set() and not self._dispatcher.is_alive() and all(run.done for run in runs)
+
+    @property
+    def duration_ms(self) -> float:
+        return round((time.time() - self._start_time) * 1000, 2)
+
+    def progress(self) -> Tuple[int, int]:
+        """(fertige Zellen, Zellen insgesamt)"""
+        with self._lock:
+            finished = sum(1 for run in self.cells.values() if run is not None and run.done) + len(self.errors)
+            return finished, len(self.cells)
+
+    def run(self, url: str, tool: str) -> Optional[ToolRun]:
+        """Lauf einer Zelle (None = noch nicht gestartet)"""
+        with self._lock:
+            return self.cells.get((url, tool))
+
+    def matrix(self) -> List[Dict[str, object]]:
+        """Zeilen URL × Werkzeug mit Zustand jeder Zelle, z.B. {'url': ..., 'm004_api_checker.py': {...}}"""
+        rows = []
+        for url in self.urls:
+            row: Dict[str, object] = {'url': url}
+            for tool in self.tools:
+                run = self.run(url, tool)
+                if (url, tool) in self.errors:
+                    cell = {'status': 'error', 'returncode': None, 'duration_ms': None}
+                elif run is None:
+                    cell = {'status': 'cancelled' if self._cancelled.is_set() else 'pending',
+                            'returncode': None, 'duration_ms': None}
+                else:
+                    cell = {'status': run.status, 'returncode': run.returncode, 'duration_ms': run.duration_ms}
+                row[tool] = cell
+            rows.append(row)
+        return rows
+
+    def cancel(self):
+        """Startet keine weiteren Läufe und bricht laufende ab"""
+        self._cancelled.set()
+        with self._lock:
+            runs = [run for run in self.cells.values() if run is not None]
+        for run in runs:
+            run.cancel()
+
+    def _dispatch(self):
+        try:
+            self._dispatch_all()
+        finally:
+            # Alle Läufe gestartet (oder abgebrochen): zusätzliche Reserve-Worker freigeben
+            self.runner.end_prewarm(self._prewarm_count)
+
+    def _dispatch_all(self):
+        for url, tool in list(self.cells):
+            self._slots.acquire()
+            if self._cancelled.is_set():
+                self._slots.release()
+                break
+            try:
+                run = self.runner.start(tool, ['--url', url] + self.extra_args, timeout=self.timeout)
+            except Exception as e:
+                with self._lock:
+                    self.errors[(url, tool)] = str(e)
+                self._slots.release()
+                continue
+            with self._lock:
+                self.cells[(url, tool)] = run
+            threading.Thread(target=self._release_when_done, args=(run,), daemon=True).start()
+
+    def _release_when_done(self, run: ToolRun):
+        run.wait()
+        self._slots.release()
@@ -0,0 +1,413 @@
+"""
+translation_memory.py
+Translation Memory mit unscharfer Suche für Mini Postman.
+
+API-Responses unterscheiden sich oft nur in IDs, Zahlen oder Zeitstempeln. Die
+Translation Memory zerlegt Texte in Segmente (Zeilen), merkt sich bereits übersetzte
+Segmente und findet Beinahe-Duplikate über MinHash-Signaturen (LSH-Buckets).
+Bei einem Treffer werden die abweichenden Tokens in der gespeicherten Übersetzung
+ersetzt - nur wirklich neue Segmente gehen an den Übersetzungsserver.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Variable Tokens: Zeitstempel, UUIDs, E-Mails, URLs, Hex-IDs und alles mit Ziffern
+_VARIABLE_PATTERN = (
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    r"|https?://[^\s\"']+"
+    r"|\w*\d[\w.:-]*"
+)
+_TOKEN_RE = re.compile(rf"(?:{_VARIABLE_PATTERN})|\w+|[^\w\s]|\s+")
+_VARIABLE_RE = re.compile(rf"^(?:{_VARIABLE_PATTERN})$")
+_WORD_RE = re.compile(r"\w")
+
+# MinHash-Parameter: 32 Hashfunktionen in 8 Bändern à 4 Zeilen
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), 'big') % _PRIME | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), 'big') % _PRIME)
+    for i in range(NUM_PERM)
+]
+
+
+def tokenize(segment: str) -> List[str]:
+    """Zerlegt ein Segment verlustfrei in Tokens (''.join(tokens) == segment)."""
+    return _TOKEN_RE.findall(segment)
+
+
+def is_variable(token: str) -> bool:
+    """True für IDs, Zahlen, Zeitstempel usw., die beim Übersetzen unverändert bleiben."""
+    return bool(_VARIABLE_RE.match(token))
+
+
+def _template(tokens: List[str]) -> str:
+    """Segment mit maskierten variablen Tokens (Schlüssel für Vorlagen-Treffer)"""
+    return ''.join('\x00' if is_variable(t) else t for t in tokens)
+
+
+def _shingles(tokens: List[str]) -> Set[str]:
+    words = ['#' if is_variable(t) else t.lower() for t in tokens if not t.isspace()]
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _minhash(shingles: Set[str]) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big') for s in shingles]
+    if not hashes:
+        return tuple([0] * NUM_PERM)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def _band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+def _needs_translation(segment: str) -> bool:
+    """Segmente ohne Wörter (Klammern, Zahlen, leere Zeilen) werden nicht übersetzt."""
+    return any(_WORD_RE.search(t) and not is_variable(t) for t in tokenize(segment))
+
+
+@dataclass
+class _Entry:
+    tokens: List[str]
+    translation: str
+    shingles: Set[str]
+    band_keys: List[Tuple[int, Tuple[int, ...]]]
+
+
+@dataclass
+class MemoryStats:
+    """Trefferstatistik der Translation Memory"""
+    segments: int = 0
+    exact_hits: int = 0
+    fuzzy_hits: int = 0
+    misses: int = 0
+    time_saved_ms: float = 0.0
+    translated_segments: int = 0
+    translation_time_ms: float = 0.0
+
+    @property
+    def hits(self) -> int:
+        return self.exact_hits + self.fuzzy_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def avg_segment_ms(self) -> float:
+        return self.translation_time_ms / self.translated_segments if self.translated_segments else 0.0
+
+
+@dataclass
+class MemoryTranslation:
+    """Ergebnis von TranslationMemory.translate"""
+    text: str
+    hits: int = 0
+    misses: int = 0
+    sent_segments: List[str] = field(default_factory=list)
+
+
+class TranslationMemory:
+    """
+    Segmentbasierte Translation Memory mit MinHash-Index (threadsafe).
+
+    :param max_entries: Maximale Anzahl gespeicherter Segmente pro Sprachpaar (LRU)
+    :param min_similarity: Mindest-Jaccard-Ähnlichkeit für unscharfe Treffer
+    """
+
+    def __init__(self, max_entries: int = 5000, min_similarity: float = 0.5):
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.stats = MemoryStats()
+        self._entries: Dict[Tuple[str, str], "OrderedDict[str, _Entry]"] = {}
+        self._templates: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._buckets: Dict[Tuple[str, str], Dict[Tuple[int, Tuple[int, ...]], Set[str]]] = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Lookup & Speichern
+    # -------------------------------------------------------------------------
+
+    def lookup(self, segment: str, source: str, target: str) -> Optional[str]:
+        """Sucht eine Übersetzung für ein Segment (exakt, per Vorlage oder unscharf)."""
+        tokens = tokenize(segment)
+        with self._lock:
+            translation, exact = self._find((source, target), segment, tokens)
+            if translation is None:
+                return self._miss()
+            return self._hit(translation, exact=exact)
+
+    def store(self, segment: str, translation: str, source: str, target: str):
+        """Speichert eine neue Segment-Übersetzung."""
+        pair = (source, target)
+        tokens = tokenize(segment)
+        shingles = _shingles(tokens)
+        entry = _Entry(tokens=tokens, translation=translation, shingles=shingles,
+                       band_keys=_band_keys(_minhash(shingles)))
+        with self._lock:
+            entries = self._entries.setdefault(pair, OrderedDict())
+            templates = self._templates.setdefault(pair, {})
+            buckets = self._buckets.setdefault(pair, {})
+
+            if segment in entries:
+                self._remove(pair, segment)
+            entries[segment] = entry
+            templates[_template(tokens)] = segment
+            for band_key in entry.band_keys:
+                buckets.setdefault(band_key, set()).add(segment)
+
+            while len(entries) > self.max_entries:
+                self._remove(pair, next(iter(entries)))
+
+    def record_translation_time(self, segments: int, duration_ms: float):
+        """Misst die echte Übersetzungszeit, um die eingesparte Zeit schätzen zu können."""
+        with self._lock:
+            self.stats.translated_segments += segments
+            self.stats.translation_time_ms += duration_ms
+
+    # -------------------------------------------------------------------------
+    # Texte übersetzen
+    # -------------------------------------------------------------------------
+
+    def translate(self, text: str, source: str, target: str,
+                  translate_segments: Callable[[List[str]], List[str]]) -> MemoryTranslation:
+        """
+        Übersetzt einen Text segmentweise; nur neue Segmente gehen an translate_segments.
+
+        :param text: Zu übersetzender Text (Segmente = Zeilen, Einrückung bleibt erhalten)
+        :param translate_segments: Übersetzt eine Liste von Segmenten in einem Aufruf
+        :returns: MemoryTranslation mit zusammengesetztem Text und Trefferzahlen
+        """
+        lines = text.split('\n')
+        output: List[Optional[str]] = []
+        novel: Dict[str, List[int]] = {}
+        result = MemoryTranslation(text='')
+
+        for index, line in enumerate(lines):
+            stripped = line.strip()
+            if not _needs_translation(stripped):
+                output.append(line)
+                continue
+            with self._lock:
+                self.stats.segments += 1
+            cached = self.lookup(stripped, source, target)
+            if cached is not None:
+                output.append(self._reindent(line, cached))
+                result.hits += 1
+            else:
+                output.append(None)
+                novel.setdefault(stripped, []).append(index)
+                result.misses += 1
+
+        if novel:
+            def send(segments: List[str]):
+                start_time = time.perf_counter()
+                translations = translate_segments(segments)
+                self.record_translation_time(len(segments), (time.perf_counter() - start_time) * 1000)
+                result.sent_segments.extend(segments)
+                for segment, translation in zip(segments, translations):
+                    self.store(segment, translation, source, target)
+                    for index in novel[segment]:
+                        output[index] = self._reindent(lines[index], translation)
+
+            # Pro Vorlage nur einen Vertreter senden; Geschwister, die sich nur in IDs
+            # oder Zahlen unterscheiden, werden danach per Ersetzung bedient
+            representatives: Dict[str, str] = {}
+            for segment in novel:
+                representatives.setdefault(_template(tokenize(segment)), segment)
+            send(list(representatives.values()))
+
+            unresolved = []
+            sent = set(representatives.values())
+            for segment in (s for s in novel if s not in sent):
+                with self._lock:
+                    translation, _ = self._find((source, target), segment, tokenize(segment))
+                    if translation is not None:
+                        occurrences = len(novel[segment])
+                        self.stats.misses -= occurrences
+                        for _ in range(occurrences):
+                            self._hit(translation, exact=False)
+                if translation is None:
+                    unresolved.append(segment)
+                    continue
+                result.misses -= len(novel[segment])
+                result.hits += len(novel[segment])
+                for index in novel[segment]:
+                    output[index] = self._reindent(lines[index], translation)
+            if unresolved:
+                send(unresolved)
+
+        result.text = '\n'.join(output)
+        return result
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = MemoryStats()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    # -------------------------------------------------------------------------
+    # Persistenz (gemeinsamer Cache für GUI und Excel-Tool)
+    # -------------------------------------------------------------------------
+
+    def save(self, path: str, merge: bool = False):
+        """
+        Speichert alle Segmente als JSON-Datei (Index wird beim Laden neu aufgebaut).
+
+        :param merge: Segmente behalten, die nur in der Datei stehen (z.B. vom Excel-Tool
+                      geschrieben oder aus einer kleineren Memory bereits verdrängt)
+        """
+        data = {}
+        if merge and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = {pair: dict(items) for pair, items in json.load(f).items()}
+        with self._lock:
+            for (source, target), entries in self._entries.items():
+                segments = data.setdefault(f"{source}|{target}", {})
+                segments.update((segment, entry.translation) for segment, entry in entries.items())
+        data = {pair: [[segment, translation] for segment, translation in segments.items()]
+                for pair, segments in data.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Lädt Segmente aus einer JSON-Datei; gibt die Anzahl geladener Segmente zurück."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        count = 0
+        for pair, items in data.items():
+            source, _, target = pair.partition('|')
+            for segment, translation in items:
+                self.store(segment, translation, source, target)
+                count += 1
+        return count
+
+    # -------------------------------------------------------------------------
+    # Interne Helfer (Aufruf unter self._lock)
+    # -------------------------------------------------------------------------
+
+    def _find(self, pair: Tuple[str, str], segment: str, tokens: List[str]) -> Tuple[Optional[str], bool]:
+        """Sucht ohne Statistik: (Übersetzung oder None, exakter Treffer?)"""
+        entries = self._entries.get(pair)
+        if not entries:
+            return None, False
+
+        # 1. Exakter Treffer
+        entry = entries.get(segment)
+        if entry is not None:
+            entries.move_to_end(segment)
+            return entry.translation, True
+
+        # 2. Gleiche Vorlage (nur variable Tokens unterscheiden sich)
+        key = self._templates[pair].get(_template(tokens))
+        if key is not None:
+            translation = self._substitute(entries[key], tokens)
+            if translation is not None:
+                entries.move_to_end(key)
+                return translation, False
+
+        # 3. Beinahe-Duplikat über MinHash-Buckets
+        shingles = _shingles(tokens)
+        candidates = set()
+        for band_key in _band_keys(_minhash(shingles)):
+            candidates |= self._buckets[pair].get(band_key, set())
+
+        best = None
+        for candidate in candidates:
+            candidate_entry = entries[candidate]
+            union = shingles | candidate_entry.shingles
+            similarity = len(shingles & candidate_entry.shingles) / len(union) if union else 0.0
+            if similarity >= self.min_similarity and (best is None or similarity > best[0]):
+                best = (similarity, candidate)
+        if best is not None:
+            translation = self._substitute(entries[best[1]], tokens)
+            if translation is not None:
+                entries.move_to_end(best[1])
+                return translation, False
+
+        return None, False
+
+    def _hit(self, translation: str, exact: bool) -> str:
+        if exact:
+            self.stats.exact_hits += 1
+        else:
+            self.stats.fuzzy_hits += 1
+        self.stats.time_saved_ms += self.stats.avg_segment_ms
+        return translation
+
+    def _miss(self):
+        self.stats.misses += 1
+        return None
+
+    def _remove(self, pair: Tuple[str, str], segment: str):
+        entry = self._entries[pair].pop(segment)
+        template = _template(entry.tokens)
+        if self._templates[pair].get(template) == segment:
+            del self._templates[pair][template]
+        for band_key in entry.band_keys:
+            bucket = self._buckets[pair].get(band_key)
+            if bucket is not None:
+                bucket.discard(segment)
+                if not bucket:
+                    del self._buckets[pair][band_key]
+
+    @staticmethod
+    def _substitute(entry: _Entry, tokens: List[str]) -> Optional[str]:
+        """
+        Überträgt die Übersetzung auf das neue Segment, indem abweichende Tokens
+        ersetzt werden. Nur 1:1-Ersetzungen von IDs, Zahlen und Eigennamen, die
+        unverändert in der Übersetzung vorkommen - sonst None (echte Übersetzung nötig).
+        """
+        replacements: Dict[str, str] = {}
+        matcher = SequenceMatcher(a=entry.tokens, b=tokens, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            if tag != 'replace' or (i2 - i1) != (j2 - j1):
+                return None
+            for old, new, position in zip(entry.tokens[i1:i2], tokens[j1:j2], range(i1, i2)):
+                if old.isspace() and new.isspace():
+                    continue
+                substitutable = is_variable(old) and is_variable(new)
+                # Eigennamen (großgeschrieben, nicht am Segmentanfang) werden selten übersetzt
+                proper_noun = position > 0 and old[:1].isupper() and new[:1].isupper() and old.isalpha() and new.isalpha()
+                if not (substitutable or proper_noun) or replacements.get(old, new) != new:
+                    return None
+                replacements[old] = new
+
+        if not replacements:
+            return entry.translation
+        # Alle Ersetzungen in einem Durchlauf, damit sie sich nicht gegenseitig überschreiben
+        alternatives = '|'.join(re.escape(old) for old in sorted(replacements, key=len, reverse=True))
+        pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)")
+        if len(set(pattern.findall(entry.translation))) != len(replacements):
+            return None
+        return pattern.sub(lambda match: replacements[match.group(0)], entry.translation)
+
+    @staticmethod
+    def _reindent(original_line: str, translation: str) -> str:
+        indent = original_line[:len(original_line) - len(original_line.lstrip())]
+        return indent + translation.strip()
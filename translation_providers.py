@@ -0,0 +1,390 @@
+"""
+translation_providers.py
+Übersetzungs-Provider und latenzbewusster Router für Mini Postman.
+
+Jeder Provider (LibreTranslate, Google, Azure, OpenAI) führt eine eigene Statistik
+(EWMA-Latenz, p95, Fehlerzähler). Der Router schickt jeden Aufruf an den schnellsten
+gesunden Provider und kann optional eine Hedge-Anfrage an einen zweiten Provider
+senden, wenn der erste länger als sein p95 braucht. Alle Basis-URLs sind
+konfigurierbar, damit sich der Router gegen lokale Stub-Server testen lässt.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from env_config import APIConfig
+
+
+class TranslationError(Exception):
+    """Wird ausgelöst, wenn kein Provider eine Übersetzung liefern konnte."""
+
+
+@dataclass
+class TranslationOutput:
+    """Antwort eines Providers"""
+    text: str
+    alternatives: List[str] = field(default_factory=list)
+    raw: Optional[Any] = None
+
+
+@dataclass
+class RoutedTranslation:
+    """Ergebnis eines Router-Aufrufs inkl. Herkunft"""
+    output: TranslationOutput
+    provider: str
+    latency_ms: float
+    hedged: bool = False
+
+
+# =============================================================================
+# STATISTIK
+# =============================================================================
+
+class ProviderStats:
+    """Latenz- und Gesundheitsstatistik eines Providers (threadsafe)"""
+
+    def __init__(self, alpha: float = 0.3, window: int = 50,
+                 failure_threshold: int = 2, cooldown_s: float = 30.0, max_cooldown_s: float = 300.0):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.ewma_ms: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_success(self, latency_ms: float):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.unhealthy_until = 0.0
+            self._latencies.append(latency_ms)
+            if self.ewma_ms is None:
+                self.ewma_ms = latency_ms
+            else:
+                self.ewma_ms = self.alpha * latency_ms + (1 - self.alpha) * self.ewma_ms
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                # Exponentielles Backoff, solange der Provider weiter ausfällt
+                exponent = self.consecutive_failures - self.failure_threshold
+                cooldown = min(self.cooldown_s * (2 ** exponent), self.max_cooldown_s)
+                self.unhealthy_until = time.monotonic() + cooldown
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def p95_ms(self) -> Optional[float]:
+        """95. Perzentil der letzten Latenzen (None ohne Messwerte)"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Kompakte Übersicht für GUI/Logs"""
+        p95 = self.p95_ms()
+        return {
+            'healthy': self.healthy,
+            'ewma_ms': round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            'p95_ms': round(p95, 1) if p95 is not None else None,
+            'successes': self.successes,
+            'failures': self.failures
+        }
+
+
+# =============================================================================
+# PROVIDER
+# =============================================================================
+
+class TranslationProvider(ABC):
+    """Basisklasse für Übersetzungs-Backends (ohne translate() nicht instanziierbar)"""
+
+    name = "provider"
+
+    def __init__(self, base_url: str, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or requests.Session()
+        self.stats = ProviderStats()
+
+    @abstractmethod
+    def translate(self, text: str, source: str, target: str, timeout: float) -> TranslationOutput:
+        """Übersetzt den Text; wirft TranslationError oder requests-Fehler bei Misserfolg"""
+
+    def _post(self, path: str, timeout: float, **kwargs) -> Any:
+        response = self.session.post(f"{self.base_url}{path}", timeout=timeout, **kwargs)
+        if response.status_code != 200:
+            raise TranslationError(f"{self.name}: HTTP {response.status_code}")
+        return response.json()
+
+
+class LibreTranslateProvider(TranslationProvider):
+    name = "LibreTranslate"
+
+    def __init__(self, base_url: str, api_key: str = '', **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+
+    def translate(self, text, source, target, timeout):
+        data = self._post('/translate', timeout, json={
+            'q': text,
+            'source': source,
+            'target': target,
+            'format': 'text',
+            'alternatives': 3,
+            'api_key': self.api_key
+        })
+        if 'translatedText' not in data:
+            raise TranslationError(f"{self.name}: Kein übersetzter Text in der Antwort")
+        return TranslationOutput(text=data['translatedText'], alternatives=data.get('alternatives') or [], raw=data)
+
+
+class GoogleTranslateProvider(TranslationProvider):
+    name = "Google"
+
+    def __init__(self, api_key: str, base_url: str = "https://translation.googleapis.com", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+
+    def translate(self, text, source, target, timeout):
+        payload = {'q': text, 'target': target, 'format': 'text'}
+        if source != 'auto':
+            payload['source'] = source
+        data = self._post('/language/translate/v2', timeout, params={'key': self.api_key}, json=payload)
+        try:
+            translated = data['data']['translations'][0]['translatedText']
+        except (KeyError, IndexError, TypeError):
+            raise TranslationError(f"{self.name}: Unerwartetes Antwortformat")
+        return TranslationOutput(text=translated, raw=data)
+
+
+class AzureTranslatorProvider(TranslationProvider):
+    name = "Azure"
+
+    def __init__(self, api_key: str, region: str = '',
+                 base_url: str = "https://api.cognitive.microsofttranslator.com", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+        self.region = region
+
+    def translate(self, text, source, target, timeout):
+        params = {'api-version': '3.0', 'to': target}
+        if source != 'auto':
+            params['from'] = source
+        headers = {'Ocp-Apim-Subscription-Key': self.api_key, 'Content-Type': 'application/json'}
+        if self.region:
+            headers['Ocp-Apim-Subscription-Region'] = self.region
+        data = self._post('/translate', timeout, params=params, headers=headers, json=[{'Text': text}])
+        try:
+            translated = data[0]['translations'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            raise TranslationError(f"{self.name}: Unerwartetes Antwortformat")
+        return TranslationOutput(text=translated, raw=data)
+
+
+class OpenAIProvider(TranslationProvider):
+    name = "OpenAI"
+
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1",
+                 model: str = "gpt-4o-mini", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+        self.model = model
+
+    def translate(self, text, source, target, timeout):
+        source_hint = "the detected source language" if source == 'auto' else f"'{source}'"
+        data = self._post('/chat/completions', timeout, headers={'Authorization': f'Bearer {self.api_key}'}, json={
+            'model': self.model,
+            'temperature': 0,
+            'messages': [
+                {'role': 'system', 'content': f"Translate the user's text from {source_hint} to '{target}'. "
+                                              "Reply with the translation only and keep the formatting."},
+                {'role': 'user', 'content': text}
+            ]
+        })
+        try:
+            translated = data['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            raise TranslationError(f"{self.name}: Unerwartetes Antwortformat")
+        return TranslationOutput(text=translated, raw=data)
+
+
+# =============================================================================
+# ROUTER
+# =============================================================================
+
+class TranslationRouter:
+    """
+    Leitet Übersetzungen an den schnellsten gesunden Provider weiter.
+
+    :param providers: Provider in Prioritätsreihenfolge (gilt solange keine Messwerte existieren)
+    :param hedging: Hedge-Anfrage an zweiten Provider senden, wenn der erste sein p95 überschreitet
+    :param hedge_min_samples: Mindestanzahl Messwerte, bevor ein p95 als Hedge-Schwelle gilt
+    :param timeout: Timeout pro Provider-Aufruf in Sekunden
+    """
+
+    def __init__(self, providers: List[TranslationProvider], hedging: bool = True,
+                 hedge_min_samples: int = 5, timeout: float = 60, max_workers: int = 8):
+        if not providers:
+            raise ValueError("Mindestens ein Übersetzungs-Provider ist erforderlich")
+        self.providers = providers
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate-router")
+
+    def ranked_providers(self) -> List[TranslationProvider]:
+        """Gesunde Provider nach EWMA-Latenz; ungemessene kommen zuerst dran, damit jeder Messwerte bekommt."""
+        order = {id(p): i for i, p in enumerate(self.providers)}
+
+        def sort_key(provider):
+            stats = provider.stats
+            ewma = stats.ewma_ms if stats.ewma_ms is not None else -1.0
+            return (not stats.healthy, ewma, order[id(provider)])
+
+        ranked = sorted(self.providers, key=sort_key)
+        healthy = [p for p in ranked if p.stats.healthy]
+        # Sind alle Provider gesperrt, trotzdem versuchen statt sofort aufzugeben
+        return healthy or ranked
+
+    def translate(self, text: str, source: str, target: str) -> RoutedTranslation:
+        """Übersetzt über den besten Provider, mit Hedging und Failover."""
+        candidates = self.ranked_providers()
+        errors = []
+        pending = {}  # Future -> Provider
+        hedged = False
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            pending[self._executor.submit(self._call, provider, text, source, target)] = provider
+
+        launch()
+        while pending:
+            wait_timeout = None
+            if self.hedging and not hedged and len(pending) == 1 and next_index < len(candidates):
+                wait_timeout = self._hedge_delay(next(iter(pending.values())))
+
+            done, _ = wait(list(pending), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primärer Provider ist langsamer als sein p95 -> Duplikat an den nächsten
+                hedged = True
+                launch()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    output, latency_ms = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    continue
+                # Verlierer laufen weiter und aktualisieren nur noch ihre Statistik
+                return RoutedTranslation(output=output, provider=provider.name, latency_ms=latency_ms, hedged=hedged)
+
+            if not pending and next_index < len(candidates):
+                launch()  # Failover auf den nächsten Provider
+
+        raise TranslationError("Alle Übersetzungs-Provider fehlgeschlagen: " + "; ".join(errors))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistik aller Provider"""
+        return {p.name: p.stats.snapshot() for p in self.providers}
+
+    def _hedge_delay(self, provider: TranslationProvider) -> Optional[float]:
+        if provider.stats.samples < self.hedge_min_samples:
+            return None
+        p95 = provider.stats.p95_ms()
+        return p95 / 1000 if p95 is not None else None
+
+    def _call(self, provider: TranslationProvider, text: str, source: str, target: str):
+        start_time = time.perf_counter()
+        try:
+            output = provider.translate(text, source, target, self.timeout)
+        except Exception:
+            provider.stats.record_failure()
+            raise
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        provider.stats.record_success(latency_ms)
+        return output, latency_ms
+
+
+def build_router_from_config(**kwargs) -> TranslationRouter:
+    """Erstellt einen Router mit allen in der .env konfigurierten Providern."""
+    providers: List[TranslationProvider] = [
+        LibreTranslateProvider(APIConfig.LIBRETRANSLATE_BASE_URL, api_key=APIConfig.LIBRETRANSLATE_API_KEY)
+    ]
+    if APIConfig.GOOGLE_TRANSLATE_API_KEY:
+        providers.append(GoogleTranslateProvider(APIConfig.GOOGLE_TRANSLATE_API_KEY,
+                                                 base_url=APIConfig.GOOGLE_TRANSLATE_BASE_URL))
+    if APIConfig.AZURE_TRANSLATOR_KEY:
+        providers.append(AzureTranslatorProvider(APIConfig.AZURE_TRANSLATOR_KEY,
+                                                 region=APIConfig.AZURE_TRANSLATOR_REGION,
+                                                 base_url=APIConfig.AZURE_TRANSLATOR_ENDPOINT))
+    if APIConfig.OPENAI_API_KEY:
+        providers.append(OpenAIProvider(APIConfig.OPENAI_API_KEY, base_url=APIConfig.OPENAI_BASE_URL,
+                                        model=APIConfig.OPENAI_TRANSLATION_MODEL))
+    kwargs.setdefault('hedging', APIConfig.TRANSLATION_HEDGING)
+    return TranslationRouter(providers, **kwargs)
+
+
+# Beispiel-Nutzung mit lokalen Stub-Servern
+if __name__ == "__main__":
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    def start_stub(delay_s: float) -> ThreadingHTTPServer:
+        """Startet einen LibreTranslate-kompatiblen Stub mit fester Verzögerung"""
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(delay_s)
+                body = json.dumps({'translatedText': f"[{delay_s}s] {payload['q']}"}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    slow, fast = start_stub(0.3), start_stub(0.05)
+    slow_provider = LibreTranslateProvider(f"http://127.0.0.1:{slow.server_address[1]}")
+    slow_provider.name = "Stub (langsam)"
+    fast_provider = LibreTranslateProvider(f"http://127.0.0.1:{fast.server_address[1]}")
+    fast_provider.name = "Stub (schnell)"
+
+    router = TranslationRouter([slow_provider, fast_provider], hedge_min_samples=3)
+    for i in range(8):
+        routed = router.translate(f"Hello {i}", 'en', 'de')
+        print(f"{routed.provider:16} | {routed.latency_ms:7.1f}ms | hedged={routed.hedged} | {routed.output.text}")
+    print(json.dumps(router.stats(), indent=2))
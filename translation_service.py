@@ -0,0 +1,277 @@
+"""
+translation_service.py
+Übersetzungsdienst für Mini Postman.
+Spracherkennung und Übersetzung über LibreTranslate sowie ein Hintergrund-Worker,
+damit die GUI die Response sofort anzeigen kann und die Übersetzung nachgereicht wird.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+import requests
+
+from env_config import APIConfig
+from translation_memory import TranslationMemory
+from translation_providers import (LibreTranslateProvider, TranslationError, TranslationRouter,
+                                   build_router_from_config)
+
+# Begrenze Text auf 1000 Zeichen für Übersetzung
+MAX_TRANSLATION_CHARS = 1000
+DETECT_TIMEOUT = 30
+TRANSLATE_TIMEOUT = 60
+
+# Maximale Anzahl gemerkter Aufträge (ältere, fertige Aufträge werden verworfen)
+MAX_TRACKED_JOBS = 50
+
+
+class TranslationCancelled(Exception):
+    """Wird ausgelöst, wenn ein Übersetzungsauftrag durch eine neue Anfrage veraltet ist."""
+
+
+@dataclass
+class TranslationResult:
+    """Ergebnis eines Übersetzungsauftrags (ohne Streamlit-Abhängigkeit)"""
+    source_lang: str
+    target_lang: str
+    status: str = "pending"  # pending | done | same_language | error | cancelled
+    translated_text: Optional[str] = None
+    alternatives: List[str] = field(default_factory=list)
+    raw: Optional[Any] = None
+    provider: Optional[str] = None
+    hedged: bool = False
+    memory_hits: int = 0
+    memory_misses: int = 0
+    # Hinweise für die GUI als (Level, Text), z.B. ("info", "🔍 Erkannte Sprache: en")
+    notices: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _check_cancel(cancel_event: Optional[threading.Event]):
+    """Bricht den Auftrag ab, falls er inzwischen veraltet ist."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise TranslationCancelled()
+
+
+def run_translation(text: str, source_lang: str, target_lang: str,
+                    base_url: Optional[str] = None,
+                    cancel_event: Optional[threading.Event] = None,
+                    router: Optional[TranslationRouter] = None,
+                    memory: Optional[TranslationMemory] = None) -> TranslationResult:
+    """
+    Erkennt (falls nötig) die Sprache über LibreTranslate und übersetzt den Text
+    über den schnellsten gesunden Provider des Routers. Mit Translation Memory
+    werden nur unbekannte Segmente übersetzt.
+
+    :param text: Zu übersetzender Text (wird auf MAX_TRANSLATION_CHARS gekürzt)
+    :param source_lang: Quellsprache oder "auto" für automatische Erkennung
+    :param target_lang: Zielsprache
+    :param base_url: LibreTranslate-Server, Standard aus APIConfig
+    :param cancel_event: Wird gesetzt, wenn der Auftrag veraltet ist
+    :param router: Übersetzungs-Router, Standard nur mit LibreTranslate unter base_url
+    :param memory: Optionale Translation Memory für (Beinahe-)Duplikate
+    :returns: TranslationResult mit Text, Alternativen und GUI-Hinweisen
+    """
+    base_url = (base_url or APIConfig.LIBRETRANSLATE_BASE_URL).rstrip('/')
+    api_key = APIConfig.LIBRETRANSLATE_API_KEY
+    router = router or TranslationRouter([LibreTranslateProvider(base_url, api_key=api_key)], timeout=TRANSLATE_TIMEOUT)
+    text_to_translate = text[:MAX_TRANSLATION_CHARS]
+    result = TranslationResult(source_lang=source_lang, target_lang=target_lang)
+
+    try:
+        _check_cancel(cancel_event)
+
+        # Schritt 1: Sprache erkennen (nur wenn auto)
+        if source_lang == "auto":
+            detect_response = requests.post(
+                f"{base_url}/detect",
+                json={'q': text_to_translate, 'api_key': api_key},
+                headers={'Content-Type': 'application/json'},
+                timeout=DETECT_TIMEOUT
+            )
+            _check_cancel(cancel_event)
+
+            if detect_response.status_code == 200:
+                detect_result = detect_response.json()
+                if detect_result and len(detect_result) > 0:
+                    detected_language = detect_result[0].get('language', 'en')
+                    confidence = detect_result[0].get('confidence', 0)
+                    result.notices.append(("info", f"🔍 Erkannte Sprache: **{detected_language}** (Konfidenz: {confidence:.1f}%)"))
+                    result.source_lang = detected_language
+                else:
+                    result.notices.append(("warning", "⚠️ Sprache konnte nicht erkannt werden - verwende Englisch"))
+                    result.source_lang = "en"
+            else:
+                result.notices.append(("error", f"❌ Spracherkennung fehlgeschlagen: HTTP {detect_response.status_code}"))
+                result.source_lang = "en"
+
+        # Schritt 2: Übersetzen (nur wenn Quellsprache != Zielsprache)
+        if result.source_lang == target_lang:
+            result.status = "same_language"
+            return result
+
+        if memory is None:
+            routed = router.translate(text_to_translate, result.source_lang, target_lang)
+            _check_cancel(cancel_event)
+            result.translated_text = routed.output.text
+            result.alternatives = routed.output.alternatives
+            result.raw = routed.output.raw
+            result.provider = routed.provider
+            result.hedged = routed.hedged
+        else:
+            # Nur Segmente, die die Translation Memory nicht kennt, gehen an den Router
+            last_routed = []
+
+            def translate_segments(segments):
+                _check_cancel(cancel_event)
+                routed = router.translate('\n'.join(segments), result.source_lang, target_lang)
+                last_routed.append(routed)
+                lines = routed.output.text.split('\n')
+                if len(lines) != len(segments):
+                    # Zeilenstruktur nicht erhalten -> Segmente einzeln übersetzen
+                    lines = [router.translate(segment, result.source_lang, target_lang).output.text
+                             for segment in segments]
+                return lines
+
+            translated = memory.translate(text_to_translate, result.source_lang, target_lang, translate_segments)
+            _check_cancel(cancel_event)
+            result.translated_text = translated.text
+            result.memory_hits = translated.hits
+            result.memory_misses = translated.misses
+            if last_routed:
+                result.raw = last_routed[-1].output.raw
+                result.provider = last_routed[-1].provider
+                result.hedged = last_routed[-1].hedged
+            else:
+                result.provider = "Translation Memory"
+        result.status = "done"
+
+    except TranslationCancelled:
+        result.status = "cancelled"
+    except TranslationError as e:
+        result.notices.append(("error", f"❌ Übersetzungsfehler: {e}"))
+        result.status = "error"
+    except requests.exceptions.Timeout:
+        result.notices.append(("warning", "⚠️ Zeitüberschreitung - Server antwortet nicht"))
+        result.status = "error"
+    except requests.exceptions.ConnectionError:
+        result.notices.append(("error", f"🚫 Verbindung fehlgeschlagen - Server nicht erreichbar auf {base_url}"))
+        result.status = "error"
+    except Exception as e:
+        result.notices.append(("error", f"❌ Unerwarteter Fehler: {str(e)}"))
+        result.status = "error"
+
+    return result
+
+
+@dataclass
+class TranslationJob:
+    """Ein laufender oder abgeschlossener Übersetzungsauftrag"""
+    request_id: str
+    owner: Optional[str]
+    future: Future
+    cancel_event: threading.Event
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self):
+        """Markiert den Auftrag als veraltet; noch nicht gestartete Aufträge laufen gar nicht erst."""
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def result(self) -> Optional[TranslationResult]:
+        """Gibt das Ergebnis zurück, falls der Auftrag fertig ist (sonst None)"""
+        if not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.result()
+
+
+class TranslationWorker:
+    """
+    Führt Übersetzungen im Hintergrund aus, damit die GUI nicht blockiert.
+
+    Jeder Auftrag ist an eine Request-ID gebunden. Ein neuer Auftrag desselben
+    Besitzers (z.B. einer Streamlit-Session) bricht alle älteren Aufträge ab,
+    damit sich keine veralteten Übersetzungen im Pool stauen.
+
+    Mit memory_file wird die Translation Memory nach jedem Auftrag mit neuen
+    Segmenten in diese Datei übernommen (gemeinsam mit dem Excel-Tool).
+    """
+
+    def __init__(self, max_workers: int = 4, base_url: Optional[str] = None,
+                 router: Optional[TranslationRouter] = None,
+                 memory: Optional[TranslationMemory] = None,
+                 memory_file: Optional[str] = None):
+        self.base_url = base_url
+        self.memory = memory if memory is not None else TranslationMemory()
+        self.memory_file = memory_file
+        self._save_lock = threading.Lock()
+        # Ohne explizite URL: alle in der .env konfigurierten Provider
+        self.router = router or (None if base_url else build_router_from_config(timeout=TRANSLATE_TIMEOUT))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translation")
+        self._jobs: "OrderedDict[str, TranslationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, request_id: str, text: str, source_lang: str, target_lang: str,
+               owner: Optional[str] = None) -> TranslationJob:
+        """Startet einen Auftrag und bricht veraltete Aufträge desselben Besitzers ab."""
+        with self._lock:
+            self._cancel_stale(owner, keep=request_id)
+
+            cancel_event = threading.Event()
+            future = self._executor.submit(
+                run_translation, text, source_lang, target_lang, self.base_url, cancel_event, self.router, self.memory
+            )
+            if self.memory_file:
+                future.add_done_callback(self._save_memory)
+            job = TranslationJob(request_id=request_id, owner=owner, future=future, cancel_event=cancel_event)
+            self._jobs[request_id] = job
+            self._prune()
+            return job
+
+    def get(self, request_id: str) -> Optional[TranslationJob]:
+        """Liefert den Auftrag zu einer Request-ID"""
+        with self._lock:
+            return self._jobs.get(request_id)
+
+    def cancel(self, owner: Optional[str] = None):
+        """Bricht alle Aufträge eines Besitzers ab"""
+        with self._lock:
+            self._cancel_stale(owner, keep=None)
+
+    def shutdown(self):
+        """Beendet den Worker-Pool"""
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel()
+            self._jobs.clear()
+        self._executor.shutdown(wait=False)
+
+    def _save_memory(self, future: Future):
+        # Nur speichern, wenn der Auftrag neue Segmente in die Memory gebracht hat
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if result.status != "done" or not result.memory_misses:
+            return
+        try:
+            with self._save_lock:
+                self.memory.save(self.memory_file, merge=True)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Translation Memory konnte nicht gespeichert werden: {e}")
+
+    def _cancel_stale(self, owner: Optional[str], keep: Optional[str]):
+        for request_id in [rid for rid, job in self._jobs.items() if job.owner == owner and rid != keep]:
+            self._jobs.pop(request_id).cancel()
+
+    def _prune(self):
+        # Nur fertige Aufträge verwerfen, laufende bleiben abrufbar
+        while len(self._jobs) > MAX_TRACKED_JOBS:
+            oldest_done = next((rid for rid, job in self._jobs.items() if job.done), None)
+            if oldest_done is None:
+                break
+            del self._jobs[oldest_done]
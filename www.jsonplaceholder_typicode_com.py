@@ -10,10 +10,10 @@ Datum: 2025-10-07
 
 import requests
 import pandas as pd
-import json
 import sys
 from datetime import datetime
 from env_config import APIConfig
+from json_codec import dumps, loads
 
 # API URLs
 url = "https://jsonplaceholder.typicode.com/users"
@@ -84,13 +84,13 @@ def fetch_users():
         response = requests.get(url, timeout=10)
         response.raise_for_status()
         
-        users = response.json()
+        users = loads(response.content)
         print(f"✅ Erfolgreich {len(users)} Benutzer geladen!")
         print()
         
         return users
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"❌ Fehler beim Laden der Daten: {e}")
         return None
 
@@ -101,13 +101,13 @@ def fetch_posts():
         response = requests.get(url_post, timeout=10)
         response.raise_for_status()
         
-        posts = response.json()
+        posts = loads(response.content)
         print(f"✅ Erfolgreich {len(posts)} Posts geladen!")
         print()
         
         return posts
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"❌ Fehler beim Laden der Posts: {e}")
         return None
 
@@ -167,7 +167,7 @@ def create_post():
         response = requests.post(url_post, json=post_data, timeout=10)
         response.raise_for_status()
         
-        created_post = response.json()
+        created_post = loads(response.content)
         
         print("✅ Post erfolgreich erstellt!")
         print_separator(True)
@@ -179,7 +179,7 @@ def create_post():
         
         return created_post
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"❌ Fehler beim Erstellen des Posts: {e}")
         return None
 
@@ -346,7 +346,7 @@ def main():
         elif choice == "8":
             # JSON-Rohdaten Benutzer
             print("📄 JSON-ROHDATEN (BENUTZER):")
-            print(json.dumps(users, indent=2, ensure_ascii=False))
+            print(dumps(users, indent=True))
             print()
             
         elif choice == "9":
@@ -354,7 +354,7 @@ def main():
             posts = fetch_posts()
             if posts:
                 print("📄 JSON-ROHDATEN (POSTS - erste 5):")
-                print(json.dumps(posts[:5], indent=2, ensure_ascii=False))
+                print(dumps(posts[:5], indent=True))
                 print()
             
         elif choice == "0":